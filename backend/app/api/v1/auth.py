@@ -4,12 +4,14 @@ Authentication routes for Google OAuth2.
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import create_access_token
+from app.core.security import create_access_token, get_current_user
+from app.core.user_cache import get_auth_cache
 from app.models.user import User
 from app.schemas.user import Token, User as UserSchema
 from app.services.oauth_service import oauth, configure_oauth, get_google_user_info
@@ -28,7 +30,7 @@ async def login(request: Request):
 
 
 @router.get("/callback")
-async def auth_callback(request: Request, db: Session = Depends(get_db)):
+async def auth_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Handle Google OAuth2 callback.
     
@@ -48,7 +50,8 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
             )
         
         # Check if user exists
-        user = db.query(User).filter(User.email == user_info['email']).first()
+        result = await db.execute(select(User).where(User.email == user_info['email']))
+        user = result.scalar_one_or_none()
         
         if not user:
             # Create new user
@@ -59,14 +62,19 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
                 avatar_url=user_info.get('picture')
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
             # Update existing user
             user.google_id = user_info.get('id')
             user.avatar_url = user_info.get('picture')
             user.full_name = user_info.get('name')
-            db.commit()
+            await db.commit()
+            
+            # Other workers hear about the change through the users trigger
+            auth_cache = get_auth_cache()
+            if auth_cache:
+                auth_cache.invalidate_user(user.id)
         
         # Create JWT token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -88,7 +96,7 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
 
 @router.get("/me", response_model=UserSchema)
 async def get_current_user_info(
-    current_user: User = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Get current user information."""
     return current_user
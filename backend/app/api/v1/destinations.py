@@ -0,0 +1,30 @@
+"""
+Destination autocomplete routes.
+"""
+from typing import List
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.destination import DestinationSuggestion
+from app.services.destination_index import get_destination_index
+
+router = APIRouter()
+
+
+@router.get("/autocomplete", response_model=List[DestinationSuggestion])
+async def autocomplete_destinations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Suggest cities and airports as the user types.
+    
+    `q` matches the start of any word of a name, an IATA code or an alias
+    ("lisboa", "muc", "york"), ignoring case and accents. Exact matches
+    come first, then the busiest destinations.
+    """
+    suggestions = get_destination_index().search(q, limit)
+    
+    # Built from our own dataset, so it is sent as is; the data only
+    # changes with a deploy
+    return ORJSONResponse(suggestions, headers={"Cache-Control": "public, max-age=3600"})
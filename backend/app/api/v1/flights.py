@@ -1,87 +1,89 @@
 """
 Flight search routes.
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.itinerary import SearchHistory
-from app.schemas.itinerary import FlightSearchParams, SearchHistory as SearchHistorySchema
+from app.schemas.itinerary import (
+    CLOCK_PATTERN,
+    FlightResultOptions,
+    FlightSearchParams,
+    SearchHistory as SearchHistorySchema
+)
+from app.services.flight_results import page_flights
+from app.services.search_history_writer import get_search_history_writer
+from app.services.search_result_store import list_search_history
+from app.services.search_service import get_search_aggregator
 
 router = APIRouter()
 
 
+def flight_result_options(
+    max_price: Optional[float] = Query(None, ge=0),
+    max_stops: Optional[int] = Query(None, ge=0),
+    depart_after: Optional[str] = Query(None, pattern=CLOCK_PATTERN),
+    depart_before: Optional[str] = Query(None, pattern=CLOCK_PATTERN),
+    airlines: Optional[List[str]] = Query(None),
+    pareto: bool = False,
+    sort: Optional[Literal["price", "duration", "best"]] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500)
+) -> FlightResultOptions:
+    """Result options from the query string, leaving the cached search body alone."""
+    return FlightResultOptions(
+        max_price=max_price,
+        max_stops=max_stops,
+        depart_after=depart_after,
+        depart_before=depart_before,
+        airlines=airlines,
+        pareto=pareto,
+        sort=sort,
+        offset=offset,
+        limit=limit
+    )
+
+
 @router.post("/search")
 async def search_flights(
     params: FlightSearchParams,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    options: FlightResultOptions = Depends(flight_result_options),
+    current_user: User = Depends(get_current_user)
 ):
     """
-    Search for flights.
+    Search for flights across all configured providers.
     
-    Note: This is a placeholder. In production, integrate with flight APIs
-    like Amadeus, Skyscanner, or Google Flights API.
+    Providers are queried concurrently; any that time out or fail are
+    listed in `providers` and the response is marked `partial`. Query
+    parameters filter, sort and page the merged offers without changing
+    what is searched or cached.
     """
-    # Mock flight results
-    mock_results = {
-        "flights": [
-            {
-                "id": "FL001",
-                "airline": "Example Airlines",
-                "origin": params.origin,
-                "destination": params.destination,
-                "departure_time": f"{params.departure_date}T10:00:00",
-                "arrival_time": f"{params.departure_date}T14:00:00",
-                "duration": "4h 00m",
-                "price": 299.99,
-                "currency": "USD",
-                "stops": 0,
-                "cabin_class": params.cabin_class
-            },
-            {
-                "id": "FL002",
-                "airline": "Budget Air",
-                "origin": params.origin,
-                "destination": params.destination,
-                "departure_time": f"{params.departure_date}T15:30:00",
-                "arrival_time": f"{params.departure_date}T19:45:00",
-                "duration": "4h 15m",
-                "price": 199.99,
-                "currency": "USD",
-                "stops": 1,
-                "cabin_class": params.cabin_class
-            }
-        ],
-        "search_params": params.dict()
-    }
+    results = await get_search_aggregator().search("flight", params.dict())
     
-    # Save search history
-    search_history = SearchHistory(
-        user_id=current_user.id,
-        search_type="flight",
-        search_params=params.dict(),
-        results=mock_results
+    # Persisted in the background so the response does not wait on a commit
+    await get_search_history_writer().record(
+        current_user.id, "flight", params.dict(), results
     )
-    db.add(search_history)
-    db.commit()
     
-    return mock_results
+    return page_flights(results, options)
 
 
 @router.get("/history", response_model=List[SearchHistorySchema])
 async def get_flight_search_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    limit: int = 10
+    db: AsyncSession = Depends(get_db),
+    limit: int = 10,
+    include_results: bool = False
 ):
-    """Get user's flight search history."""
-    searches = db.query(SearchHistory).filter(
-        SearchHistory.user_id == current_user.id,
-        SearchHistory.search_type == "flight"
-    ).order_by(SearchHistory.created_at.desc()).limit(limit).all()
+    """
+    Get user's flight search history.
     
-    return searches
+    Offers are only loaded when `include_results` is set.
+    """
+    entries, _ = await list_search_history(
+        db, current_user.id, "flight", limit, include_results=include_results
+    )
+    return entries
@@ -0,0 +1,54 @@
+"""
+Unified search history routes.
+"""
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.conditional import none_match, not_modified, set_cache_headers
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.itinerary import SearchHistoryPage
+from app.services.search_result_store import list_search_history, search_history_etag
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchHistoryPage)
+async def get_search_history(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    search_type: Optional[Literal["flight", "hotel", "experience"]] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_results: bool = False,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get the user's search history across all search types, newest first.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page;
+    it is null on the last page. Offers are only loaded when
+    `include_results` is set. Answers 304 when `If-None-Match` holds the
+    page's current ETag.
+    """
+    etag = await search_history_etag(
+        db, current_user.id, search_type, limit, cursor, include_results
+    )
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        items, next_cursor = await list_search_history(
+            db, current_user.id, search_type, limit, cursor, include_results
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    set_cache_headers(response, etag)
+    return SearchHistoryPage(items=items, next_cursor=next_cursor)
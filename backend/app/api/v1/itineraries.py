@@ -1,88 +1,351 @@
 """
 Itinerary routes for AI-generated travel plans.
 """
-from typing import List
+import asyncio
+import json
+from typing import Any, List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Text, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.conditional import check_if_match, none_match, not_modified, set_cache_headers
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.responses import (
+    fields_response,
+    itinerary_batch_response,
+    itinerary_page_response,
+    itinerary_response
+)
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.itinerary import Itinerary
+from app.models.job import ItineraryJob
 from app.schemas.itinerary import (
     Itinerary as ItinerarySchema,
     ItineraryCreate,
     ItineraryUpdate,
-    AIItineraryRequest
+    ItineraryPage,
+    ItinerarySearchPage,
+    ItineraryBatchCreate,
+    ItineraryBatchResponse,
+    ItineraryIdList,
+    JSONPatchOperation,
+    AIItineraryRequest,
+    DayRegenerateRequest,
+    ItineraryJob as ItineraryJobSchema
+)
+from app.services.gemini_service import GeminiService, get_gemini_service
+from app.services.itinerary_service import (
+    DETAIL_FIELDS,
+    SUMMARY_FIELDS,
+    build_generated_itinerary,
+    create_itineraries,
+    delete_user_itineraries,
+    get_itinerary_etag,
+    get_user_itineraries,
+    get_user_itinerary,
+    itinerary_etag,
+    itinerary_fields,
+    itinerary_list_etag,
+    list_itinerary_summaries,
+    parse_fields,
+    search_itineraries
 )
-from app.services.gemini_service import GeminiService
+from app.services.job_queue import TERMINAL_JOB_STATUSES, get_job_queue
+from app.services.json_patch import JSONPatchError, patch_itinerary as apply_json_patch
 
 router = APIRouter()
 
 
+def _sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _check_batch_size(size: int) -> None:
+    """Reject empty batches and batches above ITINERARY_BATCH_MAX_SIZE."""
+    if size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A batch needs at least one item"
+        )
+    if size > settings.ITINERARY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can have at most {settings.ITINERARY_BATCH_MAX_SIZE} items"
+        )
+
+
 @router.post("/generate")
 async def generate_itinerary(
     request: AIItineraryRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service)
 ):
     """
     Generate an AI-powered travel itinerary using Gemini.
     """
-    gemini_service = GeminiService()
-    
     # Generate itinerary using Gemini AI
-    ai_content = gemini_service.generate_itinerary(
+    ai_content = await gemini_service.generate_itinerary(
         destination=request.destination,
         start_date=request.start_date,
         end_date=request.end_date,
         preferences=request.preferences,
-        budget=request.budget
+        budget=request.budget,
+        bypass_cache=request.bypass_cache,
+        prompt_version=request.prompt_version
     )
     
     # Create itinerary in database
-    itinerary = Itinerary(
-        user_id=current_user.id,
-        title=f"Trip to {request.destination}",
-        destination=request.destination,
-        description=ai_content.get("overview", ""),
-        ai_content=ai_content
-    )
+    itinerary = build_generated_itinerary(current_user.id, request, ai_content)
     
     db.add(itinerary)
-    db.commit()
-    db.refresh(itinerary)
+    await db.commit()
+    await db.refresh(itinerary)
     
     return itinerary
 
 
-@router.get("", response_model=List[ItinerarySchema])
+@router.post("/generate/stream")
+async def generate_itinerary_stream(
+    request: AIItineraryRequest,
+    current_user: User = Depends(get_current_user),
+    gemini_service: GeminiService = Depends(get_gemini_service)
+):
+    """
+    Generate an AI-powered travel itinerary, streamed as Server-Sent Events.
+    
+    Emits a `day` event for each day as soon as the model finishes it, then a
+    `complete` event with the saved itinerary.
+    """
+    user_id = current_user.id
+    
+    async def event_stream():
+        async for event, data in gemini_service.stream_itinerary(
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            preferences=request.preferences,
+            budget=request.budget,
+            bypass_cache=request.bypass_cache,
+            prompt_version=request.prompt_version
+        ):
+            if event == "day":
+                yield _sse_event("day", data)
+                continue
+            
+            # The request-scoped session is closed once streaming starts
+            async with AsyncSessionLocal() as db:
+                itinerary = build_generated_itinerary(user_id, request, data)
+                db.add(itinerary)
+                await db.commit()
+                await db.refresh(itinerary)
+            
+            yield _sse_event(
+                "complete",
+                ItinerarySchema.model_validate(itinerary).model_dump(mode="json")
+            )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs", response_model=ItineraryJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_generation_job(
+    request: AIItineraryRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue AI itinerary generation and return immediately.
+    
+    Poll `GET /itineraries/jobs/{job_id}` or subscribe to
+    `GET /itineraries/jobs/{job_id}/events`; the itinerary is saved when the
+    job succeeds and its id is reported as `itinerary_id`.
+    """
+    return await get_job_queue().enqueue(current_user.id, request)
+
+
+async def _get_user_job(db: AsyncSession, job_id: UUID, user_id: UUID) -> ItineraryJob:
+    """Load a job owned by the user or raise 404."""
+    result = await db.execute(
+        select(ItineraryJob).where(
+            ItineraryJob.id == job_id,
+            ItineraryJob.user_id == user_id
+        )
+    )
+    job = result.scalar_one_or_none()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=ItineraryJobSchema)
+async def get_generation_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the status of an itinerary generation job."""
+    return await _get_user_job(db, job_id, current_user.id)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream job status changes as Server-Sent Events.
+    
+    Emits a `status` event whenever the job changes and closes after the
+    job succeeds or fails.
+    """
+    await _get_user_job(db, job_id, current_user.id)
+    user_id = current_user.id
+    
+    async def event_stream():
+        last_seen = None
+        while True:
+            async with AsyncSessionLocal() as poll_db:
+                try:
+                    job = await _get_user_job(poll_db, job_id, user_id)
+                except HTTPException:
+                    return
+            payload = ItineraryJobSchema.model_validate(job).model_dump(mode="json")
+            
+            if payload != last_seen:
+                yield _sse_event("status", payload)
+                last_seen = payload
+            if job.status in TERMINAL_JOB_STATUSES:
+                return
+            
+            await asyncio.sleep(settings.ITINERARY_JOB_POLL_INTERVAL_SECONDS)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("", response_model=ItineraryPage)
 async def get_itineraries(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 10
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get user's itineraries."""
-    itineraries = db.query(Itinerary).filter(
-        Itinerary.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    """
+    Get user's itineraries as summaries, newest first.
     
-    return itineraries
+    Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    `fields` is a comma-separated subset of summary fields to return.
+    Answers 304 when `If-None-Match` holds the page's current ETag.
+    """
+    try:
+        requested = parse_fields(fields, SUMMARY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    etag = await itinerary_list_etag(
+        db, current_user.id, limit, cursor, ",".join(sorted(requested or ()))
+    )
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    
+    try:
+        items, next_cursor = await list_itinerary_summaries(
+            db, current_user.id, limit, cursor, requested
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if requested is not None:
+        response = fields_response({"items": items, "next_cursor": next_cursor})
+    else:
+        response = itinerary_page_response(items, next_cursor)
+    return set_cache_headers(response, etag)
+
+
+@router.get("/search", response_model=ItinerarySearchPage)
+async def search_user_itineraries(
+    q: str = Query(..., min_length=1, max_length=200),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """
+    Search the user's itineraries, best match first.
+    
+    `q` uses web search syntax (quoted phrases, `or`, `-word`) over titles,
+    destinations, descriptions and activities; destinations also match
+    with typos. Each result carries a `snippet` with matches wrapped in
+    `<mark>`. Pass the returned `next_cursor` as `cursor` for more results.
+    """
+    try:
+        items, next_cursor = await search_itineraries(db, current_user.id, q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get("/{itinerary_id}", response_model=ItinerarySchema)
 async def get_itinerary(
     itinerary_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get a specific itinerary."""
-    itinerary = db.query(Itinerary).filter(
-        Itinerary.id == itinerary_id,
-        Itinerary.user_id == current_user.id
-    ).first()
+    """
+    Get a specific itinerary.
+    
+    `fields` is a comma-separated subset of itinerary fields to return;
+    columns that are not requested are not loaded. Answers 304 when
+    `If-None-Match` holds the current ETag, after a primary key lookup
+    that does not touch the JSONB columns.
+    """
+    try:
+        requested = parse_fields(fields, DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if if_none_match:
+        etag = await get_itinerary_etag(db, itinerary_id, current_user.id, requested)
+        if etag is not None and none_match(if_none_match, etag):
+            return not_modified(etag)
+    
+    itinerary = await get_user_itinerary(db, itinerary_id, current_user.id, requested)
     
     if not itinerary:
         raise HTTPException(
@@ -90,14 +353,19 @@ async def get_itinerary(
             detail="Itinerary not found"
         )
     
-    return itinerary
+    etag = itinerary_etag(itinerary.id, itinerary.created_at, itinerary.updated_at, requested)
+    if requested is not None:
+        response = fields_response(itinerary_fields(itinerary, requested))
+    else:
+        response = itinerary_response(itinerary)
+    return set_cache_headers(response, etag)
 
 
 @router.post("", response_model=ItinerarySchema)
 async def create_itinerary(
     itinerary_data: ItineraryCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new itinerary manually."""
     itinerary = Itinerary(
@@ -106,8 +374,8 @@ async def create_itinerary(
     )
     
     db.add(itinerary)
-    db.commit()
-    db.refresh(itinerary)
+    await db.commit()
+    await db.refresh(itinerary)
     
     return itinerary
 
@@ -117,13 +385,18 @@ async def update_itinerary(
     itinerary_id: UUID,
     itinerary_data: ItineraryUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None)
 ):
-    """Update an itinerary."""
-    itinerary = db.query(Itinerary).filter(
-        Itinerary.id == itinerary_id,
-        Itinerary.user_id == current_user.id
-    ).first()
+    """
+    Update an itinerary.
+    
+    With `If-Match`, the update only happens if the itinerary still has
+    that ETag; otherwise 412 is returned.
+    """
+    itinerary = await get_user_itinerary(
+        db, itinerary_id, current_user.id, for_update=if_match is not None
+    )
     
     if not itinerary:
         raise HTTPException(
@@ -131,27 +404,96 @@ async def update_itinerary(
             detail="Itinerary not found"
         )
     
+    check_if_match(if_match, itinerary_etag(itinerary.id, itinerary.created_at, itinerary.updated_at))
+    
     # Update fields
     for field, value in itinerary_data.dict(exclude_unset=True).items():
         setattr(itinerary, field, value)
     
-    db.commit()
-    db.refresh(itinerary)
+    await db.commit()
+    await db.refresh(itinerary)
     
-    return itinerary
+    return set_cache_headers(
+        itinerary_response(itinerary),
+        itinerary_etag(itinerary.id, itinerary.created_at, itinerary.updated_at)
+    )
+
+
+@router.patch("/{itinerary_id}", response_model=ItinerarySchema)
+async def patch_itinerary(
+    itinerary_id: UUID,
+    operations: List[JSONPatchOperation],
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Partially update an itinerary with a JSON Patch (RFC 6902).
+    
+    Paths start with the field name, e.g. `/ai_content/days/0/title`.
+    The patch is applied atomically in the database: if a `test` fails or
+    a path does not exist, nothing changes and 409 is returned.
+    """
+    if len(operations) > settings.JSON_PATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A patch can have at most {settings.JSON_PATCH_MAX_OPERATIONS} operations"
+        )
+    
+    if if_match is not None:
+        current = await get_user_itinerary(
+            db, itinerary_id, current_user.id, fields=set(), for_update=True
+        )
+        if not current:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Itinerary not found"
+            )
+        check_if_match(if_match, itinerary_etag(current.id, current.created_at, current.updated_at))
+    
+    try:
+        itinerary = await apply_json_patch(db, itinerary_id, current_user.id, operations)
+    except JSONPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not itinerary:
+        if await get_itinerary_etag(db, itinerary_id, current_user.id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Itinerary not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Patch could not be applied"
+        )
+    
+    await db.commit()
+    
+    return set_cache_headers(
+        itinerary_response(itinerary),
+        itinerary_etag(itinerary.id, itinerary.created_at, itinerary.updated_at)
+    )
 
 
 @router.delete("/{itinerary_id}")
 async def delete_itinerary(
     itinerary_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None)
 ):
-    """Delete an itinerary."""
-    itinerary = db.query(Itinerary).filter(
-        Itinerary.id == itinerary_id,
-        Itinerary.user_id == current_user.id
-    ).first()
+    """
+    Delete an itinerary.
+    
+    With `If-Match`, the itinerary is only deleted if it still has that
+    ETag; otherwise 412 is returned.
+    """
+    itinerary = await get_user_itinerary(
+        db, itinerary_id, current_user.id, fields=set(), for_update=if_match is not None
+    )
     
     if not itinerary:
         raise HTTPException(
@@ -159,25 +501,179 @@ async def delete_itinerary(
             detail="Itinerary not found"
         )
     
-    db.delete(itinerary)
-    db.commit()
+    check_if_match(if_match, itinerary_etag(itinerary.id, itinerary.created_at, itinerary.updated_at))
+    
+    await db.delete(itinerary)
+    await db.commit()
     
     return {"message": "Itinerary deleted successfully"}
 
 
+@router.post("/batch", response_model=ItineraryBatchResponse)
+async def create_itineraries_batch(
+    batch: ItineraryBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create several itineraries with one INSERT and one commit.
+    
+    Items are validated together, so one invalid item rejects the request
+    with 422 and nothing is created. Results are in request order.
+    """
+    _check_batch_size(len(batch.items))
+    
+    itineraries = await create_itineraries(db, current_user.id, batch.items)
+    await db.commit()
+    
+    return itinerary_batch_response([
+        {"id": itinerary.id, "status": status.HTTP_201_CREATED, "itinerary": itinerary}
+        for itinerary in itineraries
+    ])
+
+
+@router.post("/batch-get", response_model=ItineraryBatchResponse)
+async def get_itineraries_batch(
+    request: ItineraryIdList,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get several itineraries with one query.
+    
+    Each id gets its own result: 200 with the itinerary, or 404 if it does
+    not exist or belongs to another user.
+    """
+    _check_batch_size(len(request.ids))
+    
+    found = await get_user_itineraries(db, request.ids, current_user.id)
+    
+    return itinerary_batch_response([
+        {"id": itinerary_id, "status": status.HTTP_200_OK, "itinerary": found[itinerary_id]}
+        if itinerary_id in found else
+        {"id": itinerary_id, "status": status.HTTP_404_NOT_FOUND, "error": "Itinerary not found"}
+        for itinerary_id in request.ids
+    ])
+
+
+@router.post("/batch-delete", response_model=ItineraryBatchResponse)
+async def delete_itineraries_batch(
+    request: ItineraryIdList,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete several itineraries with one statement and one commit.
+    
+    Each id gets its own result: 200 if it was deleted, 404 if it does not
+    exist or belongs to another user.
+    """
+    _check_batch_size(len(request.ids))
+    
+    deleted = await delete_user_itineraries(db, request.ids, current_user.id)
+    await db.commit()
+    
+    return itinerary_batch_response([
+        {"id": itinerary_id, "status": status.HTTP_200_OK}
+        if itinerary_id in deleted else
+        {"id": itinerary_id, "status": status.HTTP_404_NOT_FOUND, "error": "Itinerary not found"}
+        for itinerary_id in request.ids
+    ])
+
+
+@router.post("/{itinerary_id}/days/{day_number}/regenerate")
+async def regenerate_itinerary_day(
+    itinerary_id: UUID,
+    day_number: int = Path(..., ge=1),
+    request: Optional[DayRegenerateRequest] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service)
+):
+    """
+    Regenerate a single day (1-based) of an itinerary.
+    
+    Only the target day and its neighbours are read and sent to the model,
+    and the day is replaced in place with `jsonb_set`.
+    """
+    index = day_number - 1
+    days = Itinerary.ai_content["days"]
+    result = await db.execute(
+        select(
+            Itinerary.destination,
+            func.jsonb_array_length(days),
+            days[index - 1] if index > 0 else None,
+            days[index],
+            days[index + 1]
+        ).where(
+            Itinerary.id == itinerary_id,
+            Itinerary.user_id == current_user.id
+        )
+    )
+    row = result.first()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Itinerary not found"
+        )
+    
+    destination, day_count, previous_day, day, next_day = row
+    if index < 0 or not day_count or index >= day_count or not isinstance(day, dict):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Day not found"
+        )
+    
+    new_day = await gemini_service.regenerate_day(
+        destination=destination,
+        day=day,
+        previous_day=previous_day,
+        next_day=next_day,
+        preferences=request.preferences if request else None,
+        prompt_version=request.prompt_version if request else None
+    )
+    
+    if new_day is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Unable to regenerate this day. Please try again later."
+        )
+    
+    # Rewrite only this array element instead of the whole ai_content column
+    await db.execute(
+        update(Itinerary).where(
+            Itinerary.id == itinerary_id,
+            Itinerary.user_id == current_user.id
+        ).values(
+            ai_content=func.jsonb_set(
+                Itinerary.ai_content,
+                bindparam("day_path", ["days", str(index)], type_=ARRAY(Text)),
+                bindparam("day_value", new_day, type_=JSONB)
+            )
+        ).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    
+    return new_day
+
+
 @router.post("/recommendations")
 async def get_recommendations(
     preferences: dict,
     budget: str = None,
-    current_user: User = Depends(get_current_user)
+    bypass_cache: bool = False,
+    prompt_version: Optional[Literal["v1", "v2"]] = None,
+    current_user: User = Depends(get_current_user),
+    gemini_service: GeminiService = Depends(get_gemini_service)
 ):
     """Get destination recommendations based on preferences."""
     try:
-        gemini_service = GeminiService()
-        
-        recommendations = gemini_service.get_destination_recommendations(
+        recommendations = await gemini_service.get_destination_recommendations(
             preferences=preferences,
-            budget=budget
+            budget=budget,
+            bypass_cache=bypass_cache,
+            prompt_version=prompt_version
         )
         
         return recommendations
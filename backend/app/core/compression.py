@@ -0,0 +1,230 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+Complete responses of a compressible type above COMPRESSION_MIN_SIZE are
+compressed with the best codec the client accepts. Responses carrying an
+ETag describe one immutable version of a resource, so their compressed
+bodies are cached by ETag and codec and hot itineraries are compressed
+once. Streaming responses (Server-Sent Events and anything sent in more
+than one chunk) pass through untouched so events are not held back.
+
+brotli and zstandard are optional; codecs whose package is missing are
+simply not offered.
+"""
+import gzip
+from typing import Callable, Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.ai_cache import LRUTTLCache
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def _gzip(level: int) -> Callable[[bytes], bytes]:
+    # mtime=0 keeps output identical for identical input
+    return lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(quality: int) -> Optional[Callable[[bytes], bytes]]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return lambda body: brotli.compress(body, quality=quality)
+
+
+def _zstd(level: int) -> Optional[Callable[[bytes], bytes]]:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    compressor = zstandard.ZstdCompressor(level=level)
+    return compressor.compress
+
+
+def build_codecs(
+    gzip_level: Optional[int] = None,
+    brotli_quality: Optional[int] = None,
+    zstd_level: Optional[int] = None
+) -> Dict[str, Callable[[bytes], bytes]]:
+    """
+    Compressors by content-coding name for the installed codecs.
+
+    Levels default to the COMPRESSION_* settings.
+    """
+    codecs = {
+        "zstd": _zstd(settings.COMPRESSION_ZSTD_LEVEL if zstd_level is None else zstd_level),
+        "br": _brotli(settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality),
+        "gzip": _gzip(settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level),
+    }
+    return {name: compress for name, compress in codecs.items() if compress is not None}
+
+
+def negotiate(accept_encoding: str, codecs: Sequence[str]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, br;q=0.9"
+        codecs: Available codings in server preference order
+
+    Returns:
+        The coding with the highest q-value (ties go to server order), or
+        None if the client accepts none of them
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for codec in codecs:
+        weight = weights.get(codec, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+class CompressionCache:
+    """Compressed bodies keyed by path, ETag and codec, plus counters."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        """Initialize the LRU and counters."""
+        self._bodies = LRUTTLCache(
+            max_entries or settings.COMPRESSION_CACHE_MAX_ENTRIES,
+            ttl_seconds or settings.COMPRESSION_CACHE_TTL_SECONDS
+        )
+        self.responses: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(
+        self,
+        codec: str,
+        compress: Callable[[bytes], bytes],
+        body: bytes,
+        path: str,
+        etag: Optional[str]
+    ) -> bytes:
+        """Compress a body, reusing the cached result for a known ETag."""
+        key = f"{codec}:{path}:{etag}" if etag else None
+        compressed = self._bodies.get(key) if key else None
+        if compressed is None:
+            compressed = compress(body)
+            if key:
+                self._bodies.set(key, compressed)
+        self.responses[codec] = self.responses.get(codec, 0) + 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self) -> Dict[str, object]:
+        """Counters for monitoring."""
+        return {
+            **self._bodies.stats(),
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+        }
+
+
+_compression_cache: Optional[CompressionCache] = None
+
+
+def get_compression_cache() -> CompressionCache:
+    """Process-wide compressed body cache."""
+    global _compression_cache
+    if _compression_cache is None:
+        _compression_cache = CompressionCache()
+    return _compression_cache
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses.
+
+    The ETag is passed through unchanged: it names the resource version,
+    and `Vary: Accept-Encoding` keeps caches from mixing encodings. This
+    keeps If-Match working whichever encoding the client received.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        """Wrap `app`."""
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.codecs = build_codecs()
+        self.order = [codec for codec in settings.COMPRESSION_CODECS if codec in self.codecs]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.order)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or content_type.startswith("text/event-stream")
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start until we know whether the body is complete
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming or too small: send as is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            compressed = get_compression_cache().compress(
+                codec, self.codecs[codec], body, scope["path"], headers.get("etag")
+            )
+            headers["Content-Encoding"] = codec
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
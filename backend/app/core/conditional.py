@@ -0,0 +1,64 @@
+"""
+HTTP conditional requests: ETags, If-None-Match and If-Match.
+"""
+import hashlib
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Response, status
+
+# Responses are per user and must be revalidated before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag derived from the parts identifying a representation."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _entity_tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check If-None-Match using weak comparison.
+
+    Returns:
+        True if the client's copy is current and a 304 should be sent
+    """
+    if not if_none_match:
+        return False
+    for tag in _entity_tags(if_none_match):
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def check_if_match(if_match: Optional[str], etag: str) -> None:
+    """
+    Check If-Match using strong comparison.
+
+    Raises:
+        HTTPException: 412 if the header is present and no tag matches
+    """
+    if if_match is None:
+        return
+    tags = _entity_tags(if_match)
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource has been modified"
+        )
+
+
+def set_cache_headers(response: Response, etag: str) -> Response:
+    """Attach ETag and Cache-Control to a response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a current client copy."""
+    return set_cache_headers(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag)
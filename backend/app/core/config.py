@@ -1,7 +1,7 @@
 """
 Application configuration using Pydantic Settings.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import AnyHttpUrl, validator
 from pydantic_settings import BaseSettings
 
@@ -21,6 +21,8 @@ class Settings(BaseSettings):
     DB_NAME: str = "triptrop"
     DB_USER: str
     DB_PASSWORD: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30
     
     # Google Cloud
     GOOGLE_CLOUD_PROJECT: str
@@ -33,12 +35,99 @@ class Settings(BaseSettings):
     
     # Gemini AI
     GEMINI_API_KEY: str
+    GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_PROMPT_VERSION: str = "v2"
+    GEMINI_MAX_CONCURRENCY: int = 8
+    ITINERARY_CHUNK_THRESHOLD_DAYS: int = 5
+    ITINERARY_CHUNK_DAYS: int = 3
+    
+    # Gemini model routing and hedging
+    GEMINI_LARGE_MODEL: str = "gemini-1.5-pro"
+    GEMINI_LARGE_MODEL_MIN_DAYS: int = 4
+    GEMINI_LARGE_MODEL_MIN_PREFERENCES: int = 8
+    GEMINI_HEDGE_ENABLED: bool = False
+    GEMINI_HEDGE_MODEL: str = ""
+    GEMINI_HEDGE_PERCENTILE: float = 95.0
+    GEMINI_HEDGE_MIN_SAMPLES: int = 20
+    GEMINI_HEDGE_MAX_RATIO: float = 0.1
+    GEMINI_LATENCY_WINDOW: int = 1000
+    
+    # AI response cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_SHARED_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 1024
+    AI_CACHE_TTL_SECONDS: int = 86400
+    AI_CACHE_CLEANUP_INTERVAL_SECONDS: int = 3600  # 0 disables the expired-row sweep
+    
+    # Background itinerary generation jobs
+    ITINERARY_JOB_WORKERS: int = 2
+    ITINERARY_JOB_MAX_ATTEMPTS: int = 3
+    ITINERARY_JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+    ITINERARY_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    ITINERARY_JOB_TIMEOUT_SECONDS: int = 300
+    
+    # Search providers
+    SEARCH_PROVIDERS: List[str] = ["mock"]
+    SEARCH_DEADLINE_SECONDS: float = 3.0
+    SEARCH_PROVIDER_TIMEOUT_SECONDS: float = 2.0
+    SEARCH_FAKE_LATENCY_SECONDS: float = 0.2
+    SEARCH_FAKE_JITTER_SECONDS: float = 0.3
+    SEARCH_FAKE_ERROR_RATE: float = 0.05
+    
+    # Search result cache ("memory", "redis" or "none")
+    SEARCH_CACHE_BACKEND: str = "memory"
+    SEARCH_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    SEARCH_CACHE_MAX_ENTRIES: int = 5000
+    SEARCH_CACHE_TTL_SECONDS: Dict[str, int] = {"flight": 300, "hotel": 1800, "experience": 21600}
+    SEARCH_CACHE_STALE_SECONDS: Dict[str, int] = {"flight": 300, "hotel": 1800, "experience": 21600}
+    
+    # Flight result ranking (weights of the "best" sort; columns kept per cached search)
+    FLIGHT_BEST_WEIGHTS: Dict[str, float] = {"price": 0.5, "duration": 0.35, "stops": 0.15}
+    FLIGHT_TABLE_CACHE_MAX_ENTRIES: int = 256
+    
+    # Search history write-behind ("block" or "drop" when the queue is full)
+    SEARCH_HISTORY_BATCH_SIZE: int = 200
+    SEARCH_HISTORY_FLUSH_INTERVAL_MS: int = 250
+    SEARCH_HISTORY_QUEUE_SIZE: int = 10000
+    SEARCH_HISTORY_QUEUE_POLICY: str = "block"
+    SEARCH_HISTORY_ENQUEUE_TIMEOUT_MS: int = 50
+    SEARCH_BLOB_CLEANUP_INTERVAL_SECONDS: int = 3600  # 0 disables the orphaned-blob sweep
+    
+    # JSON Patch (PATCH /itineraries/{id})
+    JSON_PATCH_MAX_OPERATIONS: int = 100
+    
+    # Batch endpoints (POST /itineraries/batch, batch-get, batch-delete)
+    ITINERARY_BATCH_MAX_SIZE: int = 100
+    
+    # Destination autocomplete (prebuilt index file; defaults to app/data/destinations.idx)
+    DESTINATION_INDEX_PATH: Optional[str] = None
+    
+    # API responses (skip re-validating stored itinerary JSONB on the way out)
+    RESPONSE_TRUSTED_OUTPUT: bool = True
+    
+    # Response compression (codecs in preference order: zstd, br, gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CODECS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 1000
+    COMPRESSION_CACHE_TTL_SECONDS: int = 3600
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Authenticated user cache
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_LISTEN_ENABLED: bool = True
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 300
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
     
@@ -1,22 +1,40 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from typing import AsyncIterator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_async_database_url(url: str) -> str:
+    """Rewrite a plain PostgreSQL URL to use the asyncpg driver."""
+    database_url = make_url(url)
+    if database_url.drivername in ("postgresql", "postgres", "postgresql+psycopg2"):
+        database_url = database_url.set(drivername="postgresql+asyncpg")
+    return database_url.render_as_string(hide_password=False)
+
+
+engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 Base = declarative_base()
 
 
-def get_db() -> Session:
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Dependency to get database session."""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
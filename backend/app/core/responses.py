@@ -0,0 +1,108 @@
+"""
+Fast JSON responses for large itinerary payloads.
+
+Routes that return itineraries serialize them here with precompiled
+TypeAdapters straight to JSON bytes, instead of letting FastAPI validate
+the ORM row, dump it to Python objects and encode those with `json`.
+With RESPONSE_TRUSTED_OUTPUT the JSONB content we wrote ourselves is not
+re-validated on the way out.
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.models.itinerary import Itinerary
+from app.schemas.itinerary import (
+    Itinerary as ItinerarySchema,
+    ItineraryBatchResponse,
+    ItineraryBatchResult,
+    ItineraryPage,
+    ItinerarySummary
+)
+
+ITINERARY_ADAPTER = TypeAdapter(ItinerarySchema)
+ITINERARY_PAGE_ADAPTER = TypeAdapter(ItineraryPage)
+ITINERARY_BATCH_ADAPTER = TypeAdapter(ItineraryBatchResponse)
+FIELDS_ADAPTER = TypeAdapter(Dict[str, Any])
+
+ITINERARY_FIELDS = tuple(ItinerarySchema.model_fields)
+
+
+class JSONBytesResponse(Response):
+    """Response whose body is already-encoded JSON."""
+    media_type = ORJSONResponse.media_type
+
+
+def _itinerary_model(itinerary: Itinerary) -> ItinerarySchema:
+    if settings.RESPONSE_TRUSTED_OUTPUT:
+        return ItinerarySchema.model_construct(
+            **{name: getattr(itinerary, name) for name in ITINERARY_FIELDS}
+        )
+    return ITINERARY_ADAPTER.validate_python(itinerary, from_attributes=True)
+
+
+def itinerary_response(itinerary: Itinerary, status_code: int = 200) -> Response:
+    """
+    Serialize one itinerary.
+
+    Args:
+        itinerary: Itinerary row with all columns loaded
+        status_code: HTTP status code
+
+    Returns:
+        JSON response matching the Itinerary schema
+    """
+    model = _itinerary_model(itinerary)
+    return JSONBytesResponse(ITINERARY_ADAPTER.dump_json(model), status_code=status_code)
+
+
+def itinerary_page_response(items: List[Dict[str, Any]], next_cursor: Optional[str]) -> Response:
+    """
+    Serialize a page of itinerary summaries.
+
+    Args:
+        items: Summaries with every ItinerarySummary field
+        next_cursor: Cursor for the next page, or None on the last page
+
+    Returns:
+        JSON response matching the ItineraryPage schema
+    """
+    if settings.RESPONSE_TRUSTED_OUTPUT:
+        page = ItineraryPage.model_construct(
+            items=[ItinerarySummary.model_construct(**item) for item in items],
+            next_cursor=next_cursor
+        )
+    else:
+        page = ITINERARY_PAGE_ADAPTER.validate_python({"items": items, "next_cursor": next_cursor})
+    return JSONBytesResponse(ITINERARY_PAGE_ADAPTER.dump_json(page))
+
+
+def itinerary_batch_response(results: List[Dict[str, Any]]) -> Response:
+    """
+    Serialize the per-item outcomes of a batch request.
+
+    Args:
+        results: ItineraryBatchResult fields per item; `itinerary` may be
+            an Itinerary row
+
+    Returns:
+        JSON response matching the ItineraryBatchResponse schema
+    """
+    items = []
+    for result in results:
+        itinerary = result.get("itinerary")
+        items.append(ItineraryBatchResult.model_construct(**{
+            "id": None,
+            "error": None,
+            **result,
+            "itinerary": _itinerary_model(itinerary) if itinerary is not None else None,
+        }))
+    batch = ItineraryBatchResponse.model_construct(items=items)
+    return JSONBytesResponse(ITINERARY_BATCH_ADAPTER.dump_json(batch))
+
+
+def fields_response(content: Dict[str, Any]) -> Response:
+    """Serialize a sparse fieldset, which has no schema to validate against."""
+    return JSONBytesResponse(FIELDS_ADAPTER.dump_json(content))
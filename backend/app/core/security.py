@@ -7,10 +7,12 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.user_cache import get_auth_cache
 from app.models.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -41,7 +43,7 @@ def verify_token(token: str) -> Optional[dict]:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user from token."""
     credentials_exception = HTTPException(
@@ -50,16 +52,33 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = verify_token(token)
+    # Cache hits skip both the JWT decode and the users query
+    auth_cache = get_auth_cache()
+    payload = auth_cache.get_payload(token) if auth_cache else None
     if payload is None:
-        raise credentials_exception
+        payload = verify_token(token)
+        if payload is None:
+            raise credentials_exception
+        if auth_cache:
+            auth_cache.set_payload(token, payload)
     
     user_id: str = payload.get("sub")
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    generation = None
+    if auth_cache:
+        user = auth_cache.get_user(user_id)
+        if user is not None:
+            return user
+        # Read before the query so an invalidation during it is noticed
+        generation = auth_cache.user_generation(user_id)
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
     
+    if auth_cache:
+        auth_cache.set_user(user, generation)
     return user
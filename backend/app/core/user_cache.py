@@ -0,0 +1,213 @@
+"""
+In-process cache of verified tokens and authenticated user snapshots.
+
+`get_current_user` consults this cache before decoding the JWT or querying
+the users table. Entries expire after a TTL and are dropped as soon as a
+`user_cache_invalidate` notification arrives; the `notify_users_changed`
+trigger sends one whenever a user row is updated or deleted, so changes
+made by any worker (or directly in the database) reach every process.
+
+Each invalidation also bumps a per-user generation. A request reads the
+generation before querying the user and only caches what it loaded if the
+generation is unchanged, so a notification that arrives while the query
+is in flight cannot be undone by caching the row it read before the change.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.ai_cache import LRUTTLCache
+
+USER_CACHE_CHANNEL = "user_cache_invalidate"
+
+_SNAPSHOT_FIELDS = (
+    "id",
+    "email",
+    "full_name",
+    "google_id",
+    "avatar_url",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+
+
+class AuthCache:
+    """Bounded TTL caches for token payloads and user snapshots."""
+
+    def __init__(self):
+        """Initialize both caches."""
+        self.tokens = LRUTTLCache(
+            settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+            settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+        )
+        self.users = LRUTTLCache(
+            settings.AUTH_USER_CACHE_MAX_ENTRIES,
+            settings.AUTH_USER_CACHE_TTL_SECONDS
+        )
+        self.invalidations = 0
+        # Bumped by clear(); lets the per-user counters be reset safely
+        self._epoch = 0
+        self._generations: Dict[str, int] = {}
+
+    def get_payload(self, token: str) -> Optional[dict]:
+        """Return the payload of a token verified earlier, if still cached."""
+        return self.tokens.get(token)
+
+    def set_payload(self, token: str, payload: dict) -> None:
+        """Remember a verified payload, never past the token's own expiry."""
+        ttl = float(settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            ttl = min(ttl, expires_at - time.time())
+        if ttl > 0:
+            self.tokens.set(token, payload, ttl)
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        """
+        Return a detached User built from the cached snapshot.
+
+        Each call gets a fresh instance, so request handlers cannot leak
+        changes into the cache.
+        """
+        snapshot = self.users.get(user_id)
+        if snapshot is None:
+            return None
+        return User(**snapshot)
+
+    def user_generation(self, user_id: Any) -> Tuple[int, int]:
+        """
+        Current invalidation generation of a user.
+
+        Read it before loading the user and pass it to `set_user`.
+        """
+        return self._epoch, self._generations.get(str(user_id), 0)
+
+    def set_user(self, user: User, generation: Tuple[int, int]) -> bool:
+        """
+        Snapshot the columns of a loaded user.
+
+        Args:
+            user: User loaded from the database
+            generation: `user_generation()` read before the user was loaded
+
+        Returns:
+            False if the user was invalidated since, in which case the
+            possibly stale row is not cached
+        """
+        if generation != self.user_generation(user.id):
+            return False
+        snapshot: Dict[str, Any] = {
+            field: getattr(user, field) for field in _SNAPSHOT_FIELDS
+        }
+        self.users.set(str(user.id), snapshot)
+        return True
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Drop a user's snapshot and bump their generation."""
+        key = str(user_id)
+        self.users.delete(key)
+        self.invalidations += 1
+        if key not in self._generations and len(self._generations) >= self.users.max_entries:
+            # Keep the counters bounded; the new epoch fences every user instead
+            self._generations.clear()
+            self._epoch += 1
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every user snapshot (token payloads stay valid)."""
+        self.users.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring."""
+        return {
+            "tokens": self.tokens.stats(),
+            "users": self.users.stats(),
+            "invalidations": self.invalidations,
+        }
+
+
+def get_listen_dsn(url: str) -> str:
+    """Plain PostgreSQL DSN for a dedicated asyncpg LISTEN connection."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class UserCacheListener:
+    """
+    Keep a dedicated connection that LISTENs for user invalidations.
+
+    Notifications sent while the connection is down are lost, so the user
+    cache is cleared every time the listener (re)connects.
+    """
+
+    def __init__(self, cache: AuthCache, reconnect_seconds: float = 5.0):
+        """Initialize listener state."""
+        self.cache = cache
+        self.reconnect_seconds = reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Launch the listener task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="user-cache-listener")
+
+    async def stop(self) -> None:
+        """Cancel the listener task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        """asyncpg notification callback."""
+        self.cache.invalidate_user(payload)
+
+    async def _run(self) -> None:
+        """Listen until cancelled, reconnecting after failures."""
+        while True:
+            try:
+                connection = await asyncpg.connect(get_listen_dsn(settings.DATABASE_URL))
+                try:
+                    await connection.add_listener(USER_CACHE_CHANNEL, self._on_notify)
+                    self.cache.clear()
+                    while not connection.is_closed():
+                        await asyncio.sleep(self.reconnect_seconds)
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Log generic error without exposing connection details
+                print("Error listening for user cache invalidations: connection lost")
+
+            # Snapshots may be stale until we are listening again
+            self.cache.clear()
+            await asyncio.sleep(self.reconnect_seconds)
+
+
+_auth_cache: Optional[AuthCache] = None
+_listener: Optional[UserCacheListener] = None
+
+
+def get_auth_cache() -> Optional[AuthCache]:
+    """Process-wide auth cache, or None when AUTH_CACHE_ENABLED is off."""
+    global _auth_cache
+    if _auth_cache is None and settings.AUTH_CACHE_ENABLED:
+        _auth_cache = AuthCache()
+    return _auth_cache
+
+
+def get_user_cache_listener() -> Optional[UserCacheListener]:
+    """Process-wide invalidation listener, or None when it is disabled."""
+    global _listener
+    cache = get_auth_cache()
+    if _listener is None and cache is not None and settings.AUTH_CACHE_LISTEN_ENABLED:
+        _listener = UserCacheListener(cache)
+    return _listener
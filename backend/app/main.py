@@ -1,23 +1,74 @@
 """
 Main FastAPI application.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
+from app.core.compression import CompressionMiddleware, get_compression_cache
 from app.core.config import settings
-from app.api.v1 import auth, flights, hotels, experiences, itineraries
+from app.core.database import engine
+from app.core.user_cache import get_auth_cache, get_user_cache_listener
+from app.services.destination_index import get_destination_index
+from app.services.flight_results import get_flight_tables
+from app.services.gemini_service import (
+    init_gemini_service,
+    close_gemini_service,
+    get_gemini_service,
+)
+from app.services.job_queue import get_job_queue
+from app.services.maintenance import get_maintenance_scheduler
+from app.services.search_history_writer import get_search_history_writer
+from app.services.search_service import close_search_aggregator, get_search_aggregator
+from app.api.v1 import auth, destinations, flights, hotels, experiences, history, itineraries
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    init_gemini_service()
+    # Map the autocomplete index before the first request needs it
+    get_destination_index()
+    job_queue = get_job_queue()
+    job_queue.start()
+    search_history_writer = get_search_history_writer()
+    search_history_writer.start()
+    user_cache_listener = get_user_cache_listener()
+    if user_cache_listener:
+        user_cache_listener.start()
+    maintenance_scheduler = get_maintenance_scheduler()
+    maintenance_scheduler.start()
+    yield
+    await maintenance_scheduler.stop()
+    if user_cache_listener:
+        await user_cache_listener.stop()
+    await job_queue.stop()
+    await close_search_aggregator()
+    # Write out queued search history before the pool closes
+    await search_history_writer.stop()
+    close_gemini_service()
+    # Close pooled database connections
+    await engine.dispose()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json"
+    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add session middleware for OAuth
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 
+# Compress large responses
+app.add_middleware(CompressionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +76,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Include routers
@@ -32,7 +84,9 @@ app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["
 app.include_router(flights.router, prefix=f"{settings.API_V1_PREFIX}/flights", tags=["flights"])
 app.include_router(hotels.router, prefix=f"{settings.API_V1_PREFIX}/hotels", tags=["hotels"])
 app.include_router(experiences.router, prefix=f"{settings.API_V1_PREFIX}/experiences", tags=["experiences"])
+app.include_router(history.router, prefix=f"{settings.API_V1_PREFIX}/history", tags=["history"])
 app.include_router(itineraries.router, prefix=f"{settings.API_V1_PREFIX}/itineraries", tags=["itineraries"])
+app.include_router(destinations.router, prefix=f"{settings.API_V1_PREFIX}/destinations", tags=["destinations"])
 
 
 @app.get("/")
@@ -51,6 +105,25 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Process-local cache and AI usage counters."""
+    gemini_service = get_gemini_service()
+    auth_cache = get_auth_cache()
+    search_cache = get_search_aggregator().cache
+    return {
+        "ai_cache": gemini_service.cache.stats() if gemini_service.cache else None,
+        "ai_single_flight": gemini_service.single_flight.stats(),
+        "ai_models": gemini_service.router.stats(),
+        "auth_cache": auth_cache.stats() if auth_cache else None,
+        "search_cache": search_cache.stats() if search_cache else None,
+        "flight_tables": get_flight_tables().stats(),
+        "search_history_writer": get_search_history_writer().stats(),
+        "maintenance": get_maintenance_scheduler().stats(),
+        "compression": get_compression_cache().stats()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -2,6 +2,7 @@
 Models initialization.
 """
 from app.models.user import User
-from app.models.itinerary import Itinerary, SearchHistory
+from app.models.itinerary import Itinerary, SearchHistory, SearchResultBlob
+from app.models.job import ItineraryJob
 
-__all__ = ["User", "Itinerary", "SearchHistory"]
+__all__ = ["User", "Itinerary", "SearchHistory", "SearchResultBlob", "ItineraryJob"]
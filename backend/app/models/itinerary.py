@@ -2,7 +2,7 @@
 Itinerary model for AI-generated travel plans.
 """
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -48,8 +48,23 @@ class SearchHistory(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     search_type = Column(String(50), nullable=False)  # flight, hotel, experience
     search_params = Column(JSONB, nullable=False)
-    results = Column(JSONB, nullable=True)
+    results = Column(JSONB, nullable=True)  # Legacy inline results; new rows use results_hash
+    results_hash = Column(String(64), nullable=True)  # search_result_blobs.hash
+    result_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="searches")
+
+
+class SearchResultBlob(Base):
+    """Offer list shared by every search history row with identical results."""
+    
+    __tablename__ = "search_result_blobs"
+    
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the canonical JSON
+    results = Column(JSONB, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,16 +2,30 @@
 Schemas initialization.
 """
 from app.schemas.user import User, UserCreate, UserUpdate, Token, TokenData
+from app.schemas.destination import DestinationSuggestion
 from app.schemas.itinerary import (
     Itinerary,
     ItineraryCreate,
     ItineraryUpdate,
+    ItinerarySummary,
+    ItineraryPage,
+    ItinerarySearchHit,
+    ItinerarySearchPage,
+    JSONPatchOperation,
+    ItineraryBatchCreate,
+    ItineraryIdList,
+    ItineraryBatchResult,
+    ItineraryBatchResponse,
     SearchHistory,
     SearchHistoryCreate,
+    SearchHistoryPage,
     FlightSearchParams,
+    FlightResultOptions,
     HotelSearchParams,
     ExperienceSearchParams,
     AIItineraryRequest,
+    DayRegenerateRequest,
+    ItineraryJob,
 )
 
 __all__ = [
@@ -20,13 +34,27 @@ __all__ = [
     "UserUpdate",
     "Token",
     "TokenData",
+    "DestinationSuggestion",
     "Itinerary",
     "ItineraryCreate",
     "ItineraryUpdate",
+    "ItinerarySummary",
+    "ItineraryPage",
+    "ItinerarySearchHit",
+    "ItinerarySearchPage",
+    "JSONPatchOperation",
+    "ItineraryBatchCreate",
+    "ItineraryIdList",
+    "ItineraryBatchResult",
+    "ItineraryBatchResponse",
     "SearchHistory",
     "SearchHistoryCreate",
+    "SearchHistoryPage",
     "FlightSearchParams",
+    "FlightResultOptions",
     "HotelSearchParams",
     "ExperienceSearchParams",
     "AIItineraryRequest",
+    "DayRegenerateRequest",
+    "ItineraryJob",
 ]
@@ -0,0 +1,14 @@
+"""
+Pydantic schemas for destination autocomplete.
+"""
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+class DestinationSuggestion(BaseModel):
+    """A city or airport matching an autocomplete query."""
+    kind: Literal["city", "airport"]
+    name: str
+    code: Optional[str] = None
+    city: str
+    country: str
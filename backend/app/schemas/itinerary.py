@@ -2,9 +2,9 @@
 Pydantic schemas for Itinerary and SearchHistory models.
 """
 from datetime import datetime
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Literal
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ItineraryBase(BaseModel):
@@ -52,6 +52,72 @@ class Itinerary(ItineraryBase):
         from_attributes = True
 
 
+class JSONPatchOperation(BaseModel):
+    """One RFC 6902 JSON Patch operation on an itinerary."""
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+    
+    class Config:
+        populate_by_name = True
+
+
+class ItineraryBatchCreate(BaseModel):
+    """Itineraries to create in one request."""
+    items: List[ItineraryCreate]
+
+
+class ItineraryIdList(BaseModel):
+    """Itinerary ids for batch fetches and deletes."""
+    ids: List[UUID]
+
+
+class ItineraryBatchResult(BaseModel):
+    """Outcome of one item of a batch request."""
+    id: Optional[UUID] = None
+    status: int
+    itinerary: Optional[Itinerary] = None
+    error: Optional[str] = None
+
+
+class ItineraryBatchResponse(BaseModel):
+    """Per-item outcomes of a batch request, in request order."""
+    items: List[ItineraryBatchResult]
+
+
+class ItinerarySummary(BaseModel):
+    """Itinerary list entry without the JSONB content columns."""
+    id: UUID
+    title: str
+    destination: str
+    description: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    day_count: Optional[int] = None
+    total_estimated_cost: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
+class ItineraryPage(BaseModel):
+    """One page of itinerary summaries."""
+    items: List[ItinerarySummary]
+    next_cursor: Optional[str] = None
+
+
+class ItinerarySearchHit(ItinerarySummary):
+    """Itinerary search result with its relevance and a highlighted excerpt."""
+    rank: float
+    snippet: Optional[str] = None
+
+
+class ItinerarySearchPage(BaseModel):
+    """One page of itinerary search results, best match first."""
+    items: List[ItinerarySearchHit]
+    next_cursor: Optional[str] = None
+
+
 class SearchHistoryBase(BaseModel):
     """Base search history schema."""
     search_type: str
@@ -68,12 +134,20 @@ class SearchHistory(SearchHistoryBase):
     id: UUID
     user_id: UUID
     results: Optional[Dict[str, Any]] = None
+    results_hash: Optional[str] = None
+    result_count: int = 0
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class SearchHistoryPage(BaseModel):
+    """One page of search history."""
+    items: List[SearchHistory]
+    next_cursor: Optional[str] = None
+
+
 class FlightSearchParams(BaseModel):
     """Flight search parameters."""
     origin: str
@@ -84,6 +158,23 @@ class FlightSearchParams(BaseModel):
     cabin_class: Optional[str] = "economy"
 
 
+# HH:MM, 00:00 to 23:59
+CLOCK_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d$"
+
+
+class FlightResultOptions(BaseModel):
+    """Filters, ordering and paging applied to merged flight offers."""
+    max_price: Optional[float] = Field(None, ge=0)
+    max_stops: Optional[int] = Field(None, ge=0)
+    depart_after: Optional[str] = Field(None, pattern=CLOCK_PATTERN)
+    depart_before: Optional[str] = Field(None, pattern=CLOCK_PATTERN)
+    airlines: Optional[List[str]] = None
+    pareto: bool = False
+    sort: Optional[Literal["price", "duration", "best"]] = None
+    offset: int = Field(0, ge=0)
+    limit: Optional[int] = Field(None, ge=1, le=500)
+
+
 class HotelSearchParams(BaseModel):
     """Hotel search parameters."""
     destination: str
@@ -107,3 +198,28 @@ class AIItineraryRequest(BaseModel):
     end_date: str
     preferences: Optional[Dict[str, Any]] = None
     budget: Optional[str] = None
+    bypass_cache: bool = False
+    prompt_version: Optional[Literal["v1", "v2"]] = None
+
+
+class DayRegenerateRequest(BaseModel):
+    """Request schema for regenerating a single itinerary day."""
+    preferences: Optional[Dict[str, Any]] = None
+    prompt_version: Optional[Literal["v1", "v2"]] = None
+
+
+class ItineraryJob(BaseModel):
+    """Status of an asynchronous itinerary generation job."""
+    id: UUID
+    status: str
+    attempts: int
+    max_attempts: int
+    itinerary_id: Optional[UUID] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,260 @@
+"""
+Two-tier cache for AI-generated itineraries and recommendations.
+
+The first tier is an in-process LRU with a TTL; the second is a table in the
+application database shared by every worker. Keys are built from a
+canonicalised request so that trivially different requests (case, spacing,
+preference order, exact dates within the same season) share an entry.
+"""
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+CACHE_KEY_VERSION = "v1"
+
+_SEASONS = {
+    12: "winter", 1: "winter", 2: "winter",
+    3: "spring", 4: "spring", 5: "spring",
+    6: "summer", 7: "summer", 8: "summer",
+    9: "autumn", 10: "autumn", 11: "autumn",
+}
+
+
+def parse_trip_date(value: Optional[str]) -> Optional[date]:
+    """Parse the date part of an ISO date or datetime string."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def digest(kind: str, payload: Dict[str, Any]) -> str:
+    """Hash a canonical payload into a cache key."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{kind}:{CACHE_KEY_VERSION}:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_request(value: Any) -> Any:
+    """Lowercase/trim strings and sort lists so equivalent inputs compare equal."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(k).strip().lower(): normalize_request(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [normalize_request(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def itinerary_cache_key(
+    destination: str,
+    start_date: str,
+    end_date: str,
+    preferences: Optional[Dict[str, Any]] = None,
+    budget: Optional[str] = None,
+    prompt_version: str = ""
+) -> str:
+    """Build the canonical cache key for an itinerary request."""
+    start = parse_trip_date(start_date)
+    end = parse_trip_date(end_date)
+    if start and end:
+        trip = {"days": (end - start).days + 1, "season": _SEASONS[start.month]}
+    else:
+        trip = {"start": normalize_request(start_date), "end": normalize_request(end_date)}
+
+    return digest("itinerary", {
+        "destination": normalize_request(destination),
+        "trip": trip,
+        "preferences": normalize_request(preferences or {}),
+        "budget": normalize_request(budget or ""),
+        "prompt_version": prompt_version,
+    })
+
+
+def recommendations_cache_key(
+    preferences: Dict[str, Any],
+    budget: Optional[str] = None,
+    prompt_version: str = ""
+) -> str:
+    """Build the canonical cache key for a recommendations request."""
+    return digest("recommendations", {
+        "preferences": normalize_request(preferences or {}),
+        "budget": normalize_request(budget or ""),
+        "prompt_version": prompt_version,
+    })
+
+
+def redate_itinerary(itinerary: Dict[str, Any], start_date: str) -> Dict[str, Any]:
+    """
+    Rewrite the `date` of every day so a cached itinerary matches the
+    requested start date.
+    """
+    start = parse_trip_date(start_date)
+    if start is None:
+        return itinerary
+
+    for index, day in enumerate(itinerary.get("days") or []):
+        if not isinstance(day, dict):
+            continue
+        offset = day.get("day") if isinstance(day.get("day"), int) else index + 1
+        day["date"] = (start + timedelta(days=offset - 1)).isoformat()
+    return itinerary
+
+
+class LRUTTLCache:
+    """Bounded in-process LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class PostgresCacheBackend:
+    """Shared cache tier stored in the `ai_response_cache` table."""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch an unexpired entry."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text(
+                    "SELECT value FROM ai_response_cache "
+                    "WHERE key = :key AND expires_at > CURRENT_TIMESTAMP"
+                ),
+                {"key": key}
+            )
+            return result.scalar_one_or_none()
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        """Insert or refresh an entry."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text(
+                    "INSERT INTO ai_response_cache (key, value, expires_at) "
+                    "VALUES (:key, CAST(:value AS JSONB), "
+                    "CURRENT_TIMESTAMP + make_interval(secs => :ttl)) "
+                    "ON CONFLICT (key) DO UPDATE "
+                    "SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at"
+                ),
+                {"key": key, "value": json.dumps(value), "ttl": float(ttl_seconds)}
+            )
+            await db.commit()
+
+
+class AIResponseCache:
+    """In-process LRU in front of an optional shared backend."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        shared: Optional[PostgresCacheBackend] = None
+    ):
+        """Initialize both tiers."""
+        self.ttl_seconds = ttl_seconds or settings.AI_CACHE_TTL_SECONDS
+        self.local = LRUTTLCache(
+            max_entries or settings.AI_CACHE_MAX_ENTRIES,
+            self.ttl_seconds
+        )
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look a key up locally, then in the shared tier. Returns a private copy."""
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception:
+                self.shared_errors += 1
+                print("Error reading AI cache: shared tier unavailable")
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+
+        return copy.deepcopy(value) if value is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value in both tiers."""
+        value = copy.deepcopy(value)
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.ttl_seconds)
+            except Exception:
+                self.shared_errors += 1
+                print("Error writing AI cache: shared tier unavailable")
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        return {
+            **self.local.stats(),
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
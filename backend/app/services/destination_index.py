@@ -0,0 +1,268 @@
+"""
+Prefix index over the bundled destination and airport dataset.
+
+app/data/destinations.csv is compiled into a flat binary file of sorted
+keys and fixed-width arrays, which every worker maps read-only with
+`mmap`: opening it costs a few syscalls instead of parsing the CSV, and
+the page cache holds one copy however many workers serve lookups.
+Prefix queries are two binary searches over the sorted keys, so a lookup
+touches a handful of pages and never allocates per-entry objects beyond
+the few suggestions it returns.
+
+Build the file ahead of time with:
+    python -m app.services.destination_index
+"""
+import argparse
+import bisect
+import csv
+import heapq
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import orjson
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATASET_PATH = DATA_DIR / "destinations.csv"
+DEFAULT_INDEX_PATH = DATA_DIR / "destinations.idx"
+
+MAGIC = b"TTDI"
+FORMAT_VERSION = 1
+# magic, version, key count, entry count, then the offset of each section
+HEADER = struct.Struct("=4sIII6I")
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Fold text for matching: strip accents, casefold, collapse punctuation.
+
+    "São Paulo", "sao-paulo" and "SAO PAULO" all become "sao paulo".
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def _word_suffixes(text: str) -> Iterator[str]:
+    """The text and every tail of it starting at a word, so "york" finds "New York"."""
+    words = text.split()
+    for start in range(len(words)):
+        yield " ".join(words[start:])
+
+
+def _entry_keys(row: Dict[str, str]) -> Set[str]:
+    keys = set(_word_suffixes(normalize(row["name"])))
+    if row["kind"] == "airport":
+        keys.update(_word_suffixes(normalize(row["city"])))
+    if row["code"]:
+        keys.add(normalize(row["code"]))
+    for alias in filter(None, row["aliases"].split("|")):
+        keys.update(_word_suffixes(normalize(alias)))
+    keys.discard("")
+    return keys
+
+
+def load_dataset(path: Path = DATASET_PATH) -> List[Dict[str, Any]]:
+    """
+    Read the destination CSV and roll airport traffic up into cities.
+
+    A city's popularity is its own score plus that of its airports, so
+    "lon" suggests London before Heathrow or Gatwick.
+
+    Raises:
+        ValueError: If an airport names a city that has no row of its own
+    """
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    cities = {
+        (row["city"], row["country"]): row for row in rows if row["kind"] == "city"
+    }
+    popularity = {id(row): int(row["popularity"]) for row in rows}
+    for row in rows:
+        if row["kind"] != "airport":
+            continue
+        city = cities.get((row["city"], row["country"]))
+        if city is None:
+            raise ValueError(f"Airport {row['code']} is in unknown city {row['city']}, {row['country']}")
+        popularity[id(city)] += int(row["popularity"])
+
+    return [{**row, "popularity": popularity[id(row)]} for row in rows]
+
+
+def _aligned(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % 4))
+
+
+def build_index(dataset_path: Path = DATASET_PATH, index_path: Path = DEFAULT_INDEX_PATH) -> int:
+    """
+    Compile the dataset into the binary index file.
+
+    The file is written next to its destination and renamed into place,
+    so workers starting concurrently never map a half-written index.
+
+    Returns:
+        Number of keys in the index
+    """
+    rows = load_dataset(dataset_path)
+    pairs: List[Tuple[bytes, int]] = []
+    entry_offsets = array("I", [0])
+    entry_popularity = array("I")
+    entry_blob = bytearray()
+    for entry_id, row in enumerate(rows):
+        entry_blob += orjson.dumps({
+            "kind": row["kind"],
+            "name": row["name"],
+            "code": row["code"] or None,
+            "city": row["city"],
+            "country": row["country"],
+        })
+        entry_offsets.append(len(entry_blob))
+        entry_popularity.append(row["popularity"])
+        pairs.extend((key.encode("utf-8"), entry_id) for key in _entry_keys(row))
+    pairs.sort()
+
+    key_offsets = array("I", [0])
+    key_entries = array("I")
+    key_blob = bytearray()
+    for key, entry_id in pairs:
+        key_blob += key
+        key_offsets.append(len(key_blob))
+        key_entries.append(entry_id)
+
+    body = bytearray(b"\0" * HEADER.size)
+    offsets = []
+    for section in (key_offsets, key_entries, key_blob, entry_offsets, entry_popularity, entry_blob):
+        _aligned(body)
+        offsets.append(len(body))
+        body += section.tobytes() if isinstance(section, array) else section
+    body[:HEADER.size] = HEADER.pack(MAGIC, FORMAT_VERSION, len(pairs), len(rows), *offsets)
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as index_file:
+        index_file.write(body)
+    os.replace(temporary, index_path)
+    return len(pairs)
+
+
+class _Keys(Sequence[bytes]):
+    """Sorted keys as a sequence `bisect` can search in place."""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+
+class DestinationIndex:
+    """Read-only view of a built index file."""
+
+    def __init__(self, path: Path):
+        """
+        Map the index file.
+
+        Raises:
+            ValueError: If the file is not an index in this format
+        """
+        with open(path, "rb") as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, version, key_count, entry_count, *offsets = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} destination index")
+        key_offsets, key_entries, key_blob, entry_offsets, entry_popularity, entry_blob = offsets
+
+        def words(start: int, count: int) -> memoryview:
+            return view[start:start + count * 4].cast("I")
+
+        self._key_entries = words(key_entries, key_count)
+        self._entry_offsets = words(entry_offsets, entry_count + 1)
+        self._entry_popularity = words(entry_popularity, entry_count)
+        self._entry_blob = view[entry_blob:]
+        key_offset_view = words(key_offsets, key_count + 1)
+        self._keys = _Keys(view[key_blob:key_blob + key_offset_view[-1]], key_offset_view)
+        self.key_count = key_count
+        self.entry_count = entry_count
+
+    def _entry(self, entry_id: int) -> Dict[str, Any]:
+        start, end = self._entry_offsets[entry_id], self._entry_offsets[entry_id + 1]
+        return orjson.loads(self._entry_blob[start:end])
+
+    def search(self, q: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Suggest destinations whose name, city, code or alias starts with `q`.
+
+        Exact matches come first, so "lis" puts Lisbon's airport ahead of
+        busier places whose names merely start with it; the rest are
+        ordered by popularity.
+
+        Args:
+            q: What the user has typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Suggestions, best first
+        """
+        prefix = normalize(q).encode("utf-8")
+        if not prefix:
+            return []
+        low = bisect.bisect_left(self._keys, prefix)
+        exact_end = bisect.bisect_right(self._keys, prefix, low)
+        # No key contains 0xff, so this is the first key past the prefix range
+        high = bisect.bisect_left(self._keys, prefix + b"\xff", exact_end)
+
+        exact = set(self._key_entries[low:exact_end])
+        candidates = exact.union(self._key_entries[exact_end:high])
+        best = heapq.nlargest(
+            limit,
+            candidates,
+            key=lambda entry_id: (entry_id in exact, self._entry_popularity[entry_id], -entry_id)
+        )
+        return [self._entry(entry_id) for entry_id in best]
+
+
+def _index_path() -> Path:
+    """Where the built index lives."""
+    # Imported here so the image build can run this module without app settings
+    from app.core.config import settings
+    return Path(settings.DESTINATION_INDEX_PATH) if settings.DESTINATION_INDEX_PATH else DEFAULT_INDEX_PATH
+
+
+_destination_index: Optional[DestinationIndex] = None
+
+
+def get_destination_index() -> DestinationIndex:
+    """
+    Process-wide destination index.
+
+    The file is built on first use if it is missing or older than the
+    dataset, e.g. in a development checkout; images build it up front.
+    """
+    global _destination_index
+    if _destination_index is None:
+        path = _index_path()
+        if not path.exists() or path.stat().st_mtime < DATASET_PATH.stat().st_mtime:
+            build_index(DATASET_PATH, path)
+        _destination_index = DestinationIndex(path)
+    return _destination_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the destination autocomplete index.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args()
+    key_count = build_index(DATASET_PATH, args.output)
+    print(f"Wrote {key_count} keys to {args.output}")
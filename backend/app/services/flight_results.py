@@ -0,0 +1,360 @@
+"""
+Columnar filtering, ranking and paging of flight offers.
+
+Merged offers stay the dicts the providers returned, but the fields
+searches filter and sort on (price, duration, stops, departure time,
+airline) are copied once into NumPy arrays. Filters become boolean
+masks, sorts a single stable argsort, and only the offers on the
+requested page are looked up again. The columns for a search are kept
+for as long as its results are cached, so paging through them or
+changing filters does no per-offer Python work at all.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.itinerary import FlightResultOptions
+from app.services.ai_cache import LRUTTLCache
+from app.services.search_cache import search_cache_key
+
+# Missing or unparseable values sort last and fail every upper bound
+UNKNOWN = np.inf
+
+# Trade-offs between price, duration and stops used to pick the offers
+# that prune the Pareto front search
+PARETO_PIVOT_WEIGHTS = ((1.0, 1.0, 1.0), (4.0, 1.0, 1.0), (1.0, 4.0, 1.0))
+
+_HOURS = re.compile(r"(\d+)\s*h", re.IGNORECASE)
+_MINUTES = re.compile(r"(\d+)\s*m", re.IGNORECASE)
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return UNKNOWN
+
+
+@lru_cache(maxsize=4096)
+def _parse_duration(text: str) -> float:
+    hours, minutes = _HOURS.search(text), _MINUTES.search(text)
+    if hours is None and minutes is None:
+        return UNKNOWN
+    return (int(hours.group(1)) if hours else 0) * 60 + (int(minutes.group(1)) if minutes else 0)
+
+
+def duration_minutes(value: Any) -> float:
+    """Minutes in a duration such as "4h 15m", "PT4H15M" or a number of minutes."""
+    if isinstance(value, str):
+        return _parse_duration(value)
+    return _number(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_minute_of_day(text: str) -> int:
+    try:
+        return int(text[11:13]) * 60 + int(text[14:16])
+    except ValueError:
+        return -1
+
+
+def minute_of_day(value: Any) -> int:
+    """Minutes after midnight of an ISO datetime string, or -1."""
+    if isinstance(value, str) and len(value) >= 16:
+        return _parse_minute_of_day(value)
+    return -1
+
+
+def _clock_minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _fold(value: Any) -> str:
+    return " ".join(str(value or "").casefold().split())
+
+
+def _numbers(values: List[Any]) -> np.ndarray:
+    """Numeric column; None and anything that is not a number become UNKNOWN."""
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.fromiter(map(_number, values), np.float64, len(values))
+    column[np.isnan(column)] = UNKNOWN
+    return column
+
+
+def _column(values: List[Any], parse: Callable[[Any], Any], dtype: Any) -> np.ndarray:
+    """
+    Column of parsed values, parsing each distinct value once.
+
+    Offers from one search repeat the same durations, departure times
+    and airlines over and over, so this is mostly dict lookups.
+    """
+    try:
+        parsed = {value: parse(value) for value in set(values)}
+    except TypeError:
+        return np.fromiter(map(parse, values), dtype, len(values))
+    return np.fromiter(map(parsed.__getitem__, values), dtype, len(values))
+
+
+def _spread(column: np.ndarray, ceiling: float) -> np.ndarray:
+    """Shift and scale a column so its known values span [0, 1]."""
+    known = column[column < ceiling]
+    low = known.min() if len(known) else 0.0
+    span = known.max() - low if len(known) else 0.0
+    return (column - low) / (span or 1.0)
+
+
+def _normalized(values: np.ndarray) -> np.ndarray:
+    """Scale to [0, 1] over the known values; unknown ones become NaN."""
+    return np.where(np.isfinite(values), _spread(values, UNKNOWN), np.nan)
+
+
+class FlightTable:
+    """Flight offers with their searchable fields as NumPy columns."""
+
+    def __init__(self, offers: List[Dict[str, Any]]):
+        """
+        Copy the searchable fields of `offers` into columns.
+
+        Args:
+            offers: Merged offers; only their fields are kept, and row
+                numbers refer to positions in this list
+        """
+        self.count = len(offers)
+        self.price = _numbers([offer.get("price") for offer in offers])
+        self.duration = _column([offer.get("duration") for offer in offers], duration_minutes, np.float64)
+        self.stops = _numbers([offer.get("stops") for offer in offers])
+        self.departure = _column([offer.get("departure_time") for offer in offers], minute_of_day, np.int32)
+        # Airlines as small integer codes, so filtering by name is np.isin
+        self._airline_codes: Dict[str, int] = {}
+        self.airline = _column(
+            [offer.get("airline") for offer in offers],
+            lambda name: self._airline_codes.setdefault(_fold(name), len(self._airline_codes)),
+            np.int32
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def matching(
+        self,
+        max_price: Optional[float] = None,
+        max_stops: Optional[int] = None,
+        depart_after: Optional[str] = None,
+        depart_before: Optional[str] = None,
+        airlines: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """
+        Boolean mask of offers passing every given filter.
+
+        Args:
+            max_price: Highest price
+            max_stops: Most stops
+            depart_after: Earliest departure, "HH:MM"
+            depart_before: Latest departure, "HH:MM"; a window ending
+                before it starts wraps past midnight
+            airlines: Airline names, matched ignoring case and spacing
+
+        Returns:
+            Mask over the offers
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if max_stops is not None:
+            mask &= self.stops <= max_stops
+        if depart_after is not None or depart_before is not None:
+            start = _clock_minutes(depart_after) if depart_after else 0
+            end = _clock_minutes(depart_before) if depart_before else 24 * 60 - 1
+            if start <= end:
+                mask &= (self.departure >= start) & (self.departure <= end)
+            else:
+                mask &= (self.departure >= start) | ((self.departure >= 0) & (self.departure <= end))
+        if airlines is not None:
+            codes = [self._airline_codes[name] for name in map(_fold, airlines) if name in self._airline_codes]
+            mask &= np.isin(self.airline, codes)
+        return mask
+
+    def pareto_front(self, rows: np.ndarray) -> np.ndarray:
+        """
+        The rows no other row beats on price, duration and stops at once.
+
+        Rows dominated by a few good compromise offers are dropped first,
+        which leaves little to sort. The rest are ordered by (price,
+        duration, stops), so anything that dominates a row comes before
+        it. Stops take few distinct values, so for each stop count a
+        running minimum of duration over the rows with at most that many
+        stops tells whether a cheaper row was also at least as quick.
+        Identical offers are compared once and share the verdict.
+
+        Args:
+            rows: Indices of the rows to compare
+
+        Returns:
+            Indices of the non-dominated rows, in their original order
+        """
+        if len(rows) == 0:
+            return rows
+        # Unknown values rank worst but stay below the running minimum's sentinel
+        ceiling = np.finfo(np.float64).max
+        price, duration, stops = (
+            np.minimum(column[rows], ceiling) for column in (self.price, self.duration, self.stops)
+        )
+
+        candidates = np.ones(len(rows), dtype=bool)
+        scaled = [_spread(column, ceiling) for column in (price, duration, stops)]
+        for price_weight, duration_weight, stops_weight in PARETO_PIVOT_WEIGHTS:
+            with np.errstate(over="ignore"):
+                score = price_weight * scaled[0] + duration_weight * scaled[1] + stops_weight * scaled[2]
+            pivot = np.argmin(score)
+            no_better = (price >= price[pivot]) & (duration >= duration[pivot]) & (stops >= stops[pivot])
+            worse = (price > price[pivot]) | (duration > duration[pivot]) | (stops > stops[pivot])
+            candidates &= ~(no_better & worse)
+        rows = rows[candidates]
+        points = np.column_stack((price[candidates], duration[candidates], stops[candidates]))
+
+        order = np.lexsort((points[:, 2], points[:, 1], points[:, 0]))
+        ordered = points[order]
+        # Index of each row's distinct point, in (price, duration, stops) order
+        new_point = np.concatenate(([True], (ordered[1:] != ordered[:-1]).any(axis=1)))
+        inverse = np.empty(len(rows), dtype=np.intp)
+        inverse[order] = np.cumsum(new_point) - 1
+        unique = ordered[new_point]
+        durations, stops = unique[:, 1], unique[:, 2]
+        dominated = np.zeros(len(unique), dtype=bool)
+        for level in np.unique(stops):
+            eligible = np.where(stops <= level, durations, np.inf)
+            # Quickest duration among the rows before each one
+            best_before = np.minimum.accumulate(np.concatenate(([np.inf], eligible[:-1])))
+            at_level = stops == level
+            dominated[at_level] = best_before[at_level] <= durations[at_level]
+        return rows[~dominated[inverse]]
+
+    def best_scores(self, rows: np.ndarray, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Weighted "best" score of rows, lower is better.
+
+        Price, duration and stops are each scaled to [0, 1] over `rows`
+        and combined with `weights` (FLIGHT_BEST_WEIGHTS by default).
+        Rows missing any of them score NaN.
+        """
+        weights = weights or settings.FLIGHT_BEST_WEIGHTS
+        return (
+            weights.get("price", 0.0) * _normalized(self.price[rows])
+            + weights.get("duration", 0.0) * _normalized(self.duration[rows])
+            + weights.get("stops", 0.0) * _normalized(self.stops[rows])
+        )
+
+    def ranked(self, rows: np.ndarray, sort: Optional[str] = None, count: Optional[int] = None) -> np.ndarray:
+        """
+        Order rows by "price", "duration" or "best"; None keeps them as they are.
+
+        Ties keep the merged order, and offers missing the sort field go last.
+
+        Args:
+            rows: Indices of the rows to order
+            sort: Sort field
+            count: Only the first `count` rows are needed; the others may
+                be left out
+
+        Returns:
+            Ordered row indices
+        """
+        if sort is None:
+            return rows
+        if sort == "best":
+            keys = self.best_scores(rows)
+        else:
+            keys = getattr(self, sort)[rows]
+        if count is not None and 0 < count < len(rows):
+            # A linear-time cut to the rows that can make the page (ties
+            # included, so the order matches a full sort) before sorting
+            cutoff = np.partition(keys, count - 1)[count - 1]
+            if not np.isnan(cutoff):
+                within = keys <= cutoff
+                rows, keys = rows[within], keys[within]
+        return rows[np.argsort(keys, kind="stable")]
+
+    def query(self, options: FlightResultOptions) -> Tuple[List[int], int]:
+        """
+        Filter, rank and page the offers.
+
+        Args:
+            options: Filters, sort and page
+
+        Returns:
+            (row numbers on the page, number of offers matching the filters)
+        """
+        rows = np.flatnonzero(self.matching(
+            max_price=options.max_price,
+            max_stops=options.max_stops,
+            depart_after=options.depart_after,
+            depart_before=options.depart_before,
+            airlines=options.airlines
+        ))
+        if options.pareto:
+            rows = self.pareto_front(rows)
+        end = None if options.limit is None else options.offset + options.limit
+        page = self.ranked(rows, options.sort, end)[options.offset:end]
+        return page.tolist(), len(rows)
+
+
+_flight_tables: Optional[LRUTTLCache] = None
+
+
+def get_flight_tables() -> LRUTTLCache:
+    """Process-wide columns of recent flight searches."""
+    global _flight_tables
+    if _flight_tables is None:
+        _flight_tables = LRUTTLCache(
+            settings.FLIGHT_TABLE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS.get("flight", 0)
+            + settings.SEARCH_CACHE_STALE_SECONDS.get("flight", 0)
+        )
+    return _flight_tables
+
+
+def _flight_table(results: Dict[str, Any]) -> FlightTable:
+    """
+    Columns for a search response, reused while the same results are served.
+
+    Cached responses carry the `searched_at` of the search that produced
+    them, so it tells one provider fan-out's offers from the next.
+    """
+    if "searched_at" not in results:
+        return FlightTable(results["flights"])
+    key = f"{search_cache_key('flight', results['search_params'])}:{results['searched_at']}"
+    tables = get_flight_tables()
+    table = tables.get(key)
+    if table is None or len(table) != len(results["flights"]):
+        table = FlightTable(results["flights"])
+        tables.set(key, table)
+    return table
+
+
+def page_flights(results: Dict[str, Any], options: FlightResultOptions) -> Dict[str, Any]:
+    """
+    Apply result options to a flight search response.
+
+    Args:
+        results: SearchAggregator response with all merged offers
+        options: Filters, sort and page
+
+    Returns:
+        The response with `flights` replaced by the requested page, plus
+        `total` (offers matching the filters) and `next_offset` (None on
+        the last page)
+    """
+    offers = results["flights"]
+    rows, total = _flight_table(results).query(options)
+    end = options.offset + len(rows)
+    return {
+        **results,
+        "flights": [offers[row] for row in rows],
+        "total": total,
+        "next_offset": end if options.limit is not None and end < total else None,
+    }
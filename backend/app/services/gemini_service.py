@@ -1,26 +1,190 @@
 """
 Gemini AI service for itinerary generation.
 """
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
 import google.generativeai as genai
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from app.core.config import settings
+from app.services.ai_cache import (
+    AIResponseCache,
+    PostgresCacheBackend,
+    itinerary_cache_key,
+    parse_trip_date,
+    recommendations_cache_key,
+    redate_itinerary,
+)
+from app.services.json_stream import DaysArrayParser
+from app.services.model_router import ModelRouter
+from app.services.prompt_templates import PromptTemplate, get_prompt_template
+from app.services.single_flight import SingleFlight
 
 
 class GeminiService:
     """Service for Gemini AI integration."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[AIResponseCache] = None,
+        router: Optional[ModelRouter] = None
+    ):
         """Initialize Gemini AI."""
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self.router = router or ModelRouter()
+        self.model = genai.GenerativeModel(self.router.fast_model)
+        self._models: Dict[Tuple[str, Optional[str]], Any] = {}
+        self.max_concurrency = max_concurrency or settings.GEMINI_MAX_CONCURRENCY
+        self.cache = cache
+        self.single_flight = SingleFlight()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if not hasattr(self.model, "generate_content_async"):
+            # Older SDKs only ship the blocking client; keep it off the event loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="gemini"
+            )
+    
+    def _get_model(self, template: Optional[PromptTemplate] = None, model_name: Optional[str] = None):
+        """Model configured with the template's system instruction, if any."""
+        model_name = model_name or self.router.fast_model
+        instruction = template.system_instruction if template else None
+        if model_name == self.router.fast_model and instruction is None:
+            return self.model
+        model = self._models.get((model_name, instruction))
+        if model is None:
+            if instruction is None:
+                model = genai.GenerativeModel(model_name)
+            else:
+                model = genai.GenerativeModel(model_name, system_instruction=instruction)
+            self._models[(model_name, instruction)] = model
+        return model
+    
+    async def _call_model(
+        self,
+        prompt: str,
+        template: Optional[PromptTemplate],
+        kind: str,
+        model_name: str
+    ):
+        """
+        Make one model call and record its latency.
+        
+        Calls that fail or are cancelled (e.g. the losing side of a hedge)
+        are recorded too, as a lower bound; leaving them out would hide
+        exactly the slow tail that hedging is meant to cut.
+        """
+        model = self._get_model(template, model_name)
+        generation_config = template.generation_config(kind) if template else None
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                if self._executor is None:
+                    return await model.generate_content_async(
+                        prompt, generation_config=generation_config
+                    )
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor,
+                    partial(model.generate_content, prompt, generation_config=generation_config)
+                )
+            finally:
+                self.router.record(model_name, (time.perf_counter() - started) * 1000)
+    
+    async def _generate_content(
+        self,
+        prompt: str,
+        template: Optional[PromptTemplate] = None,
+        kind: str = "itinerary",
+        model_name: Optional[str] = None
+    ):
+        """
+        Run a model call without blocking the event loop.
+        
+        When hedging is enabled and the call outlives the model's observed
+        tail latency, a second request is sent and whichever succeeds first
+        wins; the other is cancelled.
+        """
+        model_name = model_name or self.router.fast_model
+        hedge_model, hedge_delay = self.router.hedge_plan(model_name)
+        if hedge_model is None:
+            return await self._call_model(prompt, template, kind, model_name)
+        
+        primary = asyncio.ensure_future(self._call_model(prompt, template, kind, model_name))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            # A saturated semaphore means the hedge would only queue behind other work
+            if done or self._semaphore.locked():
+                return await primary
+            
+            self.router.hedges += 1
+            hedge = asyncio.ensure_future(self._call_model(prompt, template, kind, hedge_model))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.router.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _stream_content(
+        self,
+        prompt: str,
+        template: Optional[PromptTemplate] = None,
+        kind: str = "itinerary",
+        model_name: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text chunks as the model produces them."""
+        model = self._get_model(template, model_name)
+        generation_config = template.generation_config(kind) if template else None
+        async with self._semaphore:
+            if self._executor is None:
+                response = await model.generate_content_async(
+                    prompt, generation_config=generation_config, stream=True
+                )
+                async for chunk in response:
+                    try:
+                        yield chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. safety metadata)
+                        continue
+            else:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(
+                    self._executor,
+                    partial(model.generate_content, prompt, generation_config=generation_config)
+                )
+                yield response.text
     
-    def generate_itinerary(
+    def close(self) -> None:
+        """Release the fallback executor, if any."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def generate_itinerary(
         self,
         destination: str,
         start_date: str,
         end_date: str,
         preferences: Optional[Dict[str, Any]] = None,
-        budget: Optional[str] = None
+        budget: Optional[str] = None,
+        bypass_cache: bool = False,
+        prompt_version: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate a travel itinerary using Gemini AI.
@@ -31,97 +195,308 @@ class GeminiService:
             end_date: End date of the trip
             preferences: User preferences (activities, food, etc.)
             budget: Budget level (low, medium, high)
+            bypass_cache: Skip the cache lookup and always call the model
+            prompt_version: Prompt template version (defaults to GEMINI_PROMPT_VERSION)
             
         Returns:
             Generated itinerary as a dictionary
         """
-        # Build prompt
-        prompt = f"""Generate a detailed travel itinerary for a trip to {destination} 
-from {start_date} to {end_date}.
-
-"""
+        template = get_prompt_template(prompt_version)
+        cache_key = itinerary_cache_key(
+            destination, start_date, end_date, preferences, budget, template.version
+        )
+        if not bypass_cache:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return redate_itinerary(cached, start_date)
         
-        if budget:
-            prompt += f"Budget level: {budget}\n"
+        async def generate() -> Dict[str, Any]:
+            try:
+                chunks = self._plan_chunks(start_date, end_date)
+                if chunks:
+                    itinerary_data = await self._generate_chunked_itinerary(
+                        template, destination, chunks, preferences, budget
+                    )
+                else:
+                    prompt = template.itinerary(
+                        destination, start_date, end_date, preferences, budget
+                    )
+                    model_name = self.router.select(
+                        "itinerary", self._trip_days(start_date, end_date), preferences
+                    )
+                    response = await self._generate_content(
+                        prompt, template, "itinerary", model_name
+                    )
+                    itinerary_data = self._parse_itinerary_text(response.text)
+            except Exception:
+                # Log generic error without exposing sensitive details
+                print("Error generating itinerary: Unable to generate with AI")
+                return self._itinerary_error()
+            
+            if self._is_cacheable(itinerary_data):
+                await self._cache_set(cache_key, itinerary_data)
+            return itinerary_data
         
-        if preferences:
-            prompt += f"Preferences: {preferences}\n"
+        # Identical concurrent requests share one model call
+        itinerary_data = await self.single_flight.do(cache_key, generate)
+        if self._is_cacheable(itinerary_data):
+            redate_itinerary(itinerary_data, start_date)
+        return itinerary_data
+    
+    async def stream_itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        preferences: Optional[Dict[str, Any]] = None,
+        budget: Optional[str] = None,
+        bypass_cache: bool = False,
+        prompt_version: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate a travel itinerary, yielding each day as soon as it is complete.
         
-        prompt += """
-Please provide:
-1. A day-by-day itinerary with suggested activities
-2. Recommended times for each activity
-3. Estimated costs for activities
-4. Transportation recommendations between locations
-5. Dining suggestions for each day
-6. Local tips and cultural insights
-
-Format the response as JSON with the following structure:
-{
-    "days": [
-        {
-            "day": 1,
-            "date": "YYYY-MM-DD",
-            "activities": [
-                {
-                    "time": "HH:MM",
-                    "title": "Activity name",
-                    "description": "Description",
-                    "duration": "Duration in hours",
-                    "cost": "Estimated cost",
-                    "location": "Location"
-                }
-            ],
-            "meals": {
-                "breakfast": "Suggestion",
-                "lunch": "Suggestion", 
-                "dinner": "Suggestion"
-            },
-            "tips": "Daily tips"
-        }
-    ],
-    "overview": "Trip overview",
-    "total_estimated_cost": "Total estimated cost",
-    "packing_suggestions": ["item1", "item2"],
-    "local_tips": ["tip1", "tip2"]
-}
-"""
+        Args:
+            destination: The travel destination
+            start_date: Start date of the trip
+            end_date: End date of the trip
+            preferences: User preferences (activities, food, etc.)
+            budget: Budget level (low, medium, high)
+            bypass_cache: Skip the cache lookup and always call the model
+            prompt_version: Prompt template version (defaults to GEMINI_PROMPT_VERSION)
+            
+        Yields:
+            ("day", day) for every completed day, then ("complete", itinerary)
+            with the fully assembled itinerary
+        """
+        template = get_prompt_template(prompt_version)
+        cache_key = itinerary_cache_key(
+            destination, start_date, end_date, preferences, budget, template.version
+        )
+        if not bypass_cache:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                itinerary_data = redate_itinerary(cached, start_date)
+                for day in itinerary_data.get("days") or []:
+                    yield "day", day
+                yield "complete", itinerary_data
+                return
+        
+        prompt = template.itinerary(
+            destination, start_date, end_date, preferences, budget
+        )
+        model_name = self.router.select(
+            "itinerary", self._trip_days(start_date, end_date), preferences
+        )
+        parser = DaysArrayParser()
+        chunks = []
         
         try:
-            response = self.model.generate_content(prompt)
-            # Parse the response
-            import json
-            # Try to extract JSON from the response
-            text = response.text
-            
-            # Find JSON in the response
-            start_idx = text.find('{')
-            end_idx = text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx]
-                itinerary_data = json.loads(json_str)
-            else:
-                # If no JSON found, wrap the text response
-                itinerary_data = {
-                    "overview": text,
-                    "days": [],
-                    "raw_response": text
-                }
+            stream_content = self._stream_content(prompt, template, "itinerary", model_name)
+            async with aclosing(stream_content) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    for day in parser.feed(chunk):
+                        yield "day", day
+            itinerary_data = self._parse_itinerary_text("".join(chunks))
+        except Exception:
+            # Log generic error without exposing sensitive details
+            print("Error streaming itinerary: Unable to generate with AI")
+            itinerary_data = self._itinerary_error()
+        
+        if self._is_cacheable(itinerary_data):
+            await self._cache_set(cache_key, itinerary_data)
+        yield "complete", itinerary_data
+    
+    @staticmethod
+    def _trip_days(start_date: str, end_date: str) -> Optional[int]:
+        """Trip length in days, or None if the dates cannot be parsed."""
+        start = parse_trip_date(start_date)
+        end = parse_trip_date(end_date)
+        if start is None or end is None:
+            return None
+        return (end - start).days + 1
+    
+    @staticmethod
+    def _plan_chunks(start_date: str, end_date: str) -> List[List[date]]:
+        """
+        Split a long trip into consecutive runs of ITINERARY_CHUNK_DAYS dates.
+        
+        Returns an empty list when the trip is short enough for one prompt
+        or its dates cannot be parsed.
+        """
+        start = parse_trip_date(start_date)
+        end = parse_trip_date(end_date)
+        if start is None or end is None:
+            return []
+        
+        total_days = (end - start).days + 1
+        if total_days <= settings.ITINERARY_CHUNK_THRESHOLD_DAYS:
+            return []
+        
+        dates = [start + timedelta(days=offset) for offset in range(total_days)]
+        size = max(1, settings.ITINERARY_CHUNK_DAYS)
+        return [dates[i:i + size] for i in range(0, total_days, size)]
+    
+    async def _generate_chunked_itinerary(
+        self,
+        template: PromptTemplate,
+        destination: str,
+        chunks: List[List[date]],
+        preferences: Optional[Dict[str, Any]] = None,
+        budget: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a long itinerary as an outline pass plus concurrent day chunks.
+        
+        The outline is small (trip-level fields and one highlight per day), so
+        it returns quickly; every chunk then receives the full outline so it
+        plans only its own days without repeating highlights from the others.
+        """
+        total_days = sum(len(chunk) for chunk in chunks)
+        start_date, end_date = chunks[0][0], chunks[-1][-1]
+        
+        outline_prompt = template.outline(
+            destination, start_date, end_date, total_days, preferences, budget
+        )
+        response = await self._generate_content(
+            outline_prompt, template, "outline",
+            self.router.select("outline", total_days, preferences)
+        )
+        outline = self._parse_itinerary_text(response.text)
+        highlights = outline.get("day_highlights") or []
+        
+        first_day = 1
+        chunk_prompts = []
+        for chunk in chunks:
+            chunk_prompts.append(template.chunk(
+                destination, chunk, first_day, total_days, highlights, preferences, budget
+            ))
+            first_day += len(chunk)
+        
+        responses = await asyncio.gather(*(
+            self._generate_content(
+                prompt, template, "chunk", self.router.select("chunk", len(chunk), preferences)
+            )
+            for chunk, prompt in zip(chunks, chunk_prompts)
+        ))
+        
+        days = []
+        chunk_first_day = 1
+        for chunk, chunk_response in zip(chunks, responses):
+            chunk_days = self._parse_itinerary_text(chunk_response.text).get("days") or []
+            if len(chunk_days) < len(chunk):
+                raise ValueError("Incomplete itinerary chunk")
+            for offset, (day_date, day) in enumerate(zip(chunk, chunk_days)):
+                day["day"] = chunk_first_day + offset
+                day["date"] = day_date.isoformat()
+                days.append(day)
+            chunk_first_day += len(chunk)
+        
+        return {
+            "days": days,
+            "overview": outline.get("overview", ""),
+            "total_estimated_cost": outline.get("total_estimated_cost"),
+            "packing_suggestions": outline.get("packing_suggestions") or [],
+            "local_tips": outline.get("local_tips") or [],
+        }
+    
+    @staticmethod
+    def _parse_itinerary_text(text: str) -> Dict[str, Any]:
+        """Extract the itinerary JSON object from a model response."""
+        # Find JSON in the response
+        start_idx = text.find('{')
+        end_idx = text.rfind('}') + 1
+        
+        if start_idx != -1 and end_idx > start_idx:
+            json_str = text[start_idx:end_idx]
+            return json.loads(json_str)
+        
+        # If no JSON found, wrap the text response
+        return {
+            "overview": text,
+            "days": [],
+            "raw_response": text
+        }
+    
+    @staticmethod
+    def _is_cacheable(itinerary_data: Dict[str, Any]) -> bool:
+        """Only well-formed results are worth caching."""
+        return (
+            "error" not in itinerary_data
+            and "raw_response" not in itinerary_data
+            and bool(itinerary_data.get("days"))
+        )
+    
+    async def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read from the response cache, if configured."""
+        if self.cache is None:
+            return None
+        return await self.cache.get(key)
+    
+    async def _cache_set(self, key: str, value: Dict[str, Any]) -> None:
+        """Write to the response cache, if configured."""
+        if self.cache is not None:
+            await self.cache.set(key, value)
+    
+    @staticmethod
+    def _itinerary_error() -> Dict[str, Any]:
+        """Payload returned when itinerary generation fails."""
+        return {
+            "error": "generation_failed",
+            "overview": "Failed to generate itinerary. Please try again."
+        }
+    
+    async def regenerate_day(
+        self,
+        destination: str,
+        day: Dict[str, Any],
+        previous_day: Optional[Dict[str, Any]] = None,
+        next_day: Optional[Dict[str, Any]] = None,
+        preferences: Optional[Dict[str, Any]] = None,
+        prompt_version: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Re-plan a single day of an existing itinerary.
+        
+        Args:
+            destination: The travel destination
+            day: The day being replaced
+            previous_day: The day before, if any (used as compact context)
+            next_day: The day after, if any (used as compact context)
+            preferences: Extra preferences for this day
+            prompt_version: Prompt template version (defaults to GEMINI_PROMPT_VERSION)
             
-            return itinerary_data
+        Returns:
+            The new day, or None if generation failed
+        """
+        template = get_prompt_template(prompt_version)
+        prompt = template.day(destination, day, previous_day, next_day, preferences)
+        
+        try:
+            response = await self._generate_content(
+                prompt, template, "day", self.router.select("day", 1, preferences)
+            )
+            new_day = self._parse_itinerary_text(response.text)
         except Exception:
             # Log generic error without exposing sensitive details
-            print("Error generating itinerary: Unable to generate with AI")
-            return {
-                "error": "generation_failed",
-                "overview": "Failed to generate itinerary. Please try again."
-            }
+            print("Error regenerating day: Unable to generate with AI")
+            return None
+        
+        if "raw_response" in new_day or not new_day.get("activities"):
+            return None
+        
+        # Keep the day's position in the trip regardless of what the model echoed
+        new_day["day"] = day.get("day")
+        new_day["date"] = day.get("date")
+        return new_day
     
-    def get_destination_recommendations(
+    async def get_destination_recommendations(
         self,
         preferences: Dict[str, Any],
-        budget: Optional[str] = None
+        budget: Optional[str] = None,
+        bypass_cache: bool = False,
+        prompt_version: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Get destination recommendations based on user preferences.
@@ -129,45 +504,76 @@ Format the response as JSON with the following structure:
         Args:
             preferences: User preferences
             budget: Budget level
+            bypass_cache: Skip the cache lookup and always call the model
+            prompt_version: Prompt template version (defaults to GEMINI_PROMPT_VERSION)
             
         Returns:
             Recommended destinations
         """
-        prompt = f"""Based on the following preferences, recommend 5 travel destinations:
-
-Preferences: {preferences}
-"""
-        
-        if budget:
-            prompt += f"Budget: {budget}\n"
-        
-        prompt += """
-For each destination, provide:
-1. Destination name and country
-2. Why it matches the preferences
-3. Best time to visit
-4. Estimated daily budget
-5. Top 3 must-see attractions
-
-Format as JSON array of destinations.
-"""
+        template = get_prompt_template(prompt_version)
+        cache_key = recommendations_cache_key(preferences, budget, template.version)
+        if not bypass_cache:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
         
-        try:
-            response = self.model.generate_content(prompt)
-            import json
-            text = response.text
-            
-            start_idx = text.find('[')
-            end_idx = text.rfind(']') + 1
+        async def recommend() -> Dict[str, Any]:
+            prompt = template.recommendations(preferences, budget)
             
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx]
-                recommendations = json.loads(json_str)
-            else:
-                recommendations = [{"raw_response": text}]
+            try:
+                response = await self._generate_content(
+                    prompt, template, "recommendations",
+                    self.router.select("recommendations", None, preferences)
+                )
+                text = response.text
+                
+                start_idx = text.find('[')
+                end_idx = text.rfind(']') + 1
+                
+                if start_idx != -1 and end_idx > start_idx:
+                    json_str = text[start_idx:end_idx]
+                    recommendations = json.loads(json_str)
+                    cacheable = True
+                else:
+                    recommendations = [{"raw_response": text}]
+                    cacheable = False
+            except Exception:
+                # Log generic error without exposing sensitive details
+                print("Error getting recommendations: Unable to fetch recommendations")
+                return {"error": "fetch_failed", "recommendations": []}
             
-            return {"recommendations": recommendations}
-        except Exception:
-            # Log generic error without exposing sensitive details
-            print("Error getting recommendations: Unable to fetch recommendations")
-            return {"error": "fetch_failed", "recommendations": []}
+            result = {"recommendations": recommendations}
+            if cacheable:
+                await self._cache_set(cache_key, result)
+            return result
+        
+        return await self.single_flight.do(cache_key, recommend)
+
+
+_gemini_service: Optional[GeminiService] = None
+
+
+def init_gemini_service() -> GeminiService:
+    """Create the process-wide Gemini service (called from the app lifespan)."""
+    global _gemini_service
+    if _gemini_service is None:
+        cache = None
+        if settings.AI_CACHE_ENABLED:
+            cache = AIResponseCache(
+                shared=PostgresCacheBackend() if settings.AI_CACHE_SHARED_ENABLED else None
+            )
+        _gemini_service = GeminiService(cache=cache)
+    return _gemini_service
+
+
+def close_gemini_service() -> None:
+    """Dispose of the process-wide Gemini service."""
+    global _gemini_service
+    if _gemini_service is not None:
+        _gemini_service.close()
+        _gemini_service = None
+
+
+def get_gemini_service() -> GeminiService:
+    """Dependency returning the shared Gemini service."""
+    return init_gemini_service()
@@ -0,0 +1,400 @@
+"""
+Helpers shared by the itinerary routes and background workers.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import REAL, any_, case, cast, column, delete, func, insert, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.conditional import make_etag
+from app.models.itinerary import Itinerary
+from app.schemas.itinerary import (
+    AIItineraryRequest,
+    Itinerary as ItinerarySchema,
+    ItineraryCreate,
+    ItinerarySummary
+)
+from app.services.pagination import (
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor
+)
+
+_DAYS = Itinerary.ai_content["days"]
+
+# Summary fields computed inside Postgres so ai_content never leaves the database
+DERIVED_SUMMARY_FIELDS = {
+    "day_count": case(
+        (func.jsonb_typeof(_DAYS) == "array", func.jsonb_array_length(_DAYS))
+    ).label("day_count"),
+    "total_estimated_cost": Itinerary.ai_content["total_estimated_cost"].astext.label(
+        "total_estimated_cost"
+    ),
+}
+
+SUMMARY_FIELDS = tuple(ItinerarySummary.model_fields)
+DETAIL_FIELDS = tuple(ItinerarySchema.model_fields)
+
+# Maintained by a trigger (see itinerary_search_vector() in db_init.sql) and
+# not mapped on the model, so it is never loaded with the row
+SEARCH_VECTOR = column("search_vector", TSVECTOR)
+# Must match the configuration itinerary_search_vector() uses
+SEARCH_CONFIG = "english"
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MinWords=10, MaxWords=25, MaxFragments=2"
+
+
+def build_generated_itinerary(
+    user_id: UUID,
+    request: AIItineraryRequest,
+    ai_content: Dict[str, Any]
+) -> Itinerary:
+    """Build an itinerary row from AI-generated content."""
+    return Itinerary(
+        user_id=user_id,
+        title=f"Trip to {request.destination}",
+        destination=request.destination,
+        description=ai_content.get("overview", ""),
+        ai_content=ai_content
+    )
+
+
+def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated sparse fieldset.
+
+    Args:
+        fields: Value of the `fields` query parameter
+        allowed: Field names the endpoint can return
+
+    Returns:
+        Requested field names, or None for all fields
+
+    Raises:
+        ValueError: If a field is unknown or none are given
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("No fields requested")
+    return requested
+
+
+async def list_itinerary_summaries(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    fields: Optional[Set[str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Page through a user's itineraries, newest first, without their content.
+
+    The JSONB columns are never loaded; day count and estimated cost are
+    extracted in the query. Uses keyset pagination on (created_at, id),
+    served by the (user_id, created_at DESC, id DESC) index.
+
+    Args:
+        db: Database session
+        user_id: Owner of the itineraries
+        limit: Page size
+        cursor: `next_cursor` from the previous page
+        fields: Summary fields to return, or None for all of them
+
+    Returns:
+        (summaries holding only the requested fields, cursor for the next
+        page or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    wanted = [name for name in SUMMARY_FIELDS if fields is None or name in fields]
+    columns = [getattr(Itinerary, name) for name in wanted if name not in DERIVED_SUMMARY_FIELDS]
+    derived = [DERIVED_SUMMARY_FIELDS[name] for name in wanted if name in DERIVED_SUMMARY_FIELDS]
+
+    # id and created_at are always loaded for the cursor
+    query = select(Itinerary).options(
+        load_only(Itinerary.id, Itinerary.created_at, *columns)
+    ).add_columns(*derived).where(Itinerary.user_id == user_id)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Itinerary.created_at, Itinerary.id) < tuple_(created_at, row_id)
+        )
+    query = query.order_by(Itinerary.created_at.desc(), Itinerary.id.desc()).limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    summaries = []
+    for row in rows[:limit]:
+        itinerary, values = row[0], row._mapping
+        summaries.append({
+            name: values[name] if name in DERIVED_SUMMARY_FIELDS else getattr(itinerary, name)
+            for name in wanted
+        })
+    return summaries, next_cursor
+
+
+async def search_itineraries(
+    db: AsyncSession,
+    user_id: UUID,
+    q: str,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Full-text and fuzzy search over a user's itineraries, best match first.
+
+    Matches the search_vector GIN index (title, destination, description
+    and activity text) with web-search syntax, or the destination trigram
+    index for misspelt places. Rank is ts_rank plus the word similarity of
+    `q` to the destination;
+    pages are keyset-paginated on (rank, id). Snippets are only built for
+    the rows of the page.
+
+    Args:
+        db: Database session
+        user_id: Owner of the itineraries
+        q: Search text, e.g. `lisbon "tram 28" -museum`
+        limit: Page size
+        cursor: `next_cursor` from the previous page
+
+    Returns:
+        (summaries with `rank` and `snippet`, cursor for the next page or
+        None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(SEARCH_VECTOR, query) + func.word_similarity(q, Itinerary.destination)
+
+    # `q <% destination`: q is close to some run of words in the destination
+    matches = select(Itinerary.id, rank.label("rank")).where(
+        Itinerary.user_id == user_id,
+        or_(SEARCH_VECTOR.op("@@")(query), literal(q).op("<%")(Itinerary.destination))
+    )
+    if cursor is not None:
+        last_rank, row_id = decode_rank_cursor(cursor)
+        matches = matches.where(tuple_(rank, Itinerary.id) < tuple_(cast(last_rank, REAL), row_id))
+    page = matches.order_by(rank.desc(), Itinerary.id.desc()).limit(limit + 1).subquery("page")
+
+    document = func.concat_ws(" ", Itinerary.description, func.itinerary_activity_text(Itinerary.ai_content))
+    columns = [getattr(Itinerary, name) for name in SUMMARY_FIELDS if name not in DERIVED_SUMMARY_FIELDS]
+    result = await db.execute(
+        select(Itinerary).options(load_only(*columns)).add_columns(
+            *DERIVED_SUMMARY_FIELDS.values(),
+            page.c.rank,
+            func.ts_headline(SEARCH_CONFIG, document, query, SNIPPET_OPTIONS).label("snippet")
+        ).join(page, page.c.id == Itinerary.id).order_by(page.c.rank.desc(), page.c.id.desc())
+    )
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_rank_cursor(last.rank, last[0].id)
+
+    hits = []
+    for row in rows[:limit]:
+        itinerary, values = row[0], row._mapping
+        hits.append({
+            **{
+                name: values[name] if name in DERIVED_SUMMARY_FIELDS else getattr(itinerary, name)
+                for name in SUMMARY_FIELDS
+            },
+            "rank": values["rank"],
+            "snippet": values["snippet"],
+        })
+    return hits, next_cursor
+
+
+async def get_user_itinerary(
+    db: AsyncSession,
+    itinerary_id: UUID,
+    user_id: UUID,
+    fields: Optional[Set[str]] = None,
+    for_update: bool = False
+) -> Optional[Itinerary]:
+    """
+    Load one of a user's itineraries.
+
+    Args:
+        db: Database session
+        itinerary_id: Itinerary to load
+        user_id: Owner of the itinerary
+        fields: Only load these columns (plus the ones the ETag needs),
+            or None for all of them
+        for_update: Lock the row until the transaction ends
+
+    Returns:
+        The itinerary, or None if it does not exist
+    """
+    query = select(Itinerary).where(
+        Itinerary.id == itinerary_id,
+        Itinerary.user_id == user_id
+    )
+    if fields is not None:
+        columns = [getattr(Itinerary, name) for name in DETAIL_FIELDS if name in fields]
+        query = query.options(
+            load_only(Itinerary.id, Itinerary.created_at, Itinerary.updated_at, *columns)
+        )
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+def _id_array(ids: Sequence[UUID]) -> ColumnElement:
+    """`= ANY(...)` over one uuid[] parameter, so the statement text does not depend on len(ids)."""
+    return any_(literal(list(dict.fromkeys(ids)), ARRAY(PG_UUID(as_uuid=True))))
+
+
+async def create_itineraries(
+    db: AsyncSession,
+    user_id: UUID,
+    items: Sequence[ItineraryCreate]
+) -> List[Itinerary]:
+    """
+    Insert several itineraries with one multi-row INSERT ... RETURNING.
+
+    Args:
+        db: Database session; the caller commits
+        user_id: Owner of the new itineraries
+        items: Itineraries to create
+
+    Returns:
+        The new rows, in the order of `items`
+    """
+    result = await db.execute(
+        insert(Itinerary).returning(Itinerary, sort_by_parameter_order=True),
+        [{"user_id": user_id, **item.model_dump()} for item in items]
+    )
+    return list(result.scalars())
+
+
+async def get_user_itineraries(
+    db: AsyncSession,
+    itinerary_ids: Sequence[UUID],
+    user_id: UUID
+) -> Dict[UUID, Itinerary]:
+    """
+    Load several of a user's itineraries in one query.
+
+    Returns:
+        Found itineraries by id; ids that do not exist or belong to
+        another user are missing
+    """
+    result = await db.execute(
+        select(Itinerary).where(
+            Itinerary.id == _id_array(itinerary_ids),
+            Itinerary.user_id == user_id
+        )
+    )
+    return {itinerary.id: itinerary for itinerary in result.scalars()}
+
+
+async def delete_user_itineraries(
+    db: AsyncSession,
+    itinerary_ids: Sequence[UUID],
+    user_id: UUID
+) -> Set[UUID]:
+    """
+    Delete several of a user's itineraries in one statement.
+
+    Args:
+        db: Database session; the caller commits
+        itinerary_ids: Itineraries to delete
+        user_id: Owner of the itineraries
+
+    Returns:
+        Ids that were deleted
+    """
+    result = await db.execute(
+        delete(Itinerary).where(
+            Itinerary.id == _id_array(itinerary_ids),
+            Itinerary.user_id == user_id
+        ).returning(Itinerary.id).execution_options(synchronize_session=False)
+    )
+    return set(result.scalars())
+
+
+def itinerary_fields(itinerary: Itinerary, fields: Set[str]) -> Dict[str, Any]:
+    """The requested fields of an itinerary loaded with `get_user_itinerary`."""
+    return {name: getattr(itinerary, name) for name in DETAIL_FIELDS if name in fields}
+
+
+def itinerary_etag(
+    itinerary_id: UUID,
+    created_at: datetime,
+    updated_at: Optional[datetime],
+    fields: Optional[Set[str]] = None
+) -> str:
+    """
+    ETag of one itinerary representation.
+
+    `updated_at` is set by a trigger on every UPDATE, so the tag changes
+    whenever the row does. Sparse fieldsets get their own tags.
+    """
+    return make_etag(
+        "itinerary", itinerary_id, updated_at or created_at, ",".join(sorted(fields or ()))
+    )
+
+
+async def get_itinerary_etag(
+    db: AsyncSession,
+    itinerary_id: UUID,
+    user_id: UUID,
+    fields: Optional[Set[str]] = None
+) -> Optional[str]:
+    """
+    ETag of an itinerary from a primary key lookup, without loading content.
+
+    Returns:
+        The ETag, or None if the itinerary does not exist
+    """
+    result = await db.execute(
+        select(Itinerary.created_at, Itinerary.updated_at).where(
+            Itinerary.id == itinerary_id,
+            Itinerary.user_id == user_id
+        )
+    )
+    version = result.one_or_none()
+    if version is None:
+        return None
+    return itinerary_etag(itinerary_id, version.created_at, version.updated_at, fields)
+
+
+async def itinerary_list_etag(db: AsyncSession, user_id: UUID, *params: Any) -> str:
+    """
+    ETag for a page of a user's itineraries.
+
+    Derived from the number of itineraries and the latest change among them:
+    inserts and updates move the latest change, deletes change the count.
+
+    Args:
+        db: Database session
+        user_id: Owner of the itineraries
+        params: Query parameters that select the page
+    """
+    result = await db.execute(
+        select(
+            func.count(Itinerary.id),
+            func.max(func.coalesce(Itinerary.updated_at, Itinerary.created_at))
+        ).where(Itinerary.user_id == user_id)
+    )
+    count, last_modified = result.one()
+    return make_etag("itineraries", user_id, count, last_modified, *params)
@@ -0,0 +1,253 @@
+"""
+Postgres-backed worker pool for asynchronous itinerary generation.
+
+Jobs live in the `itinerary_jobs` table. Workers claim them with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so any number of workers across any
+number of processes can share the queue without an external broker.
+
+A worker refreshes `started_at` while it generates, so only jobs whose
+worker stopped heartbeating for ITINERARY_JOB_TIMEOUT_SECONDS are taken
+over. Each claim is identified by the job's attempt number, and a worker
+only records its outcome if the job is still on that attempt.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import ItineraryJob
+from app.schemas.itinerary import AIItineraryRequest
+from app.services.gemini_service import get_gemini_service
+from app.services.itinerary_service import build_generated_itinerary
+
+TERMINAL_JOB_STATUSES = ("succeeded", "failed")
+
+
+class ItineraryJobQueue:
+    """Pool of asyncio workers draining the itinerary job table."""
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        """Initialize the pool (workers start on `start()`)."""
+        self.workers = settings.ITINERARY_JOB_WORKERS if workers is None else workers
+        self.poll_interval = poll_interval or settings.ITINERARY_JOB_POLL_INTERVAL_SECONDS
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+    
+    def start(self) -> None:
+        """Launch the worker tasks."""
+        self._stopping = False
+        for index in range(self.workers):
+            self._tasks.append(
+                asyncio.create_task(self._run(), name=f"itinerary-job-worker-{index}")
+            )
+    
+    async def stop(self) -> None:
+        """Cancel workers; interrupted jobs are re-claimed after the job timeout."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+    
+    def notify(self) -> None:
+        """Wake idle workers in this process after a job is enqueued."""
+        self._wakeup.set()
+    
+    async def enqueue(self, user_id: UUID, request: AIItineraryRequest) -> ItineraryJob:
+        """Persist a new job and wake a worker."""
+        async with AsyncSessionLocal() as db:
+            job = ItineraryJob(
+                user_id=user_id,
+                status="queued",
+                request=request.model_dump(),
+                attempts=0,
+                max_attempts=settings.ITINERARY_JOB_MAX_ATTEMPTS
+            )
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+        
+        self.notify()
+        return job
+    
+    async def _run(self) -> None:
+        """Worker loop: claim and process jobs until cancelled."""
+        while not self._stopping:
+            try:
+                claim = await self._claim()
+            except Exception:
+                print("Error claiming itinerary job: queue unavailable")
+                claim = None
+            
+            if claim is not None:
+                try:
+                    await self._process(*claim)
+                except Exception:
+                    # The job is retried or given up on once its claim goes stale
+                    print("Error processing itinerary job: generation or database failure")
+                continue
+            
+            # Nothing ready: sleep until polled again or woken by enqueue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _claim(self) -> Optional[Tuple[UUID, int]]:
+        """
+        Atomically mark the next runnable job as running.
+        
+        Returns:
+            (job id, attempt number of this claim), or None if no job is ready
+        """
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=settings.ITINERARY_JOB_TIMEOUT_SECONDS)
+        abandoned = and_(ItineraryJob.status == "running", ItineraryJob.started_at < stale_before)
+        
+        async with AsyncSessionLocal() as db:
+            # Abandoned jobs with no attempts left (e.g. one that keeps
+            # crashing its worker) are given up on rather than retried forever
+            await db.execute(
+                update(ItineraryJob).where(
+                    abandoned,
+                    ItineraryJob.attempts >= ItineraryJob.max_attempts
+                ).values(status="failed", error="worker_timeout", finished_at=now)
+            )
+            
+            result = await db.execute(
+                select(ItineraryJob).where(
+                    or_(
+                        and_(ItineraryJob.status == "queued", ItineraryJob.run_after <= now),
+                        # Jobs whose worker crashed, stopped or stopped heartbeating
+                        and_(abandoned, ItineraryJob.attempts < ItineraryJob.max_attempts)
+                    )
+                ).order_by(ItineraryJob.run_after).limit(1).with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if job is None:
+                await db.commit()
+                return None
+            
+            job.status = "running"
+            job.attempts += 1
+            job.started_at = now
+            await db.commit()
+            return job.id, job.attempts
+    
+    async def _heartbeat(self, job_id: UUID, attempt: int) -> None:
+        """Keep refreshing `started_at` so the claim is not taken over."""
+        interval = settings.ITINERARY_JOB_TIMEOUT_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(ItineraryJob).where(
+                            ItineraryJob.id == job_id,
+                            ItineraryJob.status == "running",
+                            ItineraryJob.attempts == attempt
+                        ).values(started_at=datetime.now(timezone.utc))
+                    )
+                    await db.commit()
+            except Exception:
+                print("Error refreshing itinerary job heartbeat: queue unavailable")
+    
+    async def _process(self, job_id: UUID, attempt: int) -> None:
+        """
+        Generate the itinerary for a claimed job and record the outcome.
+        
+        Args:
+            job_id: Claimed job
+            attempt: Attempt number of the claim; the outcome is dropped if
+                the job has since been taken over or finished
+        """
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ItineraryJob, job_id)
+            if job is None:
+                return
+            user_id = job.user_id
+            try:
+                request = AIItineraryRequest(**job.request)
+            except (TypeError, ValueError):
+                # A payload that no longer validates will never succeed
+                if job.status == "running" and job.attempts == attempt:
+                    job.status = "failed"
+                    job.error = "invalid_request"
+                    job.finished_at = datetime.now(timezone.utc)
+                    await db.commit()
+                return
+        
+        # No connection is held while the model call runs
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt))
+        try:
+            ai_content = await get_gemini_service().generate_itinerary(
+                destination=request.destination,
+                start_date=request.start_date,
+                end_date=request.end_date,
+                preferences=request.preferences,
+                budget=request.budget,
+                bypass_cache=request.bypass_cache,
+                prompt_version=request.prompt_version
+            )
+            error = ai_content.get("error")
+        except Exception:
+            ai_content, error = None, "generation_failed"
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ItineraryJob).where(
+                    ItineraryJob.id == job_id,
+                    ItineraryJob.status == "running",
+                    ItineraryJob.attempts == attempt
+                ).with_for_update()
+            )
+            job = result.scalar_one_or_none()
+            if job is None:
+                # Another worker took the job over, or it was given up on
+                return
+            
+            now = datetime.now(timezone.utc)
+            if error is None:
+                itinerary = build_generated_itinerary(user_id, request, ai_content)
+                db.add(itinerary)
+                await db.flush()
+                job.itinerary_id = itinerary.id
+                job.status = "succeeded"
+                job.error = None
+                job.finished_at = now
+            elif job.attempts >= job.max_attempts:
+                job.status = "failed"
+                job.error = error
+                job.finished_at = now
+            else:
+                # Exponential backoff before the next attempt
+                delay = settings.ITINERARY_JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                job.status = "queued"
+                job.error = error
+                job.run_after = now + timedelta(seconds=delay)
+            
+            await db.commit()
+
+
+_job_queue: Optional[ItineraryJobQueue] = None
+
+
+def get_job_queue() -> ItineraryJobQueue:
+    """Return the process-wide job queue."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = ItineraryJobQueue()
+    return _job_queue
@@ -0,0 +1,287 @@
+"""
+Apply RFC 6902 JSON Patch documents to itineraries in one UPDATE.
+
+Operations on the JSONB columns compile to `jsonb_set`, `jsonb_insert`
+and `#-` expressions evaluated by Postgres, so changing one activity does
+not ship the whole document to the database, and the new row comes back
+from `UPDATE ... RETURNING` instead of a separate refresh. Preconditions
+(paths that must exist, `test` operations) are checked in the same
+statement: if any fails, nothing is updated.
+"""
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import Text, and_, case, false, func, literal, null, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.itinerary import Itinerary
+from app.schemas.itinerary import ItineraryUpdate, JSONPatchOperation
+
+JSONB_COLUMNS = ("ai_content", "flights_data", "hotels_data", "experiences_data")
+SCALAR_COLUMNS = ("title", "destination", "description", "start_date", "end_date")
+NULLABLE_COLUMNS = ("description", "start_date", "end_date")
+
+# Marks operations (`test`) that leave the field as it is
+_UNCHANGED = object()
+
+
+class JSONPatchError(ValueError):
+    """A patch that is malformed or touches fields that cannot be patched."""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    Split an RFC 6901 JSON Pointer into unescaped reference tokens.
+
+    Raises:
+        JSONPatchError: If the pointer does not start with "/"
+    """
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JSONPatchError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _path(tokens: Sequence[str]) -> ColumnElement:
+    return literal(list(tokens), ARRAY(Text))
+
+
+def _get(target: ColumnElement, tokens: Sequence[str]) -> ColumnElement:
+    """`target #> path`, or the target itself for the empty path."""
+    if not tokens:
+        return target
+    return target.op("#>", return_type=JSONB)(_path(tokens))
+
+
+def _add(
+    target: ColumnElement,
+    tokens: Sequence[str],
+    value: ColumnElement,
+    conditions: List[ColumnElement]
+) -> ColumnElement:
+    """RFC 6902 `add`: insert into arrays, set object members."""
+    parent_tokens, last = tokens[:-1], tokens[-1]
+    parent = _get(target, parent_tokens)
+    parent_type = func.jsonb_typeof(parent)
+    is_array = parent_type == "array"
+
+    if last == "-":
+        conditions.append(is_array)
+        appended = parent.op("||", return_type=JSONB)(func.jsonb_build_array(value))
+        if not parent_tokens:
+            return appended
+        return func.jsonb_set(target, _path(parent_tokens), appended, type_=JSONB)
+
+    if last.isdigit():
+        conditions.append(case(
+            (is_array, func.jsonb_array_length(parent) >= int(last)),
+            else_=parent_type == "object"
+        ))
+    else:
+        conditions.append(parent_type == "object")
+    return case(
+        (is_array, func.jsonb_insert(target, _path(tokens), value, type_=JSONB)),
+        else_=func.jsonb_set(target, _path(tokens), value, True, type_=JSONB)
+    )
+
+
+def _require_value(operation: JSONPatchOperation) -> Any:
+    if "value" not in operation.model_fields_set:
+        raise JSONPatchError(f"'{operation.op}' at {operation.path} needs a value")
+    return operation.value
+
+
+def _column_value(column: str, value: Any) -> Any:
+    """Validate a whole-column value against ItineraryUpdate."""
+    try:
+        validated = getattr(ItineraryUpdate.model_validate({column: value}), column)
+    except ValueError as exc:
+        raise JSONPatchError(f"Invalid value for {column}") from exc
+    if validated is None and column not in NULLABLE_COLUMNS + JSONB_COLUMNS:
+        raise JSONPatchError(f"{column} cannot be null")
+    return validated
+
+
+def _scalar_literal(column: str, value: Any) -> ColumnElement:
+    if value is None:
+        return null()
+    return literal(value, getattr(Itinerary, column).type)
+
+
+def _jsonb_literal(value: Any) -> ColumnElement:
+    return literal(value, JSONB)
+
+
+def _field_literal(column: str, value: Any) -> ColumnElement:
+    """A whole-field value; None is SQL NULL for JSONB fields too."""
+    if column in SCALAR_COLUMNS or value is None:
+        return _scalar_literal(column, value)
+    return _jsonb_literal(value)
+
+
+def _check(operation: JSONPatchOperation) -> Tuple[str, List[str], Optional[List[str]]]:
+    """
+    Validate an operation without building SQL.
+
+    Returns:
+        (field, path inside the field, `from` path inside the field for
+        move and copy)
+    """
+    tokens = parse_pointer(operation.path)
+    if not tokens:
+        raise JSONPatchError("Cannot replace the whole itinerary")
+    column, path = tokens[0], tokens[1:]
+    if column not in SCALAR_COLUMNS + JSONB_COLUMNS:
+        raise JSONPatchError(f"Cannot patch {column}")
+    if column in SCALAR_COLUMNS and path:
+        raise JSONPatchError(f"{column} has no members")
+    if column in SCALAR_COLUMNS and operation.op == "remove" and column not in NULLABLE_COLUMNS:
+        raise JSONPatchError(f"{column} cannot be removed")
+    if operation.op in ("add", "replace", "test"):
+        value = _require_value(operation)
+        if not path:
+            _column_value(column, value)
+
+    if operation.op not in ("move", "copy"):
+        return column, path, None
+    if operation.from_ is None:
+        raise JSONPatchError(f"'{operation.op}' at {operation.path} needs from")
+    source = parse_pointer(operation.from_)
+    if column not in JSONB_COLUMNS or source[:1] != [column] or not path or len(source) < 2:
+        raise JSONPatchError("move and copy only work inside one JSONB field")
+    source = source[1:]
+    if operation.op == "move" and path[:len(source)] == source and path != source:
+        raise JSONPatchError("Cannot move a value into one of its children")
+    return column, path, source
+
+
+def _compile(
+    operation: JSONPatchOperation,
+    column: str,
+    path: List[str],
+    source: Optional[List[str]],
+    current: ColumnElement
+) -> Tuple[Any, List[ColumnElement]]:
+    """
+    Build one operation against the field's current value.
+
+    Returns:
+        (new value expression, or _UNCHANGED for `test`; preconditions)
+    """
+    conditions: List[ColumnElement] = []
+
+    if source is not None:
+        moved = _get(current, source)
+        conditions.append(moved.is_not(None))
+        if operation.op == "move":
+            current = current.op("#-", return_type=JSONB)(_path(source))
+        return _add(current, path, moved, conditions), conditions
+
+    if not path:
+        if operation.op == "remove":
+            return null(), conditions
+        expected = _field_literal(column, _column_value(column, operation.value))
+        if operation.op == "test":
+            conditions.append(current.is_(None) if operation.value is None else current == expected)
+            return _UNCHANGED, conditions
+        return expected, conditions
+
+    target = _get(current, path)
+    if operation.op == "test":
+        conditions.append(target == _jsonb_literal(operation.value))
+        return _UNCHANGED, conditions
+    if operation.op == "remove":
+        conditions.append(target.is_not(None))
+        return current.op("#-", return_type=JSONB)(_path(path)), conditions
+    if operation.op == "replace":
+        conditions.append(target.is_not(None))
+        return func.jsonb_set(
+            current, _path(path), _jsonb_literal(operation.value), False, type_=JSONB
+        ), conditions
+    return _add(current, path, _jsonb_literal(operation.value), conditions), conditions
+
+
+def _all_hold(previous_ok: ColumnElement, conditions: Sequence[ColumnElement]) -> ColumnElement:
+    """
+    AND the conditions, evaluated strictly left to right.
+
+    A failed precondition can make later expressions raise in Postgres
+    (e.g. a text index into an array), so nothing after it is evaluated.
+    """
+    return case(
+        (previous_ok.is_not(True), false()),
+        *[(condition.is_not(True), false()) for condition in conditions],
+        else_=true()
+    )
+
+
+async def patch_itinerary(
+    db: AsyncSession,
+    itinerary_id: UUID,
+    user_id: UUID,
+    operations: Sequence[JSONPatchOperation]
+) -> Optional[Itinerary]:
+    """
+    Apply a JSON Patch to one of a user's itineraries in one statement.
+
+    Each operation is a derived table computing the touched fields from
+    the previous one, so every operation sees the result of those before
+    it and the SQL grows linearly with the patch. An `ok` column carries
+    the preconditions through the chain; the UPDATE only matches when all
+    of them held.
+
+    Args:
+        db: Session; the caller commits
+        itinerary_id: Itinerary to patch
+        user_id: Owner of the itinerary
+        operations: Patch operations; paths start with the field name,
+            e.g. "/ai_content/days/0/title"
+
+    Returns:
+        The patched itinerary, or None if it does not exist or a
+        precondition failed
+
+    Raises:
+        JSONPatchError: If the patch is malformed or not allowed
+    """
+    checked = [_check(operation) for operation in operations]
+    columns = list(dict.fromkeys(column for column, _, _ in checked))
+
+    # FOR UPDATE makes the chain read the row version the UPDATE replaces
+    state = select(
+        Itinerary.id, *[getattr(Itinerary, column) for column in columns], true().label("ok")
+    ).where(
+        Itinerary.id == itinerary_id,
+        Itinerary.user_id == user_id
+    ).with_for_update().subquery("patch_0")
+
+    changed = set()
+    for index, (operation, (column, path, source)) in enumerate(zip(operations, checked), 1):
+        value, conditions = _compile(operation, column, path, source, state.c[column])
+        ok = _all_hold(state.c.ok, conditions)
+        fields = []
+        for name in columns:
+            if name == column and value is not _UNCHANGED:
+                changed.add(name)
+                fields.append(case((ok, value), else_=state.c[name]).label(name))
+            else:
+                fields.append(state.c[name])
+        # OFFSET 0 keeps Postgres from inlining the steps into each other
+        state = select(state.c.id, *fields, ok.label("ok")).offset(0).subquery(f"patch_{index}")
+
+    where = and_(Itinerary.id == state.c.id, state.c.ok)
+    if not changed:
+        # Only tests: nothing to write, so the row keeps its ETag
+        result = await db.execute(select(Itinerary).where(where))
+    else:
+        result = await db.execute(
+            update(Itinerary).where(where).values(
+                {name: state.c[name] for name in columns if name in changed}
+            ).returning(Itinerary).execution_options(
+                synchronize_session=False, populate_existing=True
+            )
+        )
+    return result.scalar_one_or_none()
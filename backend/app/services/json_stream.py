@@ -0,0 +1,96 @@
+"""
+Incremental JSON parsing for streamed model output.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+
+class DaysArrayParser:
+    """
+    Extract completed entries of the top-level ``days`` array from a JSON
+    document that arrives in arbitrary text chunks.
+
+    Only the structure needed to find day boundaries is tracked (nesting
+    depth, string/escape state and the most recent top-level key), so each
+    chunk is scanned once and completed days can be emitted as soon as their
+    closing brace arrives.
+    """
+
+    def __init__(self, key: str = "days"):
+        """Initialize parser state."""
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk: Next piece of the model response
+
+        Returns:
+            Day objects completed by this chunk, in order
+        """
+        self._text += chunk
+        completed = []
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._string_start is not None:
+                        self._last_key = text[self._string_start:i]
+                continue
+
+            if char == '"' and self._depth > 0:
+                self._in_string = True
+                self._string_start = i + 1
+            elif char == "{" or char == "[":
+                if (
+                    self._array_depth is not None
+                    and self._depth == self._array_depth
+                    and char == "{"
+                ):
+                    self._item_start = i
+                if char == "[" and self._depth == 1 and self._last_key == self.key:
+                    self._array_depth = self._depth + 1
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if char == "}" and self._depth == self._array_depth and self._item_start is not None:
+                        item = self._decode(text[self._item_start:i + 1])
+                        if item is not None:
+                            completed.append(item)
+                        self._item_start = None
+                    elif char == "]" and self._depth == self._array_depth - 1:
+                        self._array_depth = None
+            elif char == "," and self._depth == 1:
+                self._last_key = None
+
+        self._pos = len(text)
+        return completed
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Dict[str, Any]]:
+        """Decode a single completed array entry."""
+        try:
+            item = json.loads(fragment)
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
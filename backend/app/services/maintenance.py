@@ -0,0 +1,93 @@
+"""
+Periodic database housekeeping.
+
+Each task calls one of the cleanup functions defined in
+migrations/db_init.sql on its own interval. Every worker process runs the
+schedule; the cleanups are idempotent DELETEs, so overlapping runs only
+find less to delete.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+
+def default_tasks() -> List[Tuple[str, float]]:
+    """(SQL function, interval in seconds) pairs enabled in settings."""
+    tasks = [
+        ("cleanup_expired_ai_cache", settings.AI_CACHE_CLEANUP_INTERVAL_SECONDS),
+        ("cleanup_orphaned_search_blobs", settings.SEARCH_BLOB_CLEANUP_INTERVAL_SECONDS),
+    ]
+    return [(function, interval) for function, interval in tasks if interval > 0]
+
+
+class MaintenanceScheduler:
+    """Run cleanup functions periodically in background tasks."""
+
+    def __init__(self, tasks: Optional[List[Tuple[str, float]]] = None):
+        """Initialize tasks and counters."""
+        self.tasks = default_tasks() if tasks is None else tasks
+        self._running: List[asyncio.Task] = []
+        self._stats: Dict[str, Dict[str, int]] = {
+            function: {"runs": 0, "deleted": 0, "failed": 0} for function, _ in self.tasks
+        }
+
+    def start(self) -> None:
+        """Launch one task per cleanup function."""
+        if self._running:
+            return
+        for function, interval in self.tasks:
+            self._running.append(
+                asyncio.create_task(self._run(function, interval), name=f"maintenance-{function}")
+            )
+
+    async def stop(self) -> None:
+        """Cancel the cleanup tasks."""
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running.clear()
+
+    async def run_once(self, function: str) -> None:
+        """
+        Call a cleanup function and count what it deleted.
+
+        Functions returning void count as a run without a deleted total.
+        """
+        stats = self._stats[function]
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(text(f"SELECT {function}()"))
+                deleted: Any = result.scalar()
+                await db.commit()
+        except Exception:
+            stats["failed"] += 1
+            print(f"Error running {function}: database unavailable")
+            return
+        stats["runs"] += 1
+        if isinstance(deleted, int):
+            stats["deleted"] += deleted
+
+    async def _run(self, function: str, interval: float) -> None:
+        """Run a cleanup function every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_once(function)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Counters per cleanup function."""
+        return {function: dict(stats) for function, stats in self._stats.items()}
+
+
+_maintenance_scheduler: Optional[MaintenanceScheduler] = None
+
+
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """Process-wide maintenance scheduler."""
+    global _maintenance_scheduler
+    if _maintenance_scheduler is None:
+        _maintenance_scheduler = MaintenanceScheduler()
+    return _maintenance_scheduler
@@ -0,0 +1,173 @@
+"""
+Model routing and latency tracking for Gemini calls.
+
+Short trips, chunks and recommendations go to the fast model; single-prompt
+itineraries for long or preference-heavy trips (and the outline that plans
+a long trip) go to the large model. Per-model latency histograms decide
+when a slow call is worth hedging with a second request.
+"""
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Bucket upper bounds in milliseconds: 50ms to ~160s, 25% apart
+_BUCKET_BOUNDS: List[float] = []
+_bound = 50.0
+while _bound < 160_000:
+    _BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.25
+_BUCKET_BOUNDS.append(float("inf"))
+
+LARGE_MODEL_KINDS = ("itinerary", "outline")
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram that favours recent samples.
+
+    Once `window` samples have been recorded every bucket is halved, so
+    old observations decay instead of pinning the percentiles forever.
+    """
+
+    def __init__(self, window: int):
+        """Initialize empty buckets."""
+        self.window = max(2, window)
+        self._counts = [0.0] * len(_BUCKET_BOUNDS)
+        self._total = 0.0
+        self.samples = 0
+
+    def record(self, latency_ms: float) -> None:
+        """Add one observation."""
+        if self._total >= self.window:
+            self._counts = [count / 2 for count in self._counts]
+            self._total /= 2
+        self._counts[bisect.bisect_left(_BUCKET_BOUNDS, latency_ms)] += 1
+        self._total += 1
+        self.samples += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile, in ms."""
+        if self._total == 0:
+            return None
+        target = self._total * pct / 100
+        running = 0.0
+        for bound, count in zip(_BUCKET_BOUNDS, self._counts):
+            running += count
+            if running >= target:
+                return bound
+        return _BUCKET_BOUNDS[-2]
+
+    def stats(self) -> Dict[str, Any]:
+        """Sample count and headline percentiles."""
+        return {
+            "samples": self.samples,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+def _count_preferences(value: Any) -> int:
+    """Number of leaf values in a preferences structure."""
+    if isinstance(value, dict):
+        return sum(_count_preferences(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sum(_count_preferences(v) for v in value)
+    return 0 if value in (None, "") else 1
+
+
+class ModelRouter:
+    """Pick a model per request and decide when to hedge it."""
+
+    def __init__(
+        self,
+        fast_model: Optional[str] = None,
+        large_model: Optional[str] = None,
+        hedge_enabled: Optional[bool] = None
+    ):
+        """Initialize model tiers, histograms and hedging counters."""
+        self.fast_model = fast_model or settings.GEMINI_MODEL
+        self.large_model = large_model or settings.GEMINI_LARGE_MODEL
+        self.hedge_enabled = (
+            settings.GEMINI_HEDGE_ENABLED if hedge_enabled is None else hedge_enabled
+        )
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.routed: Dict[str, int] = {}
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def select(
+        self,
+        kind: str,
+        total_days: Optional[int] = None,
+        preferences: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Choose the model for a call.
+
+        Args:
+            kind: Prompt kind (itinerary, outline, chunk, day, recommendations)
+            total_days: Trip length, if known
+            preferences: User preferences for the trip
+
+        Returns:
+            Model name
+        """
+        model_name = self.fast_model
+        if kind in LARGE_MODEL_KINDS and (
+            total_days is None
+            or total_days >= settings.GEMINI_LARGE_MODEL_MIN_DAYS
+            or _count_preferences(preferences) >= settings.GEMINI_LARGE_MODEL_MIN_PREFERENCES
+        ):
+            model_name = self.large_model
+        self.routed[model_name] = self.routed.get(model_name, 0) + 1
+        return model_name
+
+    def histogram(self, model_name: str) -> LatencyHistogram:
+        """Latency histogram for a model, created on first use."""
+        histogram = self._histograms.get(model_name)
+        if histogram is None:
+            histogram = LatencyHistogram(settings.GEMINI_LATENCY_WINDOW)
+            self._histograms[model_name] = histogram
+        return histogram
+
+    def record(self, model_name: str, latency_ms: float) -> None:
+        """Record the latency of a call; a lower bound if it failed or was cancelled."""
+        self.histogram(model_name).record(latency_ms)
+
+    def hedge_plan(self, model_name: str) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Decide whether a call to `model_name` may be hedged.
+
+        Hedging is skipped until the model has enough latency samples, and
+        once hedges exceed GEMINI_HEDGE_MAX_RATIO of calls.
+
+        Returns:
+            (hedge model, delay in seconds) or (None, None)
+        """
+        self.calls += 1
+        if not self.hedge_enabled:
+            return None, None
+        if self.hedges >= self.calls * settings.GEMINI_HEDGE_MAX_RATIO:
+            return None, None
+
+        histogram = self.histogram(model_name)
+        if histogram.samples < settings.GEMINI_HEDGE_MIN_SAMPLES:
+            return None, None
+        delay_ms = histogram.percentile(settings.GEMINI_HEDGE_PERCENTILE)
+        return settings.GEMINI_HEDGE_MODEL or model_name, delay_ms / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing, hedging and latency counters for monitoring."""
+        return {
+            "routed": dict(self.routed),
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": {
+                model_name: histogram.stats()
+                for model_name, histogram in self._histograms.items()
+            },
+        }
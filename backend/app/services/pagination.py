@@ -0,0 +1,63 @@
+"""
+Opaque cursors for keyset pagination.
+
+Listings page newest-first on (created_at, id); search results page by
+descending (rank, id).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+
+def _encode(position: Dict[str, Any]) -> str:
+    raw = json.dumps(position, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> Dict[str, Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque cursor pointing just after a row in newest-first order."""
+    return _encode({"c": created_at.isoformat(), "i": str(row_id)})
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode a cursor from `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        position = _decode(cursor)
+        return datetime.fromisoformat(position["c"]), UUID(position["i"])
+    except (TypeError, KeyError, UnicodeError, json.JSONDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_rank_cursor(rank: float, row_id: UUID) -> str:
+    """Opaque cursor pointing just after a row in best-match-first order."""
+    # repr round-trips the float exactly, so the next page starts where this one ended
+    return _encode({"r": rank, "i": str(row_id)})
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, UUID]:
+    """
+    Decode a cursor from `encode_rank_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        position = _decode(cursor)
+        return float(position["r"]), UUID(position["i"])
+    except (TypeError, KeyError, UnicodeError, json.JSONDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
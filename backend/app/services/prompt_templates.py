@@ -0,0 +1,469 @@
+"""
+Versioned prompt templates for Gemini calls.
+
+- v1: the original prompts, each inlining an example JSON document; the JSON
+  is recovered from free-form text by brace scanning.
+- v2: compact prompts plus a shared system instruction, with the JSON shape
+  enforced through the model's structured output mode (response schema).
+
+Templates are selected per request with `prompt_version`; the default comes
+from GEMINI_PROMPT_VERSION.
+"""
+import json
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+ACTIVITY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "time": _STRING,
+        "title": _STRING,
+        "description": _STRING,
+        "duration": _STRING,
+        "cost": _STRING,
+        "location": _STRING,
+    },
+    "required": ["time", "title", "location"],
+}
+
+DAY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "day": {"type": "integer"},
+        "date": _STRING,
+        "activities": {"type": "array", "items": ACTIVITY_SCHEMA},
+        "meals": {
+            "type": "object",
+            "properties": {"breakfast": _STRING, "lunch": _STRING, "dinner": _STRING},
+        },
+        "tips": _STRING,
+    },
+    "required": ["day", "activities"],
+}
+
+ITINERARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "days": {"type": "array", "items": DAY_SCHEMA},
+        "overview": _STRING,
+        "total_estimated_cost": _STRING,
+        "packing_suggestions": _STRING_LIST,
+        "local_tips": _STRING_LIST,
+    },
+    "required": ["days", "overview"],
+}
+
+OUTLINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overview": _STRING,
+        "day_highlights": _STRING_LIST,
+        "total_estimated_cost": _STRING,
+        "packing_suggestions": _STRING_LIST,
+        "local_tips": _STRING_LIST,
+    },
+    "required": ["overview", "day_highlights"],
+}
+
+CHUNK_SCHEMA = {
+    "type": "object",
+    "properties": {"days": {"type": "array", "items": DAY_SCHEMA}},
+    "required": ["days"],
+}
+
+RECOMMENDATIONS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "destination": _STRING,
+            "country": _STRING,
+            "reasons": _STRING_LIST,
+            "best_time": _STRING,
+            "daily_budget": _STRING,
+            "attractions": _STRING_LIST,
+        },
+        "required": ["destination", "country"],
+    },
+}
+
+
+def summarize_day(day: Dict[str, Any]) -> str:
+    """One-line summary of a day: its activity titles and locations."""
+    stops = []
+    for activity in day.get("activities") or []:
+        if isinstance(activity, dict):
+            title = activity.get("title") or ""
+            location = activity.get("location")
+            stops.append(f"{title} ({location})" if location else title)
+    return "; ".join(stop for stop in stops if stop) or "no activities"
+
+
+class PromptTemplate(ABC):
+    """A versioned set of prompts, one per kind of Gemini call."""
+
+    version = ""
+    system_instruction: Optional[str] = None
+
+    def generation_config(self, kind: str) -> Optional[Dict[str, Any]]:
+        """Generation config for a call kind, or None for model defaults."""
+        return None
+
+    @abstractmethod
+    def itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        preferences: Optional[Dict[str, Any]] = None,
+        budget: Optional[str] = None
+    ) -> str:
+        """Prompt for a full itinerary in one call."""
+
+    @abstractmethod
+    def outline(
+        self,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        total_days: int,
+        preferences: Optional[Dict[str, Any]] = None,
+        budget: Optional[str] = None
+    ) -> str:
+        """Prompt for the trip outline used by chunked generation."""
+
+    @abstractmethod
+    def chunk(
+        self,
+        destination: str,
+        chunk: List[date],
+        first_day: int,
+        total_days: int,
+        highlights: List[Any],
+        preferences: Optional[Dict[str, Any]] = None,
+        budget: Optional[str] = None
+    ) -> str:
+        """Prompt for one run of consecutive days of a long trip."""
+
+    @abstractmethod
+    def day(
+        self,
+        destination: str,
+        day: Dict[str, Any],
+        previous_day: Optional[Dict[str, Any]] = None,
+        next_day: Optional[Dict[str, Any]] = None,
+        preferences: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Prompt for re-planning a single day."""
+
+    @abstractmethod
+    def recommendations(
+        self,
+        preferences: Dict[str, Any],
+        budget: Optional[str] = None
+    ) -> str:
+        """Prompt for destination recommendations."""
+
+
+class LegacyPromptTemplate(PromptTemplate):
+    """v1: verbose prompts with inline example JSON."""
+
+    version = "v1"
+
+    def itinerary(self, destination, start_date, end_date, preferences=None, budget=None):
+        prompt = f"""Generate a detailed travel itinerary for a trip to {destination}
+from {start_date} to {end_date}.
+
+"""
+
+        if budget:
+            prompt += f"Budget level: {budget}\n"
+
+        if preferences:
+            prompt += f"Preferences: {preferences}\n"
+
+        prompt += """
+Please provide:
+1. A day-by-day itinerary with suggested activities
+2. Recommended times for each activity
+3. Estimated costs for activities
+4. Transportation recommendations between locations
+5. Dining suggestions for each day
+6. Local tips and cultural insights
+
+Format the response as JSON with the following structure:
+{
+    "days": [
+        {
+            "day": 1,
+            "date": "YYYY-MM-DD",
+            "activities": [
+                {
+                    "time": "HH:MM",
+                    "title": "Activity name",
+                    "description": "Description",
+                    "duration": "Duration in hours",
+                    "cost": "Estimated cost",
+                    "location": "Location"
+                }
+            ],
+            "meals": {
+                "breakfast": "Suggestion",
+                "lunch": "Suggestion",
+                "dinner": "Suggestion"
+            },
+            "tips": "Daily tips"
+        }
+    ],
+    "overview": "Trip overview",
+    "total_estimated_cost": "Total estimated cost",
+    "packing_suggestions": ["item1", "item2"],
+    "local_tips": ["tip1", "tip2"]
+}
+"""
+
+        return prompt
+
+    def outline(self, destination, start_date, end_date, total_days, preferences=None, budget=None):
+        prompt = f"""Outline a {total_days}-day trip to {destination} from {start_date} to {end_date}.
+
+"""
+
+        if budget:
+            prompt += f"Budget level: {budget}\n"
+
+        if preferences:
+            prompt += f"Preferences: {preferences}\n"
+
+        prompt += f"""
+Do not plan individual activities. Give exactly {total_days} day highlights, one short
+line per day naming the main area or sights, with no sight repeated across days.
+
+Format the response as JSON with the following structure:
+{{
+    "overview": "Trip overview",
+    "day_highlights": ["Day 1 highlight", "Day 2 highlight"],
+    "total_estimated_cost": "Total estimated cost",
+    "packing_suggestions": ["item1", "item2"],
+    "local_tips": ["tip1", "tip2"]
+}}
+"""
+
+        return prompt
+
+    def chunk(self, destination, chunk, first_day, total_days, highlights, preferences=None, budget=None):
+        last_day = first_day + len(chunk) - 1
+        prompt = f"""Plan days {first_day} to {last_day} ({chunk[0]} to {chunk[-1]}) of a {total_days}-day
+trip to {destination}. Other days are planned separately.
+
+"""
+
+        if budget:
+            prompt += f"Budget level: {budget}\n"
+
+        if preferences:
+            prompt += f"Preferences: {preferences}\n"
+
+        if highlights:
+            prompt += "\nTrip outline (follow it for your days, do not repeat other days' sights):\n"
+            for number, highlight in enumerate(highlights, start=1):
+                prompt += f"Day {number}: {highlight}\n"
+
+        prompt += f"""
+Include times, estimated costs, locations, transport between stops and meals.
+
+Format the response as JSON with exactly {len(chunk)} days:
+{{
+    "days": [
+        {{
+            "day": {first_day},
+            "date": "{chunk[0]}",
+            "activities": [
+                {{
+                    "time": "HH:MM",
+                    "title": "Activity name",
+                    "description": "Description",
+                    "duration": "Duration in hours",
+                    "cost": "Estimated cost",
+                    "location": "Location"
+                }}
+            ],
+            "meals": {{
+                "breakfast": "Suggestion",
+                "lunch": "Suggestion",
+                "dinner": "Suggestion"
+            }},
+            "tips": "Daily tips"
+        }}
+    ]
+}}
+"""
+
+        return prompt
+
+    def day(self, destination, day, previous_day=None, next_day=None, preferences=None):
+        prompt = f"""Re-plan day {day.get("day")} ({day.get("date")}) of a trip to {destination}.
+Replace the current plan with different activities.
+
+Current plan: {summarize_day(day)}
+"""
+
+        if previous_day:
+            prompt += f"Previous day (do not repeat): {summarize_day(previous_day)}\n"
+
+        if next_day:
+            prompt += f"Next day (do not repeat): {summarize_day(next_day)}\n"
+
+        if preferences:
+            prompt += f"Preferences: {preferences}\n"
+
+        prompt += """
+Format the response as JSON with the following structure:
+{
+    "activities": [
+        {
+            "time": "HH:MM",
+            "title": "Activity name",
+            "description": "Description",
+            "duration": "Duration in hours",
+            "cost": "Estimated cost",
+            "location": "Location"
+        }
+    ],
+    "meals": {
+        "breakfast": "Suggestion",
+        "lunch": "Suggestion",
+        "dinner": "Suggestion"
+    },
+    "tips": "Daily tips"
+}
+"""
+
+        return prompt
+
+    def recommendations(self, preferences, budget=None):
+        prompt = f"""Based on the following preferences, recommend 5 travel destinations:
+
+Preferences: {preferences}
+"""
+
+        if budget:
+            prompt += f"Budget: {budget}\n"
+
+        prompt += """
+For each destination, provide:
+1. Destination name and country
+2. Why it matches the preferences
+3. Best time to visit
+4. Estimated daily budget
+5. Top 3 must-see attractions
+
+Format as JSON array of destinations.
+"""
+
+        return prompt
+
+
+class StructuredPromptTemplate(PromptTemplate):
+    """v2: compact prompts; output shape comes from the response schema."""
+
+    version = "v2"
+    system_instruction = (
+        "You are a travel planner. Answer only with JSON matching the response schema. "
+        "Use real place names, 24h HH:MM times and cost estimates in local currency. "
+        "Keep descriptions and tips under 25 words."
+    )
+
+    _schemas = {
+        "itinerary": ITINERARY_SCHEMA,
+        "outline": OUTLINE_SCHEMA,
+        "chunk": CHUNK_SCHEMA,
+        "day": DAY_SCHEMA,
+        "recommendations": RECOMMENDATIONS_SCHEMA,
+    }
+
+    def generation_config(self, kind):
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": self._schemas[kind],
+        }
+
+    @staticmethod
+    def _context(preferences: Optional[Dict[str, Any]], budget: Optional[str]) -> str:
+        """Budget and preference lines, serialized compactly."""
+        lines = ""
+        if budget:
+            lines += f"Budget: {budget}\n"
+        if preferences:
+            lines += f"Preferences: {json.dumps(preferences, separators=(',', ':'), default=str)}\n"
+        return lines
+
+    def itinerary(self, destination, start_date, end_date, preferences=None, budget=None):
+        return (
+            f"Trip to {destination}, {start_date} to {end_date}.\n"
+            + self._context(preferences, budget)
+            + "Plan every day (timed activities with duration, cost, location and transport; "
+            "meals; a tip), plus overview, total cost, packing list and local tips."
+        )
+
+    def outline(self, destination, start_date, end_date, total_days, preferences=None, budget=None):
+        return (
+            f"Outline a {total_days}-day trip to {destination}, {start_date} to {end_date}.\n"
+            + self._context(preferences, budget)
+            + f"Give exactly {total_days} day_highlights (main area or sights, none repeated), "
+            "plus overview, total cost, packing list and local tips."
+        )
+
+    def chunk(self, destination, chunk, first_day, total_days, highlights, preferences=None, budget=None):
+        last_day = first_day + len(chunk) - 1
+        prompt = (
+            f"Plan days {first_day}-{last_day} ({chunk[0]} to {chunk[-1]}) of a {total_days}-day "
+            f"trip to {destination}; other days are planned separately.\n"
+            + self._context(preferences, budget)
+        )
+        if highlights:
+            prompt += "Outline: " + " | ".join(
+                f"{number}: {highlight}" for number, highlight in enumerate(highlights, start=1)
+            ) + "\n"
+        return prompt + (
+            f"Return exactly {len(chunk)} days with timed activities, meals and a tip; "
+            "do not repeat sights from other days."
+        )
+
+    def day(self, destination, day, previous_day=None, next_day=None, preferences=None):
+        prompt = (
+            f"Re-plan day {day.get('day')} ({day.get('date')}) of a trip to {destination} "
+            f"with different activities. Current: {summarize_day(day)}\n"
+        )
+        if previous_day:
+            prompt += f"Previous day (avoid): {summarize_day(previous_day)}\n"
+        if next_day:
+            prompt += f"Next day (avoid): {summarize_day(next_day)}\n"
+        return prompt + self._context(preferences, None)
+
+    def recommendations(self, preferences, budget=None):
+        return (
+            "Recommend 5 travel destinations with reasons, best time to visit, "
+            "daily budget and top 3 attractions.\n"
+            + self._context(preferences, budget)
+        )
+
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    template.version: template
+    for template in (LegacyPromptTemplate(), StructuredPromptTemplate())
+}
+
+
+def get_prompt_template(version: Optional[str] = None) -> PromptTemplate:
+    """Look up a template by version, falling back to the configured default."""
+    template = PROMPT_TEMPLATES.get(version or settings.GEMINI_PROMPT_VERSION)
+    if template is None:
+        raise ValueError(f"Unknown prompt version: {version}")
+    return template
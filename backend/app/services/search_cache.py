@@ -0,0 +1,231 @@
+"""
+TTL cache for flight, hotel and experience search results.
+
+Entries are keyed on the normalised search parameters and stay fresh for a
+per-vertical TTL. After that they are served stale for a further window
+while a background refresh runs (stale-while-revalidate). Storage is
+pluggable: an in-process LRU, or any server speaking the Redis protocol so
+that every API worker shares one cache.
+"""
+import asyncio
+import copy
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.ai_cache import LRUTTLCache, digest, normalize_request
+from app.services.single_flight import SingleFlight
+
+
+def search_cache_key(search_type: str, params: Dict[str, Any]) -> str:
+    """Build the canonical cache key for a search."""
+    return digest(f"search:{search_type}", normalize_request(params))
+
+
+class MemorySearchCacheBackend:
+    """In-process LRU backend."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize the LRU."""
+        self._entries = LRUTTLCache(
+            max_entries or settings.SEARCH_CACHE_MAX_ENTRIES,
+            ttl_seconds=0
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch a private copy of an entry."""
+        return copy.deepcopy(self._entries.get(key))
+
+    async def set(self, key: str, entry: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store an entry until `ttl_seconds` from now."""
+        self._entries.set(key, entry, ttl_seconds)
+
+
+class RedisSearchCacheBackend:
+    """
+    Backend for a Redis-protocol server.
+
+    Any client exposing async `get(key)` and `set(key, value, ex=seconds)`
+    can be passed in, e.g. an in-memory stand-in for local runs.
+    """
+
+    def __init__(self, client: Any = None, url: Optional[str] = None):
+        """Use `client`, or connect to `url` (defaults to SEARCH_CACHE_REDIS_URL)."""
+        if client is None:
+            from redis import asyncio as redis_asyncio
+            client = redis_asyncio.from_url(url or settings.SEARCH_CACHE_REDIS_URL)
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch and decode an entry."""
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, entry: Dict[str, Any], ttl_seconds: float) -> None:
+        """Encode and store an entry with an expiry."""
+        await self.client.set(key, json.dumps(entry), ex=max(1, int(ttl_seconds)))
+
+    async def close(self) -> None:
+        """Close the client connection pool."""
+        close = getattr(self.client, "aclose", None) or getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+
+class SearchCache:
+    """Stale-while-revalidate cache in front of the search providers."""
+
+    def __init__(self, backend: Any):
+        """
+        Args:
+            backend: MemorySearchCacheBackend, RedisSearchCacheBackend or compatible
+        """
+        self.backend = backend
+        self.single_flight = SingleFlight()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, search_type: str, counter: str) -> None:
+        counters = self._counters.setdefault(
+            search_type,
+            {"hits": 0, "stale_hits": 0, "misses": 0, "revalidations": 0, "errors": 0}
+        )
+        counters[counter] += 1
+
+    @staticmethod
+    def _ttls(search_type: str) -> Tuple[float, float]:
+        """(fresh TTL, stale window) for a vertical."""
+        return (
+            settings.SEARCH_CACHE_TTL_SECONDS.get(search_type, 0),
+            settings.SEARCH_CACHE_STALE_SECONDS.get(search_type, 0),
+        )
+
+    async def _read(self, search_type: str, key: str) -> Optional[Dict[str, Any]]:
+        """Backend read that degrades to a miss on failure."""
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            self._count(search_type, "errors")
+            print("Error reading search cache: backend unavailable")
+            return None
+
+    async def _store(self, search_type: str, key: str, results: Dict[str, Any]) -> None:
+        """Store complete results; partial ones are not worth keeping."""
+        fresh, stale = self._ttls(search_type)
+        if results.get("partial") or fresh <= 0:
+            return
+        try:
+            await self.backend.set(key, {"stored_at": time.time(), "results": results}, fresh + stale)
+        except Exception:
+            self._count(search_type, "errors")
+            print("Error writing search cache: backend unavailable")
+
+    async def get_or_search(
+        self,
+        search_type: str,
+        params: Dict[str, Any],
+        search: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Serve a search from cache, or run it.
+
+        Args:
+            search_type: flight, hotel or experience
+            params: Search parameters
+            search: Zero-argument coroutine function querying the providers
+
+        Returns:
+            Search results with `cache` set to "hit", "stale" or "miss"
+        """
+        key = search_cache_key(search_type, params)
+        fresh, _ = self._ttls(search_type)
+        entry = await self._read(search_type, key)
+
+        if entry is not None:
+            age = time.time() - entry["stored_at"]
+            results = entry["results"]
+            if age < fresh:
+                self._count(search_type, "hits")
+                return {
+                    **results,
+                    "search_params": params,
+                    "cache": "hit",
+                    "cache_age_seconds": round(age, 1),
+                }
+
+            self._count(search_type, "stale_hits")
+            self._revalidate(search_type, key, search)
+            return {
+                **results,
+                "search_params": params,
+                "cache": "stale",
+                "cache_age_seconds": round(age, 1),
+            }
+
+        self._count(search_type, "misses")
+
+        async def fetch() -> Dict[str, Any]:
+            results = await search()
+            await self._store(search_type, key, results)
+            return results
+
+        # Concurrent misses for the same search share one provider fan-out
+        results = await self.single_flight.do(key, fetch)
+        return {**results, "cache": "miss"}
+
+    def _revalidate(
+        self,
+        search_type: str,
+        key: str,
+        search: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> None:
+        """Refresh an entry in the background, once per key at a time."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self._count(search_type, "revalidations")
+
+        async def refresh() -> None:
+            try:
+                await self._store(search_type, key, await search())
+            except Exception:
+                print("Error refreshing search cache: search failed")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Cancel pending refreshes and release the backend."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            await close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and hit ratio per vertical."""
+        stats = {}
+        for search_type, counters in self._counters.items():
+            lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+            stats[search_type] = {
+                **counters,
+                "hit_ratio": round((counters["hits"] + counters["stale_hits"]) / lookups, 4) if lookups else 0.0,
+            }
+        return stats
+
+
+def build_search_cache() -> Optional[SearchCache]:
+    """Search cache configured by SEARCH_CACHE_BACKEND, or None when disabled."""
+    if settings.SEARCH_CACHE_BACKEND == "memory":
+        return SearchCache(MemorySearchCacheBackend())
+    if settings.SEARCH_CACHE_BACKEND == "redis":
+        return SearchCache(RedisSearchCacheBackend())
+    if settings.SEARCH_CACHE_BACKEND in ("", "none"):
+        return None
+    raise ValueError(f"Unknown search cache backend: {settings.SEARCH_CACHE_BACKEND}")
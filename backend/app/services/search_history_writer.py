@@ -0,0 +1,172 @@
+"""
+Write-behind persistence of search history.
+
+Search endpoints enqueue history rows and return immediately; a background
+task bulk-inserts them every SEARCH_HISTORY_BATCH_SIZE rows or
+SEARCH_HISTORY_FLUSH_INTERVAL_MS, whichever comes first.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.search_result_store import insert_search_history
+
+
+class SearchHistoryWriter:
+    """
+    Bounded in-process queue of search history rows with a batch flusher.
+
+    When the queue is full, the "block" policy waits up to
+    SEARCH_HISTORY_ENQUEUE_TIMEOUT_MS for space and the "drop" policy gives
+    up immediately; either way a row that cannot be queued is dropped and
+    counted rather than slowing the search down further.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        policy: Optional[str] = None
+    ):
+        """Initialize queue and counters."""
+        self.batch_size = batch_size or settings.SEARCH_HISTORY_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.SEARCH_HISTORY_FLUSH_INTERVAL_MS) / 1000
+        self.policy = policy or settings.SEARCH_HISTORY_QUEUE_POLICY
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=max_queue or settings.SEARCH_HISTORY_QUEUE_SIZE
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Launch the flusher task."""
+        self._stopping = False
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="search-history-writer")
+
+    async def stop(self) -> None:
+        """Stop accepting rows and wait until everything queued is written."""
+        self._stopping = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def record(
+        self,
+        user_id: UUID,
+        search_type: str,
+        search_params: Dict[str, Any],
+        results: Optional[Dict[str, Any]]
+    ) -> bool:
+        """
+        Queue a search history row.
+
+        Args:
+            user_id: User who searched
+            search_type: flight, hotel or experience
+            search_params: Search parameters
+            results: Search results
+
+        Returns:
+            True if the row was queued, False if it was dropped
+        """
+        row = {
+            "user_id": user_id,
+            "search_type": search_type,
+            "search_params": search_params,
+            "results": results,
+            # Stamped now, not at flush time, so history keeps search order
+            "created_at": datetime.now(timezone.utc),
+        }
+        if self._stopping:
+            self.dropped += 1
+            return False
+
+        try:
+            if self.policy == "block":
+                await asyncio.wait_for(
+                    self._queue.put(row),
+                    settings.SEARCH_HISTORY_ENQUEUE_TIMEOUT_MS / 1000
+                )
+            else:
+                self._queue.put_nowait(row)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.dropped += 1
+            return False
+        return True
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """Wait for the first row, then gather more until the batch is full or due."""
+        batch: List[Dict[str, Any]] = []
+        loop = asyncio.get_running_loop()
+        try:
+            batch.append(await asyncio.wait_for(self._queue.get(), self.flush_interval))
+        except asyncio.TimeoutError:
+            return batch
+
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._stopping:
+                # Draining: take whatever is already queued without waiting
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch with one blob upsert and one multi-row INSERT."""
+        try:
+            async with AsyncSessionLocal() as db:
+                await insert_search_history(db, batch)
+                await db.commit()
+        except Exception:
+            self.failed += len(batch)
+            print("Error writing search history: database unavailable")
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    async def _run(self) -> None:
+        """Flush batches until stopped and the queue is empty."""
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+_search_history_writer: Optional[SearchHistoryWriter] = None
+
+
+def get_search_history_writer() -> SearchHistoryWriter:
+    """Process-wide search history writer."""
+    global _search_history_writer
+    if _search_history_writer is None:
+        _search_history_writer = SearchHistoryWriter()
+    return _search_history_writer
@@ -0,0 +1,280 @@
+"""
+Search providers for flights, hotels and experiences.
+
+Every supplier integration implements `SearchProvider`: an async `search`
+plus a declared timeout and priority that the aggregator uses for
+deadlines and de-duplication. `MockProvider` serves the placeholder offers
+the API has always returned; `FakeProvider` simulates a remote supplier
+with configurable latency and error rate for local load and failure
+testing.
+"""
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+SEARCH_TYPES = ("flight", "hotel", "experience")
+
+
+class SearchProviderError(Exception):
+    """A provider failed to return results."""
+
+
+class SearchProvider(ABC):
+    """Base class for a supplier of search results."""
+
+    name = "provider"
+    search_type = "flight"
+
+    def __init__(self, timeout: Optional[float] = None, priority: int = 0):
+        """
+        Args:
+            timeout: Seconds the aggregator waits for this provider
+            priority: Higher wins when offers from several providers collide
+        """
+        self.timeout = timeout if timeout is not None else settings.SEARCH_PROVIDER_TIMEOUT_SECONDS
+        self.priority = priority
+
+    @abstractmethod
+    async def search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Run a search.
+
+        Args:
+            params: Search parameters (FlightSearchParams etc. as a dict)
+
+        Returns:
+            List of offers
+        """
+
+
+def _mock_flights(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Placeholder flight offers."""
+    return [
+        {
+            "id": "FL001",
+            "airline": "Example Airlines",
+            "origin": params["origin"],
+            "destination": params["destination"],
+            "departure_time": f"{params['departure_date']}T10:00:00",
+            "arrival_time": f"{params['departure_date']}T14:00:00",
+            "duration": "4h 00m",
+            "price": 299.99,
+            "currency": "USD",
+            "stops": 0,
+            "cabin_class": params.get("cabin_class")
+        },
+        {
+            "id": "FL002",
+            "airline": "Budget Air",
+            "origin": params["origin"],
+            "destination": params["destination"],
+            "departure_time": f"{params['departure_date']}T15:30:00",
+            "arrival_time": f"{params['departure_date']}T19:45:00",
+            "duration": "4h 15m",
+            "price": 199.99,
+            "currency": "USD",
+            "stops": 1,
+            "cabin_class": params.get("cabin_class")
+        }
+    ]
+
+
+def _mock_hotels(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Placeholder hotel offers."""
+    return [
+        {
+            "id": "HT001",
+            "name": "Grand Plaza Hotel",
+            "destination": params["destination"],
+            "rating": 4.5,
+            "stars": 5,
+            "price_per_night": 150.00,
+            "currency": "USD",
+            "amenities": ["WiFi", "Pool", "Gym", "Restaurant"],
+            "image_url": "https://example.com/hotel1.jpg",
+            "check_in": params["check_in"],
+            "check_out": params["check_out"]
+        },
+        {
+            "id": "HT002",
+            "name": "Comfort Inn Downtown",
+            "destination": params["destination"],
+            "rating": 4.0,
+            "stars": 3,
+            "price_per_night": 89.99,
+            "currency": "USD",
+            "amenities": ["WiFi", "Breakfast", "Parking"],
+            "image_url": "https://example.com/hotel2.jpg",
+            "check_in": params["check_in"],
+            "check_out": params["check_out"]
+        }
+    ]
+
+
+def _mock_experiences(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Placeholder experience offers."""
+    return [
+        {
+            "id": "EXP001",
+            "title": "City Walking Tour",
+            "destination": params["destination"],
+            "category": params.get("category") or "tours",
+            "rating": 4.8,
+            "reviews_count": 1250,
+            "price": 45.00,
+            "currency": "USD",
+            "duration": "3 hours",
+            "description": "Explore the historic downtown area with a local guide",
+            "image_url": "https://example.com/exp1.jpg"
+        },
+        {
+            "id": "EXP002",
+            "title": "Food Tasting Tour",
+            "destination": params["destination"],
+            "category": "food",
+            "rating": 4.9,
+            "reviews_count": 890,
+            "price": 75.00,
+            "currency": "USD",
+            "duration": "4 hours",
+            "description": "Sample local cuisine at 5 authentic restaurants",
+            "image_url": "https://example.com/exp2.jpg"
+        },
+        {
+            "id": "EXP003",
+            "title": "Museum Day Pass",
+            "destination": params["destination"],
+            "category": "culture",
+            "rating": 4.6,
+            "reviews_count": 2100,
+            "price": 35.00,
+            "currency": "USD",
+            "duration": "Full day",
+            "description": "Access to 10+ museums and cultural sites",
+            "image_url": "https://example.com/exp3.jpg"
+        }
+    ]
+
+
+_MOCK_RESULTS: Dict[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = {
+    "flight": _mock_flights,
+    "hotel": _mock_hotels,
+    "experience": _mock_experiences,
+}
+
+
+class MockProvider(SearchProvider):
+    """
+    Placeholder provider.
+
+    In production, replace with integrations such as Amadeus or Skyscanner
+    (flights), Booking.com or Expedia (hotels) and Viator or GetYourGuide
+    (experiences).
+    """
+
+    name = "mock"
+
+    def __init__(self, search_type: str, timeout: Optional[float] = None, priority: int = 0):
+        super().__init__(timeout, priority)
+        self.search_type = search_type
+
+    async def search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return _MOCK_RESULTS[self.search_type](params)
+
+
+class FakeProvider(SearchProvider):
+    """
+    Simulated remote supplier.
+
+    Sleeps for `latency` seconds (plus up to `jitter`), fails with
+    probability `error_rate`, and otherwise returns `offers` or, if none
+    are given, `count` generated offers whose ids are prefixed with the
+    provider name.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        search_type: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        offers: Optional[List[Dict[str, Any]]] = None,
+        count: int = 3,
+        timeout: Optional[float] = None,
+        priority: int = 0,
+        seed: Optional[int] = None
+    ):
+        super().__init__(timeout, priority)
+        self.name = name
+        self.search_type = search_type
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.offers = offers
+        self.count = count
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if self._random.random() < self.error_rate:
+            raise SearchProviderError(f"{self.name} failed")
+        if self.offers is not None:
+            return [dict(offer) for offer in self.offers]
+
+        offers = []
+        for index, offer in enumerate(self._generate(params)):
+            offer["id"] = f"{self.name}-{index + 1}"
+            offers.append(offer)
+        return offers
+
+    def _generate(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Synthetic offers shaped like the mock results."""
+        template = _MOCK_RESULTS[self.search_type](params)
+        offers = []
+        for index in range(self.count):
+            offer = dict(template[index % len(template)])
+            price_field = "price_per_night" if self.search_type == "hotel" else "price"
+            offer[price_field] = round(self._random.uniform(30, 600), 2)
+            if index >= len(template):
+                for field in ("airline", "name", "title"):
+                    if field in offer:
+                        offer[field] = f"{offer[field]} {index + 1}"
+            offers.append(offer)
+        return offers
+
+
+def build_providers(search_type: str) -> List[SearchProvider]:
+    """
+    Instantiate the providers listed in SEARCH_PROVIDERS for a search type.
+
+    Recognised names are "mock" and "fake" (a FakeProvider configured by the
+    SEARCH_FAKE_* settings).
+
+    Raises:
+        ValueError: If a name is unknown or listed twice (the aggregator
+            reports provider status by name)
+    """
+    providers: List[SearchProvider] = []
+    for index, name in enumerate(settings.SEARCH_PROVIDERS):
+        if name in settings.SEARCH_PROVIDERS[:index]:
+            raise ValueError(f"Duplicate search provider: {name}")
+        if name == "mock":
+            providers.append(MockProvider(search_type))
+        elif name == "fake":
+            providers.append(FakeProvider(
+                "fake",
+                search_type,
+                latency=settings.SEARCH_FAKE_LATENCY_SECONDS,
+                jitter=settings.SEARCH_FAKE_JITTER_SECONDS,
+                error_rate=settings.SEARCH_FAKE_ERROR_RATE,
+                priority=-1
+            ))
+        else:
+            raise ValueError(f"Unknown search provider: {name}")
+    return providers
@@ -0,0 +1,225 @@
+"""
+Content-addressed storage of search results.
+
+Popular searches return identical offer lists, so each distinct list is
+stored once in `search_result_blobs` under the SHA-256 of its canonical
+JSON. `search_history` rows keep only the hash and the offer count, and
+blobs are loaded only when a caller asks for results. Blob reference
+counts are raised here when rows are written and lowered by a trigger
+when rows are deleted; `cleanup_orphaned_search_blobs()`, run every
+SEARCH_BLOB_CLEANUP_INTERVAL_SECONDS by the maintenance scheduler, removes
+blobs nobody references any more.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.core.conditional import make_etag
+from app.models.itinerary import SearchHistory, SearchResultBlob
+from app.schemas.itinerary import SearchHistory as SearchHistorySchema
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search_service import RESULT_KEYS
+
+
+def split_results(
+    search_type: str,
+    results: Optional[Dict[str, Any]]
+) -> Tuple[Optional[str], Optional[List[Any]], int, int]:
+    """
+    Extract the offer list from a search response and hash it.
+
+    Per-request fields (provider timings, cache status, echoed params) are
+    left out so identical offers always hash the same.
+
+    Returns:
+        (hash, offers, offer count, canonical size in bytes); hash and
+        offers are None when there are no results
+    """
+    offers = (results or {}).get(RESULT_KEYS.get(search_type, ""))
+    if offers is None:
+        return None, None, 0, 0
+    canonical = json.dumps(offers, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest(), offers, len(offers), len(canonical)
+
+
+async def insert_search_history(db: AsyncSession, rows: Sequence[Dict[str, Any]]) -> None:
+    """
+    Insert search history rows, storing each distinct offer list once.
+
+    Args:
+        db: Session; the caller commits
+        rows: Dicts with user_id, search_type, search_params, results and
+            optionally created_at (when the search ran; defaults to now)
+    """
+    blobs: Dict[str, Dict[str, Any]] = {}
+    history = []
+    for row in rows:
+        digest, offers, count, size = split_results(row["search_type"], row.get("results"))
+        if digest is not None:
+            blob = blobs.setdefault(
+                digest, {"hash": digest, "results": offers, "size_bytes": size, "ref_count": 0}
+            )
+            blob["ref_count"] += 1
+        history.append({
+            "user_id": row["user_id"],
+            "search_type": row["search_type"],
+            "search_params": row["search_params"],
+            "results_hash": digest,
+            "result_count": count,
+            "created_at": row.get("created_at") or datetime.now(timezone.utc),
+        })
+
+    if blobs:
+        # Sorted so concurrent writers lock shared blobs in the same order
+        stmt = pg_insert(SearchResultBlob).values(
+            [blobs[digest] for digest in sorted(blobs)]
+        )
+        # DO UPDATE locks existing blobs, so the orphan sweep cannot delete
+        # one between this upsert and the history insert
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchResultBlob.hash],
+            set_={
+                "ref_count": SearchResultBlob.ref_count + stmt.excluded.ref_count,
+                "last_seen_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
+    await db.execute(insert(SearchHistory), history)
+
+
+async def history_with_results(
+    db: AsyncSession,
+    rows: Sequence[SearchHistory],
+    include_results: bool = False
+) -> List[SearchHistorySchema]:
+    """
+    Convert history rows to response schemas, loading blobs only if asked.
+
+    Args:
+        db: Database session
+        rows: SearchHistory rows (`results` may be deferred unless
+            include_results is set)
+        include_results: Attach each row's offers (one query for all blobs)
+
+    Returns:
+        Search history entries; `results` is None unless include_results
+    """
+    blobs: Dict[str, Any] = {}
+    if include_results:
+        hashes = {row.results_hash for row in rows if row.results_hash}
+        if hashes:
+            result = await db.execute(
+                select(SearchResultBlob.hash, SearchResultBlob.results)
+                .where(SearchResultBlob.hash.in_(hashes))
+            )
+            blobs = dict(result.all())
+
+    entries = []
+    for row in rows:
+        results = None
+        if include_results:
+            if row.results_hash:
+                offers = blobs.get(row.results_hash)
+                if offers is not None:
+                    results = {RESULT_KEYS[row.search_type]: offers}
+            else:
+                # Rows written before results moved to blobs
+                results = row.results
+        entries.append(SearchHistorySchema(
+            id=row.id,
+            user_id=row.user_id,
+            search_type=row.search_type,
+            search_params=row.search_params,
+            results=results,
+            results_hash=row.results_hash,
+            result_count=row.result_count or 0,
+            created_at=row.created_at
+        ))
+    return entries
+
+
+async def list_search_history(
+    db: AsyncSession,
+    user_id: UUID,
+    search_type: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    include_results: bool = False
+) -> Tuple[List[SearchHistorySchema], Optional[str]]:
+    """
+    Page through a user's search history, newest first.
+
+    Uses keyset pagination on (created_at, id), which the
+    (user_id[, search_type], created_at DESC, id DESC) indexes serve
+    directly, so every page costs the same however deep it is.
+
+    Args:
+        db: Database session
+        user_id: Owner of the history
+        search_type: Only this type (flight, hotel, experience), if given
+        limit: Page size
+        cursor: `next_cursor` from the previous page
+        include_results: Load each entry's offers
+
+    Returns:
+        (entries, cursor for the next page or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    query = select(SearchHistory).where(SearchHistory.user_id == user_id)
+    if search_type is not None:
+        query = query.where(SearchHistory.search_type == search_type)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(SearchHistory.created_at, SearchHistory.id) < tuple_(created_at, row_id)
+        )
+    query = query.order_by(
+        SearchHistory.created_at.desc(), SearchHistory.id.desc()
+    ).limit(limit + 1)
+    if not include_results:
+        query = query.options(defer(SearchHistory.results))
+
+    result = await db.execute(query)
+    rows = result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id)
+    entries = await history_with_results(db, rows[:limit], include_results)
+    return entries, next_cursor
+
+
+async def search_history_etag(
+    db: AsyncSession,
+    user_id: UUID,
+    search_type: Optional[str] = None,
+    *params: Any
+) -> str:
+    """
+    ETag for a page of a user's search history.
+
+    History rows are never updated, so the row count and the newest
+    `created_at` change whenever the history does.
+
+    Args:
+        db: Database session
+        user_id: Owner of the history
+        search_type: Only this type, if given
+        params: Query parameters that select the page
+    """
+    query = select(
+        func.count(SearchHistory.id), func.max(SearchHistory.created_at)
+    ).where(SearchHistory.user_id == user_id)
+    if search_type is not None:
+        query = query.where(SearchHistory.search_type == search_type)
+    result = await db.execute(query)
+    count, latest = result.one()
+    return make_etag("search_history", user_id, search_type, count, latest, *params)
@@ -0,0 +1,154 @@
+"""
+Concurrent search across all configured providers.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.search_cache import SearchCache, build_search_cache
+from app.services.search_providers import SEARCH_TYPES, SearchProvider, build_providers
+
+RESULT_KEYS = {
+    "flight": "flights",
+    "hotel": "hotels",
+    "experience": "experiences",
+}
+
+# Offers from different providers describing the same thing share these fields
+DEDUPE_FIELDS = {
+    "flight": ("airline", "origin", "destination", "departure_time", "arrival_time"),
+    "hotel": ("name", "destination"),
+    "experience": ("title", "destination"),
+}
+
+
+def _dedupe_key(search_type: str, offer: Dict[str, Any]) -> Tuple:
+    """Normalised identity of an offer."""
+    return tuple(
+        " ".join(str(offer.get(field) or "").lower().split())
+        for field in DEDUPE_FIELDS[search_type]
+    )
+
+
+class SearchAggregator:
+    """
+    Fan a search out to every provider and merge the answers.
+
+    Providers run concurrently and each is cut off at its own timeout
+    (capped by SEARCH_DEADLINE_SECONDS), so a search takes as long as the
+    slowest provider that answers in time rather than the sum of all of
+    them. Late or failing providers are reported and skipped; the search
+    still returns what the others found.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[Dict[str, List[SearchProvider]]] = None,
+        cache: Optional[SearchCache] = None
+    ):
+        """
+        Args:
+            providers: Providers per search type (defaults to SEARCH_PROVIDERS)
+            cache: Result cache consulted before the providers, if any
+        """
+        if providers is None:
+            providers = {search_type: build_providers(search_type) for search_type in SEARCH_TYPES}
+        self.providers = providers
+        self.cache = cache
+
+    async def _query(
+        self,
+        provider: SearchProvider,
+        params: Dict[str, Any],
+        deadline: float
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Run one provider under its deadline; never raises."""
+        started = time.perf_counter()
+        try:
+            offers = await asyncio.wait_for(provider.search(params), min(provider.timeout, deadline))
+            status = "ok"
+        except asyncio.TimeoutError:
+            offers, status = [], "timeout"
+        except Exception:
+            # Log generic error without exposing provider details
+            print(f"Error searching provider {provider.name}: request failed")
+            offers, status = [], "error"
+        return offers, {
+            "status": status,
+            "count": len(offers),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def search(self, search_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Search every provider for `search_type`, through the cache if enabled.
+
+        Args:
+            search_type: flight, hotel or experience
+            params: Search parameters
+
+        Returns:
+            Merged offers under the type's result key, when the providers
+            were queried (`searched_at`), per-provider status, whether the
+            results are partial and, with a cache, whether they were served
+            from it
+        """
+        if self.cache is None:
+            return await self._search_providers(search_type, params)
+        return await self.cache.get_or_search(
+            search_type, params, lambda: self._search_providers(search_type, params)
+        )
+
+    async def _search_providers(self, search_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Query every provider concurrently and merge their offers."""
+        providers = self.providers.get(search_type) or []
+        deadline = settings.SEARCH_DEADLINE_SECONDS
+        answers = await asyncio.gather(
+            *(self._query(provider, params, deadline) for provider in providers)
+        )
+
+        # Higher priority providers claim an offer first; ties keep config order
+        ranked = sorted(
+            zip(providers, answers),
+            key=lambda pair: -pair[0].priority
+        )
+        merged = []
+        seen = set()
+        provider_status = {}
+        for provider, (offers, status) in ranked:
+            provider_status[provider.name] = status
+            for offer in offers:
+                key = _dedupe_key(search_type, offer)
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append({**offer, "provider": provider.name})
+
+        return {
+            RESULT_KEYS[search_type]: merged,
+            "search_params": params,
+            "searched_at": time.time(),
+            "providers": provider_status,
+            "partial": any(status["status"] != "ok" for status in provider_status.values()),
+        }
+
+
+_search_aggregator: Optional[SearchAggregator] = None
+
+
+def get_search_aggregator() -> SearchAggregator:
+    """Process-wide search aggregator."""
+    global _search_aggregator
+    if _search_aggregator is None:
+        _search_aggregator = SearchAggregator(cache=build_search_cache())
+    return _search_aggregator
+
+
+async def close_search_aggregator() -> None:
+    """Dispose of the process-wide search aggregator."""
+    global _search_aggregator
+    if _search_aggregator is not None:
+        if _search_aggregator.cache is not None:
+            await _search_aggregator.cache.close()
+        _search_aggregator = None
@@ -0,0 +1,62 @@
+"""
+Single-flight coalescing of concurrent identical async calls.
+"""
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers that arrive while a call for the same key is in flight wait for
+    that call instead of starting their own. The call runs in its own task,
+    so a caller that disconnects or is cancelled does not cancel the work the
+    others are waiting for. Every caller receives its own deep copy of the
+    result.
+    """
+
+    def __init__(self):
+        """Initialize in-flight state and counters."""
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` for `key`, or join the call already in flight.
+
+        Args:
+            key: Canonical request key
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            A private copy of the call's result
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished call and mark its exception as retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
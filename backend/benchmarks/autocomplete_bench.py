@@ -0,0 +1,62 @@
+"""
+Measure destination autocomplete lookup latency.
+
+Builds the index from app/data/destinations.csv into a temporary file,
+times building and opening it, then runs every prefix of a set of typed
+queries `--repeat` times through DestinationIndex.search, the lookup
+behind GET /destinations/autocomplete. No database or settings are
+needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.autocomplete_bench [--repeat 200] [--limit 10]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from app.services.destination_index import DATASET_PATH, DestinationIndex, build_index
+
+TYPED = ["Lisbon", "london heathrow", "new york", "SFO", "São Paulo", "muenchen", "bombay", "ko samui", "zz"]
+
+
+def measure(name: str, run: Callable[[str], object], prefixes: List[str], repeat: int) -> None:
+    latencies = []
+    for _ in range(repeat):
+        for prefix in prefixes:
+            started = time.perf_counter()
+            run(prefix)
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+    latencies.sort()
+    print(
+        f"{name:<10}{len(latencies):>10}{statistics.median(latencies):>10.1f}"
+        f"{latencies[int(len(latencies) * 0.95) - 1]:>10.1f}{latencies[int(len(latencies) * 0.99) - 1]:>10.1f}"
+    )
+
+
+def main(repeat: int, limit: int) -> None:
+    prefixes = [text[:length] for text in TYPED for length in range(1, len(text) + 1)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "destinations.idx"
+        started = time.perf_counter()
+        key_count = build_index(DATASET_PATH, path)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        index = DestinationIndex(path)
+        opened = time.perf_counter() - started
+        print(
+            f"{key_count} keys, {path.stat().st_size / 1024:.0f} KB; "
+            f"built in {built * 1000:.1f} ms, opened in {opened * 1_000_000:.0f} us"
+        )
+        print(f"{'lookup':<10}{'queries':>10}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+        measure("search", lambda q: index.search(q, limit), prefixes, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    main(args.repeat, args.limit)
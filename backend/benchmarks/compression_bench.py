@@ -0,0 +1,83 @@
+"""
+Measure CPU cost against bytes saved for each response compression codec.
+
+Payloads are response bodies: synthetic 1-, 7- and 30-day itineraries
+serialized by app.core.responses, and 50-offer flight and hotel results
+from a FakeProvider. The synthetic itineraries repeat their activities, so
+their ratios are better than real ones. Each codec is run at a fast, the
+configured and its maximum level; codecs whose package is not installed
+are skipped.
+
+Usage (from the backend directory):
+    python -m benchmarks.compression_bench [--iterations 50]
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict, List, Tuple
+
+from fastapi.responses import ORJSONResponse
+
+from app.core.compression import build_codecs
+from app.core.config import settings
+from app.core.responses import itinerary_response
+from app.services.search_providers import FakeProvider
+from app.services.search_service import RESULT_KEYS
+from benchmarks.serialization_bench import synthetic_itinerary
+
+LEVELS = {
+    "gzip": ("gzip_level", (1, settings.COMPRESSION_GZIP_LEVEL, 9)),
+    "br": ("brotli_quality", (1, settings.COMPRESSION_BROTLI_QUALITY, 11)),
+    "zstd": ("zstd_level", (1, settings.COMPRESSION_ZSTD_LEVEL, 19)),
+}
+
+
+def payloads() -> List[Tuple[str, bytes]]:
+    """(name, body) pairs to compress."""
+    bodies = [
+        (f"itinerary {days}d", itinerary_response(synthetic_itinerary(days)).body)
+        for days in (1, 7, 30)
+    ]
+    params = {
+        "flight": {"origin": "MAD", "destination": "LIS", "departure_date": "2024-06-01"},
+        "hotel": {"destination": "Lisbon", "check_in": "2024-06-01", "check_out": "2024-06-07"},
+    }
+    for search_type, search_params in params.items():
+        provider = FakeProvider("bench", search_type, count=50, seed=1)
+        offers = asyncio.run(provider.search(search_params))
+        content = {RESULT_KEYS[search_type]: offers, "search_params": search_params}
+        bodies.append((f"{search_type} search", ORJSONResponse(content).body))
+    return bodies
+
+
+def measure(compress: Callable[[bytes], bytes], body: bytes, iterations: int) -> Tuple[int, float]:
+    """(compressed size, milliseconds per compression)."""
+    compressed = compress(body)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        compress(body)
+    return len(compressed), (time.perf_counter() - started) * 1000 / iterations
+
+
+def main(iterations: int) -> None:
+    print(f"{'payload':<16}{'codec':<10}{'bytes':>9}{'saved':>8}{'ms':>9}{'MB/s':>9}{'KB saved/ms':>13}")
+    for name, body in payloads():
+        print(f"{name:<16}{'identity':<10}{len(body):>9}{'':>8}{'':>9}{'':>9}{'':>13}")
+        for codec, (option, levels) in LEVELS.items():
+            for level in levels:
+                codecs: Dict[str, Callable[[bytes], bytes]] = build_codecs(**{option: level})
+                if codec not in codecs:
+                    continue
+                size, ms = measure(codecs[codec], body, iterations)
+                saved = len(body) - size
+                print(
+                    f"{name:<16}{f'{codec}-{level}':<10}{size:>9}{saved / len(body):>8.0%}"
+                    f"{ms:>9.3f}{len(body) / 1e6 / (ms / 1000):>9.0f}{saved / 1024 / ms:>13.1f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -0,0 +1,152 @@
+"""
+Compare columnar flight ranking with the same work on plain dicts.
+
+Generates `--offers` synthetic flight offers, then runs each scenario
+`--repeat` times through app.services.flight_results and through a
+pure-Python version of the same filters, "best" score, Pareto front and
+page. The NumPy side is timed through page_flights both with the columns
+kept for the search (every request after the first for the same results)
+and building them from scratch (the first request). Results are checked
+to match before anything is timed.
+
+Usage (from the backend directory):
+    python -m benchmarks.flight_ranking_bench [--offers 10000] [--repeat 50]
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from app.core.config import settings
+from app.schemas.itinerary import FlightResultOptions
+from app.services.flight_results import FlightTable, duration_minutes, minute_of_day, page_flights
+
+AIRLINES = ["Example Airlines", "Budget Air", "Sky Connect", "Atlantic Wings", "Nordic Jet", "Sun Charter"]
+
+SCENARIOS = {
+    "best, page 1": FlightResultOptions(sort="best", limit=20),
+    "filtered, by price": FlightResultOptions(
+        max_price=400, max_stops=1, depart_after="06:00", depart_before="14:00",
+        airlines=["Budget Air", "Nordic Jet"], sort="price", limit=20
+    ),
+    "pareto front": FlightResultOptions(pareto=True, sort="price"),
+    "best, page 50": FlightResultOptions(sort="best", offset=980, limit=20),
+}
+
+
+def synthetic_offers(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    offers = []
+    for index in range(count):
+        stops = rnd.choice([0, 0, 1, 1, 1, 2, 3])
+        minutes = rnd.randint(90, 300) + stops * rnd.randint(45, 240)
+        departure = rnd.randint(0, 24 * 12 - 1) * 5
+        offers.append({
+            "id": f"FL{index:05d}",
+            "airline": rnd.choice(AIRLINES),
+            "origin": "JFK",
+            "destination": "LAX",
+            "departure_time": f"2024-06-01T{departure // 60:02d}:{departure % 60:02d}:00",
+            "duration": f"{minutes // 60}h {minutes % 60:02d}m",
+            "price": round(rnd.uniform(80, 900) * (1 - stops * 0.15), 2),
+            "currency": "USD",
+            "stops": stops,
+            "provider": "fake",
+        })
+    return offers
+
+
+def python_query(offers: List[Dict[str, Any]], options: FlightResultOptions) -> List[Dict[str, Any]]:
+    """The same query on dicts, with an O(n log n) Pareto sweep rather than all pairs."""
+    def clock(value: str) -> int:
+        return int(value[:2]) * 60 + int(value[3:])
+
+    airlines = {" ".join(name.casefold().split()) for name in options.airlines or []}
+    rows = []
+    for position, offer in enumerate(offers):
+        price, stops = offer["price"], offer["stops"]
+        departure = minute_of_day(offer["departure_time"])
+        if options.max_price is not None and price > options.max_price:
+            continue
+        if options.max_stops is not None and stops > options.max_stops:
+            continue
+        if options.depart_after and departure < clock(options.depart_after):
+            continue
+        if options.depart_before and departure > clock(options.depart_before):
+            continue
+        if options.airlines is not None and " ".join(offer["airline"].casefold().split()) not in airlines:
+            continue
+        rows.append((position, price, duration_minutes(offer["duration"]), stops))
+
+    if options.pareto:
+        front = set()
+        best_by_stops: Dict[float, float] = {}
+        for position, price, duration, stops in sorted(rows, key=lambda row: (row[1], row[2], row[3])):
+            quickest = min(
+                (best for level, best in best_by_stops.items() if level <= stops), default=float("inf")
+            )
+            # Identical points do not dominate each other
+            if quickest > duration or (price, duration, stops) in front:
+                front.add((price, duration, stops))
+            best_by_stops[stops] = min(best_by_stops.get(stops, float("inf")), duration)
+        rows = [row for row in rows if (row[1], row[2], row[3]) in front]
+
+    if options.sort == "best":
+        weights = settings.FLIGHT_BEST_WEIGHTS
+        ranges = []
+        for column in (1, 2, 3):
+            values = [row[column] for row in rows]
+            ranges.append((min(values), max(values) - min(values) or 1.0))
+        score = lambda row: sum(
+            weights[name] * (row[column] - ranges[column - 1][0]) / ranges[column - 1][1]
+            for column, name in ((1, "price"), (2, "duration"), (3, "stops"))
+        )
+        rows.sort(key=score)
+    elif options.sort == "price":
+        rows.sort(key=lambda row: row[1])
+    end = None if options.limit is None else options.offset + options.limit
+    return [offers[row[0]] for row in rows[options.offset:end]]
+
+
+def timed(run: Callable[[], Any], repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+def main(count: int, repeat: int) -> None:
+    offers = synthetic_offers(count)
+    results = {
+        "flights": offers,
+        "search_params": {"origin": "JFK", "destination": "LAX"},
+        "searched_at": time.time(),
+    }
+    table = FlightTable(offers)
+    build = timed(lambda: FlightTable(offers), repeat)
+    print(f"{count} offers; building the columns takes {build:.2f} ms")
+    print(f"{'scenario':<22}{'rows':>6}{'python ms':>11}{'cached ms':>11}{'speedup':>9}{'uncached ms':>13}{'speedup':>9}")
+    for name, options in SCENARIOS.items():
+        expected = python_query(offers, options)
+        rows, _ = table.query(options)
+        assert [offers[row]["id"] for row in rows] == [offer["id"] for offer in expected], name
+
+        python_ms = timed(lambda: python_query(offers, options), repeat)
+        # page_flights reuses the columns kept for this search after the first call
+        cached_ms = timed(lambda: page_flights(results, options), repeat)
+        uncached_ms = timed(lambda: page_flights({"flights": offers}, options), repeat)
+        print(
+            f"{name:<22}{len(rows):>6}{python_ms:>11.2f}{cached_ms:>11.2f}{python_ms / cached_ms:>8.1f}x"
+            f"{uncached_ms:>13.2f}{python_ms / uncached_ms:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--offers", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.offers, args.repeat)
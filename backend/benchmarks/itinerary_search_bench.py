@@ -0,0 +1,134 @@
+"""
+Measure GET /itineraries/search latency over a large set of itineraries.
+
+Needs the Postgres database from DATABASE_URL with the schema from
+migrations/db_init.sql (including pg_trgm and the search_vector trigger).
+`--itineraries` generated itineraries over a few dozen destinations and
+activity names are spread across `--users` throwaway users; each query
+is then run `--repeat` times for one of them through
+app.services.itinerary_service, and the users are deleted afterwards.
+
+Searches are scoped to one user, so latency follows the size of that
+user's collection more than the table's: `--users 1` is the worst case,
+where a common word matches a large share of 100k rows and ts_rank has
+to score every match.
+
+Usage (from the backend directory):
+    python -m benchmarks.itinerary_search_bench [--itineraries 100000] [--users 500] [--repeat 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+
+from sqlalchemy import delete, text
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services.itinerary_service import search_itineraries
+
+CITIES = [
+    "Lisbon", "Porto", "Madrid", "Seville", "Barcelona", "Paris", "Lyon", "Rome", "Florence",
+    "Venice", "Naples", "Athens", "Berlin", "Munich", "Vienna", "Prague", "Budapest", "Krakow",
+    "Amsterdam", "Brussels", "Copenhagen", "Stockholm", "Oslo", "Helsinki", "Dublin", "Edinburgh",
+    "London", "Reykjavik", "Istanbul", "Marrakesh", "Cairo", "Tokyo", "Kyoto", "Seoul", "Bangkok",
+    "Hanoi", "Bali", "Sydney", "Melbourne", "Auckland", "Lima", "Cusco", "Mexico City", "Havana",
+    "New York", "Chicago", "San Francisco", "Vancouver", "Montreal", "Buenos Aires",
+]
+ACTIVITIES = [
+    "Old town walking tour", "Cathedral visit", "Food market tasting", "Castle and gardens",
+    "Harbour boat trip", "Modern art museum", "Tram ride through the hills", "Wine cellar tour",
+    "Sunset viewpoint", "Cooking class", "Street art walk", "Day trip to the coast",
+    "Flamenco show", "Jazz club night", "Botanical garden stroll", "Hot springs afternoon",
+]
+QUERIES = ["lisbon", "castle gardens", "\"wine cellar\"", "Lisbn", "jazz -museum", "zanzibar"]
+
+SEED = text("""
+    INSERT INTO itineraries (user_id, title, destination, description, ai_content)
+    SELECT
+        (CAST(:user_ids AS UUID[]))[n % :user_count + 1],
+        'Trip to ' || city,
+        city,
+        'A ' || (n % 14 + 1) || '-day trip to ' || city,
+        jsonb_build_object('overview', 'Trip to ' || city, 'days', (
+            SELECT jsonb_agg(jsonb_build_object('day', d, 'activities', jsonb_build_array(
+                jsonb_build_object('time', '09:00', 'title', (CAST(:activities AS TEXT[]))[(n + d) % :activity_count + 1], 'location', city),
+                jsonb_build_object('time', '15:00', 'title', (CAST(:activities AS TEXT[]))[(n * 7 + d) % :activity_count + 1], 'location', city)
+            )))
+            FROM generate_series(1, n % 7 + 1) AS d
+        ))
+    FROM (
+        SELECT n, (CAST(:cities AS TEXT[]))[n % :city_count + 1] AS city
+        FROM generate_series(1, :count) AS n
+    ) seed
+""")
+
+
+async def seed(user_ids: List[uuid.UUID], count: int) -> None:
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            User(id=user_id, email=f"search-bench-{user_id}@example.com", full_name="Benchmark")
+            for user_id in user_ids
+        )
+        await db.flush()
+        await db.execute(SEED, {
+            "user_ids": user_ids,
+            "user_count": len(user_ids),
+            "count": count,
+            "cities": CITIES,
+            "city_count": len(CITIES),
+            "activities": ACTIVITIES,
+            "activity_count": len(ACTIVITIES),
+        })
+        await db.execute(text("ANALYZE itineraries"))
+        await db.commit()
+
+
+async def measure(user_id: uuid.UUID, q: str, repeat: int, second_page: bool) -> None:
+    latencies = []
+    hits = 0
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            items, next_cursor = await search_itineraries(db, user_id, q, 10)
+            if second_page and next_cursor:
+                items, _ = await search_itineraries(db, user_id, q, 10, next_cursor)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits = len(items)
+    name = f"{q} (page 2)" if second_page else q
+    print(
+        f"{name:<26}{hits:>6}{statistics.median(latencies):>10.2f}"
+        f"{sorted(latencies)[int(len(latencies) * 0.95) - 1]:>10.2f}"
+    )
+
+
+async def main(count: int, users: int, repeat: int) -> None:
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    started = time.perf_counter()
+    await seed(user_ids, count)
+    print(
+        f"Seeded {count} itineraries for {users} users in {time.perf_counter() - started:.1f}s; "
+        f"searching one user's {count // users}"
+    )
+
+    try:
+        print(f"{'query':<26}{'hits':>6}{'p50 ms':>10}{'p95 ms':>10}")
+        for q in QUERIES:
+            await measure(user_ids[0], q, repeat, second_page=False)
+        await measure(user_ids[0], QUERIES[1], repeat, second_page=True)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--itineraries", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.itineraries, args.users, args.repeat))
@@ -0,0 +1,120 @@
+"""
+Compare WAL volume and latency of a JSON Patch against a full-column PUT.
+
+Needs the Postgres database from DATABASE_URL with the schema from
+migrations/db_init.sql. A throwaway user and a synthetic itinerary are
+created; each update style then changes one activity's cost `--updates`
+times, and everything is deleted afterwards. WAL bytes are read from
+pg_current_wal_insert_lsn(), so run it against an otherwise idle
+database.
+
+The PUT side does what update_itinerary does: validate the full
+ai_content sent by the client, load the row, assign the column, commit
+and refresh. The PATCH side sends one `replace` operation through
+app.services.json_patch.
+
+Usage (from the backend directory):
+    python -m benchmarks.json_patch_bench [--updates 200] [--days 30]
+"""
+import argparse
+import asyncio
+import copy
+import statistics
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import delete, text
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.itinerary import Itinerary
+from app.models.user import User
+from app.schemas.itinerary import ItineraryUpdate, JSONPatchOperation
+from app.services.itinerary_service import get_user_itinerary
+from app.services.json_patch import patch_itinerary
+from benchmarks.serialization_bench import synthetic_itinerary
+
+COST_PATH = "/ai_content/days/0/activities/0/cost"
+
+
+async def _wal_position() -> int:
+    """Bytes of WAL written since the cluster was created."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), '0/0')"))
+        return int(result.scalar_one())
+
+
+async def put_update(itinerary_id: uuid.UUID, user_id: uuid.UUID, content: Dict[str, Any], n: int) -> None:
+    """Full-column update, as PUT /itineraries/{id} does it."""
+    content["days"][0]["activities"][0]["cost"] = f"${n}"
+    itinerary_data = ItineraryUpdate.model_validate({"ai_content": content})
+    async with AsyncSessionLocal() as db:
+        itinerary = await get_user_itinerary(db, itinerary_id, user_id)
+        for field, value in itinerary_data.model_dump(exclude_unset=True).items():
+            setattr(itinerary, field, value)
+        await db.commit()
+        await db.refresh(itinerary)
+
+
+async def patch_update(itinerary_id: uuid.UUID, user_id: uuid.UUID, content: Dict[str, Any], n: int) -> None:
+    """One-operation JSON Patch, as PATCH /itineraries/{id} does it."""
+    operations = [JSONPatchOperation.model_validate({"op": "replace", "path": COST_PATH, "value": f"${n}"})]
+    async with AsyncSessionLocal() as db:
+        itinerary = await patch_itinerary(db, itinerary_id, user_id, operations)
+        assert itinerary is not None, "patch did not apply"
+        await db.commit()
+
+
+async def run(
+    name: str,
+    update: Callable[..., Awaitable[None]],
+    itinerary_id: uuid.UUID,
+    user_id: uuid.UUID,
+    content: Dict[str, Any],
+    updates: int
+) -> None:
+    latencies = []
+    start = await _wal_position()
+    for n in range(updates):
+        started = time.perf_counter()
+        await update(itinerary_id, user_id, content, n)
+        latencies.append((time.perf_counter() - started) * 1000)
+    wal = await _wal_position() - start
+    print(
+        f"{name:<8}{wal / updates / 1024:>14.1f}{statistics.median(latencies):>10.2f}"
+        f"{sorted(latencies)[int(len(latencies) * 0.95) - 1]:>10.2f}"
+    )
+
+
+async def main(updates: int, days: int) -> None:
+    user = User(email=f"json-patch-bench-{uuid.uuid4()}@example.com", full_name="Benchmark")
+    itinerary = synthetic_itinerary(days)
+    itinerary.user_id = user.id = uuid.uuid4()
+    itinerary.created_at = None
+    content = copy.deepcopy(itinerary.ai_content)
+
+    async with AsyncSessionLocal() as db:
+        db.add(user)
+        await db.flush()
+        db.add(itinerary)
+        await db.commit()
+
+    try:
+        print(f"{days}-day itinerary, {updates} updates of one activity")
+        print(f"{'method':<8}{'WAL KB/update':>14}{'p50 ms':>10}{'p95 ms':>10}")
+        await run("PUT", put_update, itinerary.id, user.id, content, updates)
+        await run("PATCH", patch_update, itinerary.id, user.id, content, updates)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Itinerary).where(Itinerary.user_id == user.id))
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.days))
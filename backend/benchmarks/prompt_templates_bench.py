@@ -0,0 +1,133 @@
+"""
+Compare prompt template versions on prompt size, output size, latency and
+parse success.
+
+Sample responses from fixtures/gemini_responses.json are replayed through
+a fake model, so no API key or network access is needed. Token counts are
+estimated at four characters per token; model latency is simulated as a
+fixed overhead plus a per-output-token cost, then scaled down so the run
+finishes quickly.
+
+Usage (from the backend directory):
+    python -m benchmarks.prompt_templates_bench [--requests 40] [--time-scale 0.01]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.services.gemini_service import GeminiService
+from app.services.prompt_templates import PROMPT_TEMPLATES
+
+FIXTURE = Path(__file__).parent / "fixtures" / "gemini_responses.json"
+
+CHARS_PER_TOKEN = 4
+BASE_LATENCY_MS = 400
+MS_PER_OUTPUT_TOKEN = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for English/JSON text."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ReplayModel:
+    """Fake model that answers with fixture sample responses in rotation."""
+
+    def __init__(self, responses: List[str], system_instruction: str, time_scale: float):
+        self._responses = itertools.cycle(responses)
+        self.system_instruction = system_instruction or ""
+        self.time_scale = time_scale
+        self.prompt_tokens: List[int] = []
+        self.output_tokens: List[int] = []
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        text = next(self._responses)
+        output_tokens = estimate_tokens(text)
+        self.prompt_tokens.append(estimate_tokens(self.system_instruction + prompt))
+        self.output_tokens.append(output_tokens)
+        latency_ms = BASE_LATENCY_MS + MS_PER_OUTPUT_TOKEN * output_tokens
+        await asyncio.sleep(latency_ms / 1000 * self.time_scale)
+        return _Response(text)
+
+
+class ReplayGeminiService(GeminiService):
+    """GeminiService whose model calls go to a ReplayModel."""
+
+    def __init__(self, model: ReplayModel):
+        super().__init__()
+        self.replay_model = model
+
+    def _get_model(self, template=None, model_name=None):
+        return self.replay_model
+
+
+def _is_parsed(itinerary: Dict[str, Any]) -> bool:
+    """A response counts as parsed when it yields days and no error marker."""
+    return bool(itinerary.get("days")) and "error" not in itinerary and "raw_response" not in itinerary
+
+
+async def run_version(version: str, fixture: Dict[str, Any], requests: int, time_scale: float) -> Dict[str, Any]:
+    """Replay `requests` itinerary generations against one template version."""
+    template = PROMPT_TEMPLATES[version]
+    model = ReplayModel(fixture["responses"][version], template.system_instruction, time_scale)
+    service = ReplayGeminiService(model)
+    request = fixture["request"]
+
+    latencies = []
+    parsed = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        # Parse failures are logged by the service; keep them out of the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            itinerary = await service.generate_itinerary(
+                request["destination"],
+                request["start_date"],
+                request["end_date"],
+                request["preferences"],
+                request["budget"],
+                bypass_cache=True,
+                prompt_version=version,
+            )
+        latencies.append((time.perf_counter() - started) * 1000 / time_scale)
+        parsed += _is_parsed(itinerary)
+    service.close()
+
+    return {
+        "version": version,
+        "prompt_tokens": statistics.mean(model.prompt_tokens),
+        "output_tokens": statistics.mean(model.output_tokens),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+        "parse_rate": parsed / requests,
+    }
+
+
+async def main(requests: int, time_scale: float) -> None:
+    fixture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    print(f"{'version':<8}{'prompt tok':>12}{'output tok':>12}{'p50 ms':>10}{'p95 ms':>10}{'parsed':>9}")
+    for version in sorted(fixture["responses"]):
+        row = await run_version(version, fixture, requests, time_scale)
+        print(
+            f"{row['version']:<8}{row['prompt_tokens']:>12.0f}{row['output_tokens']:>12.0f}"
+            f"{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['parse_rate']:>9.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.time_scale))
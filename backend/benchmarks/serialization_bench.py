@@ -0,0 +1,134 @@
+"""
+Compare itinerary response serialization paths on synthetic itineraries.
+
+Each itinerary row is turned into a response body the way FastAPI did it
+before (validate the row against the response model, dump it to Python
+objects, encode with `json`), with only the orjson response class, and
+through app.core.responses with and without trusted output. Every body is
+checked to decode to the same JSON as the baseline.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization_bench [--iterations 200]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core import responses
+from app.core.config import settings
+from app.models.itinerary import Itinerary
+from app.schemas.itinerary import Itinerary as ItinerarySchema
+
+DAY_COUNTS = (1, 7, 30)
+RESPONSE_FIELD = create_response_field(name="Response_get_itinerary", type_=ItinerarySchema)
+
+
+def synthetic_itinerary(days: int) -> Itinerary:
+    """Itinerary row shaped like a generated one, with `days` full days."""
+    start = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    activities = [
+        {
+            "time": f"{hour:02d}:00",
+            "activity": f"Activity {hour}",
+            "description": "Walk through the old town and stop at the market. " * 3,
+            "duration": "2 hours",
+            "cost": f"${hour * 5}",
+            "tips": ["Book ahead", "Bring cash", "Wear comfortable shoes"],
+        }
+        for hour in (9, 12, 15, 19)
+    ]
+    ai_content = {
+        "overview": "A relaxed trip mixing museums, food and day walks. " * 4,
+        "days": [
+            {
+                "day": day + 1,
+                "date": (start + timedelta(days=day)).date().isoformat(),
+                "title": f"Day {day + 1} in Lisbon",
+                "activities": activities,
+                "meals": {"breakfast": "Pastelaria", "lunch": "Tasca", "dinner": "Marisqueira"},
+                "accommodation": "Hotel in Baixa",
+                "estimated_cost": "$180",
+            }
+            for day in range(days)
+        ],
+        "total_estimated_cost": f"${days * 180}",
+        "packing_suggestions": ["Sunscreen", "Light jacket", "Walking shoes"],
+        "travel_tips": ["Buy a Viva Viagem card", "Trams fill up early"],
+    }
+    return Itinerary(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        title="Trip to Lisbon",
+        destination="Lisbon, Portugal",
+        description=ai_content["overview"],
+        start_date=start,
+        end_date=start + timedelta(days=days - 1),
+        ai_content=ai_content,
+        flights_data={"flights": [{"id": "FL001", "price": 250.0, "currency": "USD"}]},
+        hotels_data={"hotels": [{"id": "HT001", "price_per_night": 150.0}]},
+        experiences_data=None,
+        created_at=start - timedelta(days=30),
+        updated_at=None,
+    )
+
+
+def _fastapi_body(itinerary: Itinerary, response_class) -> bytes:
+    coroutine = serialize_response(field=RESPONSE_FIELD, response_content=itinerary, is_coroutine=True)
+    # serialize_response never suspends here; run it without an event loop
+    # so loop overhead stays out of the timings
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return response_class(done.value).body
+    raise RuntimeError("serialize_response suspended")
+
+
+def _adapter_body(itinerary: Itinerary, trusted: bool) -> bytes:
+    settings.RESPONSE_TRUSTED_OUTPUT = trusted
+    return responses.itinerary_response(itinerary).body
+
+
+PATHS: Dict[str, Callable[[Itinerary], bytes]] = {
+    "before (validate + json)": lambda row: _fastapi_body(row, JSONResponse),
+    "validate + orjson": lambda row: _fastapi_body(row, ORJSONResponse),
+    "TypeAdapter, validated": lambda row: _adapter_body(row, False),
+    "TypeAdapter, trusted": lambda row: _adapter_body(row, True),
+}
+
+
+def measure(path: Callable[[Itinerary], bytes], itinerary: Itinerary, iterations: int) -> float:
+    """Responses per second for one path."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        path(itinerary)
+    return iterations / (time.perf_counter() - started)
+
+
+def main(iterations: int) -> None:
+    trusted = settings.RESPONSE_TRUSTED_OUTPUT
+    print(f"{'days':<6}{'path':<28}{'KB':>8}{'resp/s':>10}{'speedup':>9}")
+    for days in DAY_COUNTS:
+        itinerary = synthetic_itinerary(days)
+        expected = json.loads(PATHS["before (validate + json)"](itinerary))
+        baseline = None
+        for name, path in PATHS.items():
+            body = path(itinerary)
+            assert json.loads(body) == expected, f"{name} output differs"
+            rate = measure(path, itinerary, iterations)
+            baseline = baseline or rate
+            print(f"{days:<6}{name:<28}{len(body) / 1024:>8.1f}{rate:>10.0f}{rate / baseline:>8.1f}x")
+    settings.RESPONSE_TRUSTED_OUTPUT = trusted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.iterations)
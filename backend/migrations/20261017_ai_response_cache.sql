@@ -0,0 +1,24 @@
+-- ============================================================================
+-- Migration: shared AI response cache
+--
+-- Second cache tier for Gemini itinerary and recommendation results, shared
+-- by every API worker. Entries are keyed by a hash of the canonicalised
+-- request and expire after AI_CACHE_TTL_SECONDS.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+    key VARCHAR(255) PRIMARY KEY,  -- kind:version:sha256 of canonical request
+    value JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_response_cache_expires_at ON ai_response_cache(expires_at);
+
+-- Function to clean up expired AI cache entries
+CREATE OR REPLACE FUNCTION cleanup_expired_ai_cache()
+RETURNS void AS $$
+BEGIN
+    DELETE FROM ai_response_cache WHERE expires_at < CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
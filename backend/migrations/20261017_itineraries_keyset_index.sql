@@ -0,0 +1,14 @@
+-- ============================================================================
+-- Migration: composite index for itinerary pagination
+--
+-- GET /itineraries filters on user_id and pages newest-first on
+-- (created_at, id). This index returns each page straight from the index
+-- without a sort, and makes the single-column user_id index redundant.
+--
+-- Run outside a transaction block (CONCURRENTLY avoids locking writes).
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itineraries_user_created
+    ON itineraries(user_id, created_at DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_itineraries_user_id;
@@ -0,0 +1,32 @@
+-- ============================================================================
+-- Migration: itinerary generation job queue
+--
+-- Backs POST /itineraries/jobs. API workers claim rows with
+-- SELECT ... FOR UPDATE SKIP LOCKED, so no external broker is needed.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS itinerary_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, failed
+    request JSONB NOT NULL,  -- AIItineraryRequest payload
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Retry backoff
+    itinerary_id UUID REFERENCES itineraries(id) ON DELETE SET NULL,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Indexes for itinerary_jobs
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_user_id ON itinerary_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_queued ON itinerary_jobs(run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_running ON itinerary_jobs(started_at) WHERE status = 'running';
+
+CREATE TRIGGER update_itinerary_jobs_updated_at
+    BEFORE UPDATE ON itinerary_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,58 @@
+-- ============================================================================
+-- Migration: full-text and fuzzy itinerary search
+--
+-- GET /itineraries/search matches itineraries.search_vector (title and
+-- destination weighted A, description B, activity titles, locations and
+-- descriptions from ai_content C) and, for typos, trigram similarity on
+-- destination. A trigger keeps search_vector in sync with the row.
+--
+-- The backfill rewrites every itinerary once, which also moves updated_at
+-- (and so each itinerary's ETag). On large tables run it in batches of
+-- ids instead.
+--
+-- Run outside a transaction block (CONCURRENTLY avoids locking writes).
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+ALTER TABLE itineraries ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+CREATE OR REPLACE FUNCTION itinerary_activity_text(content JSONB)
+RETURNS TEXT AS $$
+    SELECT string_agg(concat_ws(' ', activity->>'title', activity->>'location', activity->>'description'), ' ')
+    FROM jsonb_path_query(content, '$.days[*].activities[*] ? (@.type() == "object")') AS activity;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION itinerary_search_vector(
+    p_title TEXT, p_destination TEXT, p_description TEXT, p_content JSONB
+)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(p_destination, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(p_description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(itinerary_activity_text(p_content), '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION update_itinerary_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector = itinerary_search_vector(NEW.title, NEW.destination, NEW.description, NEW.ai_content);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_itineraries_search_vector ON itineraries;
+CREATE TRIGGER update_itineraries_search_vector
+    BEFORE INSERT OR UPDATE OF title, destination, description, ai_content ON itineraries
+    FOR EACH ROW
+    EXECUTE FUNCTION update_itinerary_search_vector();
+
+UPDATE itineraries
+SET search_vector = itinerary_search_vector(title, destination, description, ai_content)
+WHERE search_vector IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itineraries_search_vector
+    ON itineraries USING GIN(search_vector);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itineraries_destination_trgm
+    ON itineraries USING GIN(destination gin_trgm_ops);
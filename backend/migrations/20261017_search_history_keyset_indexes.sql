@@ -0,0 +1,18 @@
+-- ============================================================================
+-- Migration: composite indexes for search history pagination
+--
+-- GET /history and the per-type /history endpoints filter on user_id (and
+-- optionally search_type) and page newest-first on (created_at, id). These
+-- indexes return each page straight from the index without a sort, and
+-- make the single-column user_id index redundant.
+--
+-- Run outside a transaction block (CONCURRENTLY avoids locking writes).
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_history_user_type_created
+    ON search_history(user_id, search_type, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_history_user_created
+    ON search_history(user_id, created_at DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_search_history_user_id;
@@ -0,0 +1,78 @@
+-- ============================================================================
+-- Migration: content-addressed search results
+--
+-- Identical offer lists are stored once in search_result_blobs and
+-- search_history rows point at them by hash. The API raises ref_count when
+-- it writes history rows; a statement trigger lowers it when rows are
+-- deleted, and cleanup_orphaned_search_blobs() removes unreferenced blobs.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS search_result_blobs (
+    hash CHAR(64) PRIMARY KEY,  -- SHA-256 of the canonical offers JSON
+    results JSONB NOT NULL,  -- Offer list
+    size_bytes INTEGER NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,  -- Number of search_history rows pointing here
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_result_blobs_orphaned ON search_result_blobs(hash) WHERE ref_count <= 0;
+
+ALTER TABLE search_history ADD COLUMN IF NOT EXISTS results_hash CHAR(64);
+
+CREATE OR REPLACE FUNCTION release_search_result_blobs()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE search_result_blobs b
+    SET ref_count = b.ref_count - released.refs
+    FROM (
+        SELECT results_hash, COUNT(*) AS refs
+        FROM old_rows
+        WHERE results_hash IS NOT NULL
+        GROUP BY results_hash
+    ) released
+    WHERE b.hash = released.results_hash;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS release_search_history_blobs ON search_history;
+CREATE TRIGGER release_search_history_blobs
+    AFTER DELETE ON search_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION release_search_result_blobs();
+
+CREATE OR REPLACE FUNCTION cleanup_orphaned_search_blobs()
+RETURNS INTEGER AS $$
+DECLARE
+    deleted INTEGER;
+BEGIN
+    DELETE FROM search_result_blobs WHERE ref_count <= 0;
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    RETURN deleted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move existing inline offer lists ("flights", "hotels" or "experiences")
+-- into blobs. Hashes here are taken over Postgres' JSONB text form, so an
+-- old and a new copy of the same offers may end up as two blobs; repeats
+-- among the old rows are still collapsed.
+UPDATE search_history
+SET results_hash = encode(sha256(convert_to((results -> (search_type || 's'))::text, 'UTF8')), 'hex'),
+    result_count = jsonb_array_length(results -> (search_type || 's'))
+WHERE results_hash IS NULL
+  AND jsonb_typeof(results -> (search_type || 's')) = 'array';
+
+INSERT INTO search_result_blobs (hash, results, size_bytes, ref_count)
+SELECT
+    results_hash,
+    (array_agg(results -> (search_type || 's')))[1],
+    octet_length((array_agg(results -> (search_type || 's')))[1]::text),
+    COUNT(*)
+FROM search_history
+WHERE results IS NOT NULL AND results_hash IS NOT NULL
+GROUP BY results_hash
+ON CONFLICT (hash) DO UPDATE SET ref_count = search_result_blobs.ref_count + EXCLUDED.ref_count;
+
+UPDATE search_history SET results = NULL WHERE results_hash IS NOT NULL AND results IS NOT NULL;
@@ -0,0 +1,21 @@
+-- ============================================================================
+-- Migration: user cache invalidation notifications
+--
+-- API workers cache authenticated user snapshots in memory and LISTEN on
+-- the user_cache_invalidate channel. Any update or delete of a user row,
+-- including is_active changes made outside the API, notifies every worker.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notify_user_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('user_cache_invalidate', OLD.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_users_changed ON users;
+CREATE TRIGGER notify_users_changed
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_user_changed();
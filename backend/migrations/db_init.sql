@@ -74,12 +74,13 @@ CREATE TABLE IF NOT EXISTS itineraries (
     flights_data JSONB,  -- Selected flight information
     hotels_data JSONB,  -- Selected hotel information
     experiences_data JSONB,  -- Selected experiences information
+    search_vector TSVECTOR,  -- Maintained by the update_itineraries_search_vector trigger
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE
 );
 
 -- Indexes for itineraries
-CREATE INDEX IF NOT EXISTS idx_itineraries_user_id ON itineraries(user_id);
+CREATE INDEX IF NOT EXISTS idx_itineraries_user_created ON itineraries(user_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_itineraries_destination ON itineraries(destination);
 CREATE INDEX IF NOT EXISTS idx_itineraries_dates ON itineraries(start_date, end_date);
 CREATE INDEX IF NOT EXISTS idx_itineraries_status ON itineraries(status);
@@ -92,6 +93,34 @@ CREATE INDEX IF NOT EXISTS idx_itineraries_flights_data ON itineraries USING GIN
 CREATE INDEX IF NOT EXISTS idx_itineraries_hotels_data ON itineraries USING GIN(hotels_data);
 CREATE INDEX IF NOT EXISTS idx_itineraries_experiences_data ON itineraries USING GIN(experiences_data);
 
+-- Full-text search (GET /itineraries/search) and typo-tolerant destination matching
+CREATE INDEX IF NOT EXISTS idx_itineraries_search_vector ON itineraries USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_itineraries_destination_trgm ON itineraries USING GIN(destination gin_trgm_ops);
+
+-- ----------------------------------------------------------------------------
+-- Itinerary Jobs table: Queue for asynchronous AI itinerary generation
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS itinerary_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, failed
+    request JSONB NOT NULL,  -- AIItineraryRequest payload
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Retry backoff
+    itinerary_id UUID REFERENCES itineraries(id) ON DELETE SET NULL,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Indexes for itinerary_jobs
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_user_id ON itinerary_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_queued ON itinerary_jobs(run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_itinerary_jobs_running ON itinerary_jobs(started_at) WHERE status = 'running';
+
 -- ----------------------------------------------------------------------------
 -- Search History table: Tracks user searches for analytics and quick re-search
 -- ----------------------------------------------------------------------------
@@ -100,17 +129,48 @@ CREATE TABLE IF NOT EXISTS search_history (
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     search_type VARCHAR(50) NOT NULL,  -- flight, hotel, experience, itinerary
     search_params JSONB NOT NULL,
-    results JSONB,
+    results JSONB,  -- Legacy inline results; new rows reference search_result_blobs
+    results_hash CHAR(64),  -- search_result_blobs.hash
     result_count INTEGER DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Indexes for search_history
-CREATE INDEX IF NOT EXISTS idx_search_history_user_id ON search_history(user_id);
+-- Keyset pagination of a user's history, with and without a type filter
+CREATE INDEX IF NOT EXISTS idx_search_history_user_type_created ON search_history(user_id, search_type, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_search_history_user_created ON search_history(user_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_search_history_type ON search_history(search_type);
 CREATE INDEX IF NOT EXISTS idx_search_history_created_at ON search_history(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_search_history_params ON search_history USING GIN(search_params);
 
+-- ----------------------------------------------------------------------------
+-- Search Result Blobs: Distinct search result lists, stored once by content hash
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS search_result_blobs (
+    hash CHAR(64) PRIMARY KEY,  -- SHA-256 of the canonical offers JSON
+    results JSONB NOT NULL,  -- Offer list
+    size_bytes INTEGER NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,  -- Number of search_history rows pointing here
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for search_result_blobs
+CREATE INDEX IF NOT EXISTS idx_search_result_blobs_orphaned ON search_result_blobs(hash) WHERE ref_count <= 0;
+
+-- ----------------------------------------------------------------------------
+-- AI Response Cache: Shared cache of Gemini results keyed by canonical request
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+    key VARCHAR(255) PRIMARY KEY,  -- kind:version:sha256 of canonical request
+    value JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Indexes for ai_response_cache
+CREATE INDEX IF NOT EXISTS idx_ai_response_cache_expires_at ON ai_response_cache(expires_at);
+
 -- ============================================================================
 -- SAVED/FAVORITE OFFERS TABLES
 -- ============================================================================
@@ -290,6 +350,11 @@ CREATE TRIGGER update_itineraries_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_itinerary_jobs_updated_at
+    BEFORE UPDATE ON itinerary_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_saved_flights_updated_at
     BEFORE UPDATE ON saved_flights
     FOR EACH ROW
@@ -305,6 +370,75 @@ CREATE TRIGGER update_saved_experiences_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Function to tell API workers that a cached user snapshot is stale
+CREATE OR REPLACE FUNCTION notify_user_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('user_cache_invalidate', OLD.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_users_changed
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_user_changed();
+
+-- Function to release blob references when search history rows are deleted
+CREATE OR REPLACE FUNCTION release_search_result_blobs()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE search_result_blobs b
+    SET ref_count = b.ref_count - released.refs
+    FROM (
+        SELECT results_hash, COUNT(*) AS refs
+        FROM old_rows
+        WHERE results_hash IS NOT NULL
+        GROUP BY results_hash
+    ) released
+    WHERE b.hash = released.results_hash;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER release_search_history_blobs
+    AFTER DELETE ON search_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION release_search_result_blobs();
+
+-- Function to collect the searchable text of an itinerary's activities
+CREATE OR REPLACE FUNCTION itinerary_activity_text(content JSONB)
+RETURNS TEXT AS $$
+    SELECT string_agg(concat_ws(' ', activity->>'title', activity->>'location', activity->>'description'), ' ')
+    FROM jsonb_path_query(content, '$.days[*].activities[*] ? (@.type() == "object")') AS activity;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Function to build an itinerary's full-text search document
+CREATE OR REPLACE FUNCTION itinerary_search_vector(
+    p_title TEXT, p_destination TEXT, p_description TEXT, p_content JSONB
+)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(p_destination, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(p_description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(itinerary_activity_text(p_content), '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Function to keep itineraries.search_vector in sync with the row
+CREATE OR REPLACE FUNCTION update_itinerary_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector = itinerary_search_vector(NEW.title, NEW.destination, NEW.description, NEW.ai_content);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_itineraries_search_vector
+    BEFORE INSERT OR UPDATE OF title, destination, description, ai_content ON itineraries
+    FOR EACH ROW
+    EXECUTE FUNCTION update_itinerary_search_vector();
+
 -- Function to clean up expired sessions
 CREATE OR REPLACE FUNCTION cleanup_expired_sessions()
 RETURNS void AS $$
@@ -315,6 +449,26 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to clean up expired AI cache entries
+CREATE OR REPLACE FUNCTION cleanup_expired_ai_cache()
+RETURNS void AS $$
+BEGIN
+    DELETE FROM ai_response_cache WHERE expires_at < CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to delete search result blobs no history row references
+CREATE OR REPLACE FUNCTION cleanup_orphaned_search_blobs()
+RETURNS INTEGER AS $$
+DECLARE
+    deleted INTEGER;
+BEGIN
+    DELETE FROM search_result_blobs WHERE ref_count <= 0;
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    RETURN deleted;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================================
 -- SAMPLE DATA FOR DEVELOPMENT AND TESTING
 -- ============================================================================
@@ -533,6 +687,9 @@ $$ LANGUAGE plpgsql;
 -- Clean up expired sessions
 -- SELECT cleanup_expired_sessions();
 
+-- Clean up expired AI cache entries
+-- SELECT cleanup_expired_ai_cache();
+
 -- ============================================================================
 -- END OF INITIALIZATION SCRIPT
 -- ============================================================================
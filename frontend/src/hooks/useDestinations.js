@@ -0,0 +1,25 @@
+import { useState } from 'react';
+import api from '../services/api';
+
+export function useDestinations() {
+  const [suggestions, setSuggestions] = useState([]);
+  const [error, setError] = useState(null);
+
+  const autocomplete = async (q, limit = 10) => {
+    if (!q.trim()) {
+      setSuggestions([]);
+      return [];
+    }
+    setError(null);
+    try {
+      const response = await api.get('/api/v1/destinations/autocomplete', { params: { q, limit } });
+      setSuggestions(response.data);
+      return response.data;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    }
+  };
+
+  return { suggestions, error, autocomplete };
+}
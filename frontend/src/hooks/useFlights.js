@@ -6,11 +6,17 @@ export function useFlights() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
-  const searchFlights = async (params) => {
+  // options: max_price, max_stops, depart_after, depart_before, airlines,
+  // pareto, sort ('price' | 'duration' | 'best'), offset, limit
+  const searchFlights = async (params, options = {}) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await api.post('/api/v1/flights/search', params);
+      const response = await api.post('/api/v1/flights/search', params, {
+        params: options,
+        // Repeat array parameters (airlines=a&airlines=b) as the API expects
+        paramsSerializer: { indexes: null },
+      });
       setFlights(response.data.flights);
       return response.data;
     } catch (err) {
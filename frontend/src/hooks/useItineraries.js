@@ -11,7 +11,21 @@ export function useItineraries() {
     setLoading(true);
     try {
       const response = await api.get('/api/v1/itineraries');
-      setItineraries(response.data);
+      setItineraries(response.data.items);
+      return response.data.items;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const searchItineraries = async (q, cursor = null) => {
+    setLoading(true);
+    try {
+      const params = cursor ? { q, cursor } : { q };
+      const response = await api.get('/api/v1/itineraries/search', { params });
       return response.data;
     } catch (err) {
       setError(err.message);
@@ -89,6 +103,49 @@ export function useItineraries() {
     }
   };
 
+  const fetchItinerariesBatch = async (ids) => {
+    setLoading(true);
+    try {
+      const response = await api.post('/api/v1/itineraries/batch-get', { ids });
+      return response.data.items;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const createItinerariesBatch = async (items) => {
+    setLoading(true);
+    try {
+      const response = await api.post('/api/v1/itineraries/batch', { items });
+      return response.data.items;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const deleteItinerariesBatch = async (ids) => {
+    setLoading(true);
+    try {
+      const response = await api.post('/api/v1/itineraries/batch-delete', { ids });
+      const deleted = new Set(
+        response.data.items.filter(item => item.status === 200).map(item => item.id)
+      );
+      setItineraries(itineraries.filter(i => !deleted.has(i.id)));
+      return response.data.items;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const getRecommendations = async (preferences, budget) => {
     setLoading(true);
     try {
@@ -111,11 +168,15 @@ export function useItineraries() {
     loading,
     error,
     fetchItineraries,
+    searchItineraries,
     fetchItinerary,
     generateItinerary,
     createItinerary,
     updateItinerary,
     deleteItinerary,
+    fetchItinerariesBatch,
+    createItinerariesBatch,
+    deleteItinerariesBatch,
     getRecommendations,
   };
 }